@@ -11,6 +11,7 @@ from app.core.database import get_db
 from app.api.auth import get_current_admin
 from app.models.admin import Admin
 from app.models.shared import TelegramChannel, MaxChannel, CrosspostingLink
+from app.utils.search import search_condition
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
@@ -37,9 +38,7 @@ async def get_telegram_channels(
         if is_active is not None:
             query = query.where(TelegramChannel.is_active == is_active)
         if search:
-            query = query.where(
-                (TelegramChannel.channel_title.ilike(f"%{search}%")) | (TelegramChannel.channel_username.ilike(f"%{search}%"))
-            )
+            query = query.where(search_condition(search, [TelegramChannel.channel_title, TelegramChannel.channel_username]))
 
         # Общее количество
         count_result = await db.execute(select(func.count(TelegramChannel.id)).select_from(query.subquery()))
@@ -51,29 +50,25 @@ async def get_telegram_channels(
             .offset(skip)
             .limit(limit)
         )
-        result = await db.execute(query)
-        channels = result.scalars().all()
-
-        # Получаем количество связей для каждого канала
-        channels_data = []
-        for channel in channels:
-            links_count = await db.execute(
-                select(func.count(CrosspostingLink.id)).where(CrosspostingLink.telegram_channel_id == channel.id)
-            )
-            links = links_count.scalar() or 0
-
-            channels_data.append(
-                {
-                    "id": channel.id,
-                    "user_id": channel.user_id,
-                    "channel_id": channel.channel_id,
-                    "channel_username": channel.channel_username,
-                    "channel_title": channel.channel_title,
-                    "is_active": channel.is_active,
-                    "bot_added_at": channel.bot_added_at,
-                    "links_count": links,
-                }
-            )
+        # Количество связей считается в том же запросе (коррелированный подзапрос по индексу)
+        links_count = (
+            select(func.count(CrosspostingLink.id)).where(CrosspostingLink.telegram_channel_id == TelegramChannel.id).scalar_subquery()
+        )
+        result = await db.execute(query.add_columns(links_count.label("links_count")))
+
+        channels_data = [
+            {
+                "id": channel.id,
+                "user_id": channel.user_id,
+                "channel_id": channel.channel_id,
+                "channel_username": channel.channel_username,
+                "channel_title": channel.channel_title,
+                "is_active": channel.is_active,
+                "bot_added_at": channel.bot_added_at,
+                "links_count": links or 0,
+            }
+            for channel, links in result.all()
+        ]
 
         return {"total": total, "skip": skip, "limit": limit, "data": channels_data}
     except Exception as e:
@@ -142,9 +137,7 @@ async def get_max_channels(
         if is_active is not None:
             query = query.where(MaxChannel.is_active == is_active)
         if search:
-            query = query.where(
-                (MaxChannel.channel_title.ilike(f"%{search}%")) | (MaxChannel.channel_username.ilike(f"%{search}%"))
-            )
+            query = query.where(search_condition(search, [MaxChannel.channel_title, MaxChannel.channel_username]))
 
         # Общее количество
         count_result = await db.execute(select(func.count(MaxChannel.id)).select_from(query.subquery()))
@@ -156,29 +149,25 @@ async def get_max_channels(
             .offset(skip)
             .limit(limit)
         )
-        result = await db.execute(query)
-        channels = result.scalars().all()
-
-        # Получаем количество связей для каждого канала
-        channels_data = []
-        for channel in channels:
-            links_count = await db.execute(
-                select(func.count(CrosspostingLink.id)).where(CrosspostingLink.max_channel_id == channel.id)
-            )
-            links = links_count.scalar() or 0
-
-            channels_data.append(
-                {
-                    "id": channel.id,
-                    "user_id": channel.user_id,
-                    "channel_id": channel.channel_id,
-                    "channel_username": channel.channel_username,
-                    "channel_title": channel.channel_title,
-                    "is_active": channel.is_active,
-                    "bot_added_at": channel.bot_added_at,
-                    "links_count": links,
-                }
-            )
+        # Количество связей считается в том же запросе (коррелированный подзапрос по индексу)
+        links_count = (
+            select(func.count(CrosspostingLink.id)).where(CrosspostingLink.max_channel_id == MaxChannel.id).scalar_subquery()
+        )
+        result = await db.execute(query.add_columns(links_count.label("links_count")))
+
+        channels_data = [
+            {
+                "id": channel.id,
+                "user_id": channel.user_id,
+                "channel_id": channel.channel_id,
+                "channel_username": channel.channel_username,
+                "channel_title": channel.channel_title,
+                "is_active": channel.is_active,
+                "bot_added_at": channel.bot_added_at,
+                "links_count": links or 0,
+            }
+            for channel, links in result.all()
+        ]
 
         return {"total": total, "skip": skip, "limit": limit, "data": channels_data}
     except Exception as e:
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from datetime import datetime, timedelta
 from typing import Optional
 from slowapi import Limiter
@@ -12,6 +12,7 @@ from app.core.database import get_db
 from app.api.auth import get_current_admin
 from app.models.admin import Admin
 from app.models.shared import MessageLog, FailedMessage, AuditLog, CrosspostingLink
+from app.utils.pagination import CountMode, apply_keyset, count_rows, page_with_cursor
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
@@ -23,6 +24,8 @@ async def get_message_logs(
     request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
     link_id: Optional[int] = None,
     status: Optional[str] = None,
     start_date: Optional[str] = None,
@@ -30,7 +33,13 @@ async def get_message_logs(
     current_admin: Admin = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """Получить логи сообщений."""
+    """
+    Получить логи сообщений.
+
+    Следующая страница запрашивается по next_cursor из ответа. Общее количество
+    (total) считается только при count=estimate (оценка планировщика) или
+    count=exact (точный подсчет), иначе возвращается None.
+    """
     try:
         # Фильтруем только логи с существующими связями
         query = select(MessageLog).join(CrosspostingLink, MessageLog.crossposting_link_id == CrosspostingLink.id)
@@ -46,14 +55,15 @@ async def get_message_logs(
             end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
             query = query.where(MessageLog.created_at <= end)
 
-        # Общее количество
-        count_result = await db.execute(select(func.count(MessageLog.id)).select_from(query.subquery()))
-        total = count_result.scalar() or 0
+        # Общее количество - только по запросу (count=estimate|exact)
+        total = await count_rows(db, query, count)
 
-        # Данные с пагинацией
-        query = query.order_by(MessageLog.created_at.desc()).offset(skip).limit(limit)
+        # Данные с keyset-пагинацией по (created_at, id); skip - для клиентов без курсора
+        query = apply_keyset(query, MessageLog.created_at, MessageLog.id, cursor, limit)
+        if not cursor and skip:
+            query = query.offset(skip)
         result = await db.execute(query)
-        logs = result.scalars().all()
+        logs, next_cursor = page_with_cursor(result.scalars().all(), limit)
 
         logs_data = [
             {
@@ -72,7 +82,16 @@ async def get_message_logs(
             for log in logs
         ]
 
-        return {"total": total, "skip": skip, "limit": limit, "data": logs_data}
+        return {
+            "total": total,
+            "total_is_estimate": count == "estimate",
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "data": logs_data,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения логов: {str(e)}")
 
@@ -127,12 +146,14 @@ async def get_failed_messages(
     request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
     link_id: Optional[int] = None,
     resolved: Optional[bool] = None,
     current_admin: Admin = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """Получить список неудачных сообщений."""
+    """Получить список неудачных сообщений (пагинация и total - как в get_message_logs)."""
     try:
         # Фильтруем только логи с существующими связями
         query = select(FailedMessage).join(CrosspostingLink, FailedMessage.crossposting_link_id == CrosspostingLink.id)
@@ -145,14 +166,15 @@ async def get_failed_messages(
             else:
                 query = query.where(FailedMessage.resolved_at.is_(None))
 
-        # Общее количество
-        count_result = await db.execute(select(func.count(FailedMessage.id)).select_from(query.subquery()))
-        total = count_result.scalar() or 0
+        # Общее количество - только по запросу (count=estimate|exact)
+        total = await count_rows(db, query, count)
 
-        # Данные с пагинацией
-        query = query.order_by(FailedMessage.created_at.desc()).offset(skip).limit(limit)
+        # Данные с keyset-пагинацией по (created_at, id); skip - для клиентов без курсора
+        query = apply_keyset(query, FailedMessage.created_at, FailedMessage.id, cursor, limit)
+        if not cursor and skip:
+            query = query.offset(skip)
         result = await db.execute(query)
-        failed_messages = result.scalars().all()
+        failed_messages, next_cursor = page_with_cursor(result.scalars().all(), limit)
 
         failed_data = [
             {
@@ -169,7 +191,16 @@ async def get_failed_messages(
             for fm in failed_messages
         ]
 
-        return {"total": total, "skip": skip, "limit": limit, "data": failed_data}
+        return {
+            "total": total,
+            "total_is_estimate": count == "estimate",
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "data": failed_data,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения неудачных сообщений: {str(e)}")
 
@@ -180,6 +211,8 @@ async def get_audit_logs(
     request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
     user_id: Optional[int] = None,
     action: Optional[str] = None,
     start_date: Optional[str] = None,
@@ -187,7 +220,7 @@ async def get_audit_logs(
     current_admin: Admin = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """Получить логи аудита."""
+    """Получить логи аудита (пагинация и total - как в get_message_logs)."""
     try:
         query = select(AuditLog)
 
@@ -202,14 +235,15 @@ async def get_audit_logs(
             end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
             query = query.where(AuditLog.created_at <= end)
 
-        # Общее количество
-        count_result = await db.execute(select(func.count(AuditLog.id)).select_from(query.subquery()))
-        total = count_result.scalar() or 0
+        # Общее количество - только по запросу (count=estimate|exact)
+        total = await count_rows(db, query, count)
 
-        # Данные с пагинацией
-        query = query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit)
+        # Данные с keyset-пагинацией по (created_at, id); skip - для клиентов без курсора
+        query = apply_keyset(query, AuditLog.created_at, AuditLog.id, cursor, limit)
+        if not cursor and skip:
+            query = query.offset(skip)
         result = await db.execute(query)
-        logs = result.scalars().all()
+        logs, next_cursor = page_with_cursor(result.scalars().all(), limit)
 
         logs_data = [
             {
@@ -224,6 +258,15 @@ async def get_audit_logs(
             for log in logs
         ]
 
-        return {"total": total, "skip": skip, "limit": limit, "data": logs_data}
+        return {
+            "total": total,
+            "total_is_estimate": count == "estimate",
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "data": logs_data,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения логов аудита: {str(e)}")
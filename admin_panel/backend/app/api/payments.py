@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Request, HTTPException, status, Depends, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_, String
+from sqlalchemy import select, func, or_
 from datetime import datetime, timedelta
 from typing import Optional
 import json
@@ -14,6 +14,8 @@ from slowapi.util import get_remote_address
 
 from app.utils.logger import get_logger
 from app.utils.ip_checker import is_yookassa_ip, get_client_ip
+from app.utils.search import search_condition
+from app.utils.link_events import notify_links_changed
 from app.core.database import get_db
 from app.models.shared import CrosspostingLink, User, TelegramChannel, MaxChannel
 from app.api.auth import get_current_admin
@@ -141,6 +143,8 @@ async def yookassa_webhook(request: Request, db: AsyncSession = Depends(get_db))
                 link.migration_offered = True
 
             await db.commit()
+            # Связь включена - процессы кросспостинга должны увидеть ее сразу, а не при периодическом обновлении
+            await notify_links_changed(link.telegram_channel_id)
 
             logger.info(
                 f"subscription_activated: link_id={link.id}, user_id={user.id if user else None}, payment_id={payment_id}, end_date={new_end_date}"
@@ -279,41 +283,18 @@ async def get_payments(
         # Запрос для связей с платежами (yookassa_payment_id не NULL)
         query = select(CrosspostingLink).where(CrosspostingLink.yookassa_payment_id.isnot(None))
 
-        # Поиск по ключевым полям
+        # Поиск по ключевым полям: ID платежа (подстрока), ID связи (точное совпадение)
+        # и пользователю - username, email, Telegram ID (через подзапрос)
         if search:
-            search_conditions = []
-
-            # Поиск по yookassa_payment_id
-            search_conditions.append(
-                and_(
-                    CrosspostingLink.yookassa_payment_id.isnot(None), CrosspostingLink.yookassa_payment_id.ilike(f"%{search}%")
-                )
+            user_subquery = select(User.id).where(
+                search_condition(search, [User.telegram_username, User.email], [User.telegram_user_id])
             )
-
-            # Поиск по ID связи
-            try:
-                search_int = int(search)
-                search_conditions.append(CrosspostingLink.id == search_int)
-            except ValueError:
-                search_conditions.append(func.cast(CrosspostingLink.id, String).like(f"%{search}%"))
-
-            # Поиск по telegram_user_id пользователя (через подзапрос)
-            try:
-                search_int = int(search)
-                # Создаем подзапрос для поиска по telegram_user_id
-                user_subquery = select(User.id).where(User.telegram_user_id == search_int)
-                search_conditions.append(CrosspostingLink.user_id.in_(user_subquery))
-            except ValueError:
-                # Поиск по username или email пользователя
-                user_search_subquery = select(User.id).where(
-                    or_(
-                        and_(User.telegram_username.isnot(None), User.telegram_username.ilike(f"%{search}%")),
-                        and_(User.email.isnot(None), User.email.ilike(f"%{search}%")),
-                    )
+            query = query.where(
+                or_(
+                    search_condition(search, [CrosspostingLink.yookassa_payment_id], [CrosspostingLink.id]),
+                    CrosspostingLink.user_id.in_(user_subquery),
                 )
-                search_conditions.append(CrosspostingLink.user_id.in_(user_search_subquery))
-
-            query = query.where(or_(*search_conditions))
+            )
 
         # Фильтр по статусу платежа
         if status_filter:
@@ -329,23 +310,18 @@ async def get_payments(
             .offset(skip)
             .limit(limit)
         )
+        # Пользователь и каналы загружаются в том же запросе (LEFT JOIN)
+        query = (
+            query.add_columns(User, TelegramChannel, MaxChannel)
+            .outerjoin(User, User.id == CrosspostingLink.user_id)
+            .outerjoin(TelegramChannel, TelegramChannel.id == CrosspostingLink.telegram_channel_id)
+            .outerjoin(MaxChannel, MaxChannel.id == CrosspostingLink.max_channel_id)
+        )
         result = await db.execute(query)
-        links = result.scalars().all()
 
         # Формируем данные о платежах
         payments_data = []
-        for link in links:
-            # Получаем пользователя
-            user_result = await db.execute(select(User).where(User.id == link.user_id))
-            user = user_result.scalar_one_or_none()
-
-            # Получаем каналы
-            tg_channel_result = await db.execute(select(TelegramChannel).where(TelegramChannel.id == link.telegram_channel_id))
-            tg_channel = tg_channel_result.scalar_one_or_none()
-
-            max_channel_result = await db.execute(select(MaxChannel).where(MaxChannel.id == link.max_channel_id))
-            max_channel = max_channel_result.scalar_one_or_none()
-
+        for link, user, tg_channel, max_channel in result.all():
             payments_data.append(
                 {
                     "id": link.id,
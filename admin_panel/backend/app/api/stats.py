@@ -1,91 +1,148 @@
 """API для статистики."""
 
+import asyncio
+import time
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
 from app.api.auth import get_current_admin
 from app.models.admin import Admin
-from app.models.shared import User, CrosspostingLink, TelegramChannel, MaxChannel, MessageLog, FailedMessage
+from app.models.shared import User, CrosspostingLink, TelegramChannel, MaxChannel, MessageStat, FailedMessage
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
 
-@router.get("/dashboard")
-@limiter.limit("30/1minute")
-async def get_dashboard_stats(
-    request: Request, current_admin: Admin = Depends(get_current_admin), db: AsyncSession = Depends(get_db)
-):
-    """Получить статистику для dashboard."""
-    try:
-        # Количество пользователей
-        users_result = await db.execute(select(func.count(User.id)))
-        total_users = users_result.scalar() or 0
-
-        # Количество активных связей
-        links_result = await db.execute(select(func.count(CrosspostingLink.id)).where(CrosspostingLink.is_enabled == True))
-        active_links = links_result.scalar() or 0
-
-        # Количество каналов
-        telegram_channels_result = await db.execute(select(func.count(TelegramChannel.id)))
-        telegram_channels_count = telegram_channels_result.scalar() or 0
-
-        max_channels_result = await db.execute(select(func.count(MaxChannel.id)))
-        max_channels_count = max_channels_result.scalar() or 0
-
-        # Статистика сообщений за последние 24 часа
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        messages_24h_result = await db.execute(select(func.count(MessageLog.id)).where(MessageLog.created_at >= yesterday))
-        messages_24h = messages_24h_result.scalar() or 0
-
-        # Успешные сообщения за 24 часа
-        success_24h_result = await db.execute(
-            select(func.count(MessageLog.id)).where(MessageLog.created_at >= yesterday, MessageLog.status == "success")
+async def _compute_dashboard_stats() -> Dict[str, Any]:
+    """Посчитать статистику dashboard (два запроса к БД)."""
+    since_hour = (datetime.utcnow() - timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+    async with AsyncSessionLocal() as db:
+        # Счетчики небольших таблиц - одним запросом со скалярными подзапросами
+        counts_result = await db.execute(
+            select(
+                select(func.count(User.id)).scalar_subquery(),
+                select(func.count(CrosspostingLink.id)).where(CrosspostingLink.is_enabled == True).scalar_subquery(),
+                select(func.count(TelegramChannel.id)).scalar_subquery(),
+                select(func.count(MaxChannel.id)).scalar_subquery(),
+                select(func.count(FailedMessage.id)).where(FailedMessage.resolved_at.is_(None)).scalar_subquery(),
+            )
+        )
+        total_users, active_links, telegram_channels_count, max_channels_count, unresolved_failed = (
+            counts_result.one()
         )
-        success_24h = success_24h_result.scalar() or 0
 
-        # Неудачные сообщения за 24 часа
-        failed_24h_result = await db.execute(
-            select(func.count(MessageLog.id)).where(MessageLog.created_at >= yesterday, MessageLog.status == "failed")
+        # Статистика сообщений из агрегированной таблицы message_stats за один проход:
+        # всего - по дневным интервалам, за 24 часа - по часовым
+        message_total = MessageStat.success_count + MessageStat.failed_count + MessageStat.pending_count
+        is_day = MessageStat.period == "day"
+        is_last_24h = (MessageStat.period == "hour") & (MessageStat.bucket_start >= since_hour)
+        messages_result = await db.execute(
+            select(
+                func.coalesce(func.sum(message_total).filter(is_day), 0),
+                func.coalesce(func.sum(message_total).filter(is_last_24h), 0),
+                func.coalesce(func.sum(MessageStat.success_count).filter(is_last_24h), 0),
+                func.coalesce(func.sum(MessageStat.failed_count).filter(is_last_24h), 0),
+            ).where((MessageStat.period == "day") | (MessageStat.bucket_start >= since_hour))
         )
-        failed_24h = failed_24h_result.scalar() or 0
+        total_messages, messages_24h, success_24h, failed_24h = (int(value) for value in messages_result.one())
+
+    return {
+        "users": {
+            "total": total_users,
+        },
+        "links": {
+            "active": active_links,
+        },
+        "channels": {
+            "telegram": telegram_channels_count,
+            "max": max_channels_count,
+            "total": telegram_channels_count + max_channels_count,
+        },
+        "messages": {
+            "total": total_messages,
+            "last_24h": messages_24h,
+            "success_24h": success_24h,
+            "failed_24h": failed_24h,
+            "unresolved_failed": unresolved_failed,
+        },
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+
+
+class DashboardStatsCache:
+    """
+    Кэш статистики dashboard, общий для всех сессий админов процесса.
+
+    Значение старше ttl отдается сразу, а пересчет запускается в фоне (не более
+    одного одновременно), поэтому запрос ждет БД только до первого расчета.
+    Планировщик также обновляет кэш периодически (refresh).
+    """
+
+    def __init__(self, ttl: float):
+        """
+        Инициализация кэша.
+
+        Args:
+            ttl: Время, после которого значение пересчитывается (секунды)
+        """
+        self.ttl = ttl
+        self._value: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get(self) -> Dict[str, Any]:
+        """Получить статистику (возможно, устаревшую не более чем на время пересчета)."""
+        if self._value is None:
+            return await self.refresh()
+        if time.monotonic() - self._computed_at > self.ttl:
+            self._start_refresh()
+        return self._value
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Пересчитать статистику (одновременные вызовы ждут один расчет)."""
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Запустить пересчет, если он еще не выполняется."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._compute())
+        return self._refresh_task
+
+    async def _compute(self) -> Dict[str, Any]:
+        """Посчитать и сохранить статистику (при ошибке остается прежнее значение)."""
+        try:
+            value = await _compute_dashboard_stats()
+        except Exception as e:
+            logger.error(f"dashboard_stats_refresh_failed: error={e}")
+            if self._value is None:
+                raise
+            return self._value
+        self._value = value
+        self._computed_at = time.monotonic()
+        return value
+
+
+# Глобальный экземпляр
+dashboard_stats_cache = DashboardStatsCache(ttl=settings.dashboard_cache_ttl)
 
-        # Всего сообщений
-        total_messages_result = await db.execute(select(func.count(MessageLog.id)))
-        total_messages = total_messages_result.scalar() or 0
 
-        # Неудачные сообщения (не решенные)
-        unresolved_failed_result = await db.execute(
-            select(func.count(FailedMessage.id)).where(FailedMessage.resolved_at.is_(None))
-        )
-        unresolved_failed = unresolved_failed_result.scalar() or 0
-
-        return {
-            "users": {
-                "total": total_users,
-            },
-            "links": {
-                "active": active_links,
-            },
-            "channels": {
-                "telegram": telegram_channels_count,
-                "max": max_channels_count,
-                "total": telegram_channels_count + max_channels_count,
-            },
-            "messages": {
-                "total": total_messages,
-                "last_24h": messages_24h,
-                "success_24h": success_24h,
-                "failed_24h": failed_24h,
-                "unresolved_failed": unresolved_failed,
-            },
-        }
+@router.get("/dashboard")
+@limiter.limit("30/1minute")
+async def get_dashboard_stats(request: Request, current_admin: Admin = Depends(get_current_admin)):
+    """Получить статистику для dashboard (из кэша, обновляемого в фоне)."""
+    try:
+        return await dashboard_stats_cache.get()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения статистики: {str(e)}")
 
@@ -96,25 +153,28 @@ async def get_messages_stats(
 ):
     """Получить статистику сообщений за период."""
     try:
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_date = (datetime.utcnow() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
 
-        # Группировка по дням
+        # Группировка по дням (дневные интервалы агрегированной таблицы message_stats)
         messages_by_day = await db.execute(
-            select(func.date(MessageLog.created_at).label("date"), func.count(MessageLog.id).label("count"), MessageLog.status)
-            .where(MessageLog.created_at >= start_date)
-            .group_by(func.date(MessageLog.created_at), MessageLog.status)
-            .order_by(func.date(MessageLog.created_at))
+            select(
+                MessageStat.bucket_start.label("date"),
+                func.sum(MessageStat.success_count).label("success"),
+                func.sum(MessageStat.failed_count).label("failed"),
+                func.sum(MessageStat.pending_count).label("pending"),
+            )
+            .where(MessageStat.period == "day")
+            .where(MessageStat.bucket_start >= start_date)
+            .group_by(MessageStat.bucket_start)
+            .order_by(MessageStat.bucket_start)
         )
 
         # Формируем данные для графика
-        data = {}
+        data = []
         for row in messages_by_day:
-            date_str = row.date.isoformat() if hasattr(row.date, "isoformat") else str(row.date)
-            if date_str not in data:
-                data[date_str] = {"date": date_str, "success": 0, "failed": 0, "pending": 0, "total": 0}
-            data[date_str][row.status] = row.count
-            data[date_str]["total"] += row.count
+            counts = {"success": int(row.success or 0), "failed": int(row.failed or 0), "pending": int(row.pending or 0)}
+            data.append({"date": row.date.date().isoformat(), **counts, "total": sum(counts.values())})
 
-        return {"period_days": days, "data": list(data.values())}
+        return {"period_days": days, "data": data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения статистики: {str(e)}")
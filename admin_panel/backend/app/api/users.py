@@ -2,13 +2,14 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_, String
+from sqlalchemy import select, func
 from typing import Optional
 from pydantic import BaseModel
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from app.utils.logger import get_logger
+from app.utils.search import search_condition
 from app.core.database import get_db
 from app.api.auth import get_current_admin
 from app.models.admin import Admin
@@ -39,25 +40,9 @@ async def get_users(
     try:
         query = select(User)
 
-        # Поиск по ключевым полям: Telegram ID, Username, E-mail
+        # Поиск по ключевым полям: Username, E-mail (подстрока), Telegram ID (точное совпадение)
         if search:
-            search_conditions = []
-
-            # Поиск по username (если не NULL)
-            search_conditions.append(and_(User.telegram_username.isnot(None), User.telegram_username.ilike(f"%{search}%")))
-
-            # Поиск по email (если не NULL)
-            search_conditions.append(and_(User.email.isnot(None), User.email.ilike(f"%{search}%")))
-
-            # Поиск по telegram_user_id (если search - число)
-            try:
-                search_int = int(search)
-                search_conditions.append(User.telegram_user_id == search_int)
-            except ValueError:
-                # Если search не число, ищем по строковому представлению через cast
-                search_conditions.append(func.cast(User.telegram_user_id, String).like(f"%{search}%"))
-
-            query = query.where(or_(*search_conditions))
+            query = query.where(search_condition(search, [User.telegram_username, User.email], [User.telegram_user_id]))
 
         # Фильтр по VIP статусу
         if is_vip is not None:
@@ -67,40 +52,41 @@ async def get_users(
         count_result = await db.execute(select(func.count(User.id)).select_from(query.subquery()))
         total = count_result.scalar() or 0
 
-        # Данные с пагинацией
-        query = query.order_by(User.created_at.desc()).offset(skip).limit(limit)
-        result = await db.execute(query)
-        users = result.scalars().all()
-
-        # Получаем статистику для каждого пользователя
-        users_data = []
-        for user in users:
-            # Количество каналов
-            telegram_channels_count = await db.execute(
-                select(func.count(TelegramChannel.id)).where(TelegramChannel.user_id == user.id)
+        # Данные с пагинацией: количество каналов и связей считается в том же запросе
+        # коррелированными подзапросами (по индексу user_id), без запросов на каждого пользователя
+        telegram_channels_count = (
+            select(func.count(TelegramChannel.id)).where(TelegramChannel.user_id == User.id).scalar_subquery()
+        )
+        max_channels_count = select(func.count(MaxChannel.id)).where(MaxChannel.user_id == User.id).scalar_subquery()
+        links_count = (
+            select(func.count(CrosspostingLink.id)).where(CrosspostingLink.user_id == User.id).scalar_subquery()
+        )
+        query = (
+            query.add_columns(
+                telegram_channels_count.label("telegram_channels_count"),
+                max_channels_count.label("max_channels_count"),
+                links_count.label("links_count"),
             )
-            tg_count = telegram_channels_count.scalar() or 0
-
-            max_channels_count = await db.execute(select(func.count(MaxChannel.id)).where(MaxChannel.user_id == user.id))
-            max_count = max_channels_count.scalar() or 0
-
-            # Количество связей
-            links_count = await db.execute(select(func.count(CrosspostingLink.id)).where(CrosspostingLink.user_id == user.id))
-            links = links_count.scalar() or 0
+            .order_by(User.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(query)
 
-            users_data.append(
-                {
-                    "id": user.id,
-                    "telegram_user_id": user.telegram_user_id,
-                    "telegram_username": user.telegram_username,
-                    "email": user.email,
-                    "is_vip": user.is_vip,
-                    "created_at": user.created_at,
-                    "updated_at": user.updated_at,
-                    "channels_count": tg_count + max_count,
-                    "links_count": links,
-                }
-            )
+        users_data = [
+            {
+                "id": user.id,
+                "telegram_user_id": user.telegram_user_id,
+                "telegram_username": user.telegram_username,
+                "email": user.email,
+                "is_vip": user.is_vip,
+                "created_at": user.created_at,
+                "updated_at": user.updated_at,
+                "channels_count": (tg_count or 0) + (max_count or 0),
+                "links_count": links or 0,
+            }
+            for user, tg_count, max_count, links in result.all()
+        ]
 
         return {"total": total, "skip": skip, "limit": limit, "data": users_data}
     except Exception as e:
@@ -27,6 +27,10 @@ class Settings(BaseSettings):
 
     # Redis (опционально)
     redis_url: str = "redis://localhost:6379/1"
+    link_routing_channel: str = "crossposting:link_changes"  # Канал pub/sub событий изменения связей (как в основном сервисе)
+
+    # Кэш статистики dashboard
+    dashboard_cache_ttl: float = 10.0  # Через сколько секунд пересчитывать статистику (в фоне)
 
     # CORS
     cors_origins: List[str] = ["https://srazuum.ru"]
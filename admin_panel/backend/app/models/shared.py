@@ -91,6 +91,21 @@ class MessageLog(Base):
     sent_at = Column(DateTime, nullable=True)
 
 
+class MessageStat(Base):
+    """Модель агрегированной статистики отправок по связи за час или день (копия из основного проекта)."""
+
+    __tablename__ = "message_stats"
+
+    crossposting_link_id = Column(BigInteger, ForeignKey("crossposting_links.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(String, primary_key=True)  # 'hour', 'day'
+    bucket_start = Column(DateTime, primary_key=True)
+    success_count = Column(BigInteger, default=0, nullable=False)
+    failed_count = Column(BigInteger, default=0, nullable=False)
+    pending_count = Column(BigInteger, default=0, nullable=False)
+    processing_time_ms = Column(BigInteger, default=0, nullable=False)
+    bytes_sent = Column(BigInteger, default=0, nullable=False)
+
+
 class FailedMessage(Base):
     """Модель неудачных сообщений (копия из основного проекта)."""
 
@@ -0,0 +1,35 @@
+"""Публикация событий изменения связей для таблиц маршрутизации основного сервиса."""
+
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Событие полной перезагрузки таблицы (как RELOAD_ALL в app.core.link_routing основного сервиса)
+RELOAD_ALL = "*"
+
+
+async def notify_links_changed(telegram_channel_id: Optional[int] = None) -> None:
+    """
+    Сообщить процессам основного сервиса, что связи Telegram канала изменились.
+
+    Вызывается после commit изменения связей (например, включения связи после оплаты).
+    Ошибки публикации не пробрасываются: таблицы будут перезагружены периодическим обновлением.
+
+    Args:
+        telegram_channel_id: ID Telegram канала в БД (None - перезагрузить всю таблицу)
+    """
+    import redis.asyncio as aioredis
+
+    event = RELOAD_ALL if telegram_channel_id is None else str(telegram_channel_id)
+    try:
+        redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        try:
+            await redis.publish(settings.link_routing_channel, event)
+        finally:
+            await redis.close()
+        logger.debug(f"link_routing_change_published: telegram_channel_id={telegram_channel_id}")
+    except Exception as e:
+        logger.warning(f"link_routing_publish_failed: telegram_channel_id={telegram_channel_id}, error={e}")
@@ -0,0 +1,119 @@
+"""Keyset-пагинация и оценка количества строк для списков логов."""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Literal, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Режим подсчета общего количества: оценка планировщика или точный count(*)
+CountMode = Literal["estimate", "exact"]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Сформировать курсор следующей страницы.
+
+    Args:
+        created_at: created_at последней строки страницы
+        row_id: ID последней строки страницы
+
+    Returns:
+        Курсор (base64 url-safe)
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Разобрать курсор страницы.
+
+    Args:
+        cursor: Курсор, полученный в next_cursor
+
+    Returns:
+        Кортеж (created_at, id)
+
+    Raises:
+        HTTPException: 400, если курсор некорректен
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def apply_keyset(query: Select, created_at_column: Any, id_column: Any, cursor: Optional[str], limit: int) -> Select:
+    """
+    Отсортировать запрос по (created_at, id) по убыванию и взять страницу после курсора.
+
+    Запрашивается limit + 1 строка, чтобы определить наличие следующей страницы
+    (см. page_with_cursor).
+
+    Args:
+        query: Запрос с фильтрами
+        created_at_column: Колонка created_at
+        id_column: Колонка id
+        cursor: Курсор предыдущей страницы (None - первая страница)
+        limit: Размер страницы
+
+    Returns:
+        Запрос страницы
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_at_column, id_column) < tuple_(created_at, row_id))
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def page_with_cursor(rows: Sequence[Any], limit: int) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    Отрезать лишнюю строку страницы и сформировать курсор следующей.
+
+    Args:
+        rows: Строки, полученные запросом из apply_keyset
+        limit: Размер страницы
+
+    Returns:
+        Кортеж (строки страницы, курсор следующей страницы или None)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+async def count_rows(db: AsyncSession, query: Select, mode: Optional[CountMode]) -> Optional[int]:
+    """
+    Посчитать количество строк запроса.
+
+    Точный подсчет проходит по всем подходящим строкам, поэтому выполняется
+    только по запросу; оценка берется из плана запроса (статистика планировщика).
+
+    Args:
+        db: Сессия БД
+        query: Запрос с фильтрами (без сортировки и пагинации)
+        mode: "exact", "estimate" или None (не считать)
+
+    Returns:
+        Количество строк или None
+    """
+    if mode == "exact":
+        result = await db.execute(select(func.count()).select_from(query.subquery()))
+        return result.scalar() or 0
+    if mode == "estimate":
+        # Значения фильтров (числа, строки, даты) подставляются литералами с экранированием
+        # диалекта соединения, текст передается драйверу как есть
+        compiled = query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+        connection = await db.connection()
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return None
@@ -0,0 +1,98 @@
+"""Поиск в списках админки по индексам pg_trgm и точным совпадениям ID."""
+
+import asyncio
+from typing import Any, Optional, Sequence
+from sqlalchemy import false, or_, text
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Триграммные GIN индексы для подстрочного поиска (ILIKE '%term%'): (имя, таблица, колонка)
+SEARCH_INDEXES = [
+    ("idx_users_telegram_username_trgm", "users", "telegram_username"),
+    ("idx_users_email_trgm", "users", "email"),
+    ("idx_telegram_channels_title_trgm", "telegram_channels", "channel_title"),
+    ("idx_telegram_channels_username_trgm", "telegram_channels", "channel_username"),
+    ("idx_max_channels_title_trgm", "max_channels", "channel_title"),
+    ("idx_max_channels_username_trgm", "max_channels", "channel_username"),
+    ("idx_crossposting_links_payment_trgm", "crossposting_links", "yookassa_payment_id"),
+]
+
+
+def parse_id(term: str) -> Optional[int]:
+    """
+    Получить числовой ID из поисковой строки.
+
+    Args:
+        term: Поисковая строка
+
+    Returns:
+        Число или None, если строка не является целым числом
+    """
+    try:
+        return int(term.strip())
+    except ValueError:
+        return None
+
+
+def escape_like(term: str) -> str:
+    """Экранировать спецсимволы LIKE (%, _ и \\), чтобы они искались буквально."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_condition(term: str, text_columns: Sequence[Any], id_columns: Sequence[Any] = ()) -> ColumnElement:
+    """
+    Построить условие поиска.
+
+    Текстовые колонки ищутся по подстроке без учета регистра (ILIKE по триграммному
+    индексу), ID - только точным совпадением, если строка является числом
+    (по B-tree индексу, без приведения колонок к строке).
+
+    Args:
+        term: Поисковая строка
+        text_columns: Текстовые колонки (с индексами из SEARCH_INDEXES)
+        id_columns: Числовые колонки для точного совпадения
+
+    Returns:
+        Условие для where
+    """
+    term = term.strip()
+    if not term:
+        return false()
+
+    pattern = f"%{escape_like(term)}%"
+    conditions = [column.ilike(pattern, escape="\\") for column in text_columns]
+
+    search_id = parse_id(term)
+    if search_id is not None:
+        conditions.extend(column == search_id for column in id_columns)
+
+    return or_(*conditions)
+
+
+async def ensure_search_indexes() -> None:
+    """
+    Создать расширение pg_trgm и триграммные индексы поиска (если их нет).
+
+    Индексы создаются CONCURRENTLY, без блокировки записи в таблицы.
+    """
+    from app.core.database import engine
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for index_name, table, column in SEARCH_INDEXES:
+            await conn.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                    f"ON {table} USING gin ({column} gin_trgm_ops)"
+                )
+            )
+            logger.info(f"search_index_ready: index={index_name}")
+
+
+if __name__ == "__main__":
+    # Разовое создание индексов: python -m app.utils.search (из admin_panel/backend)
+    asyncio.run(ensure_search_indexes())
@@ -123,6 +123,7 @@ async def health_detailed():
 # Настройка планировщика задач для синхронизации платежей
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime
 from app.tasks.payment_sync import sync_all_payments
 
 scheduler = AsyncIOScheduler()
@@ -136,6 +137,21 @@ scheduler.add_job(
     replace_existing=True,
 )
 
+# Обновляем кэш статистики dashboard в фоне, чтобы запросы не ждали БД
+from app.api.stats import dashboard_stats_cache
+
+scheduler.add_job(
+    dashboard_stats_cache.refresh,
+    trigger="interval",
+    seconds=settings.dashboard_cache_ttl,
+    id="refresh_dashboard_stats",
+    name="Обновление статистики dashboard",
+    next_run_time=datetime.now(),  # Первый расчет сразу при запуске
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True,
+)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -0,0 +1,16 @@
+"""Общие настройки тестов админ-панели."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Пакет app админки (admin_panel/backend/app), а не основного сервиса
+BACKEND_DIR = Path(__file__).parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# Настройки читаются при импорте app.core.config - задаем их до импорта приложения
+TEST_DATABASE_PATH = Path(tempfile.mkdtemp()) / "admin_test.db"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-admin-panel-tests-only")
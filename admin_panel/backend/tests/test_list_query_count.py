@@ -0,0 +1,130 @@
+"""Регрессионный тест: страницы списков загружаются фиксированным количеством запросов."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.api import channels, payments, users
+from app.api.auth import get_current_admin
+from app.core.database import get_db
+from app.models.shared import CrosspostingLink, MaxChannel, TelegramChannel, User
+from conftest import TEST_DATABASE_PATH
+
+# Список и запросы страницы: общее количество + сама страница
+LIST_ENDPOINTS = ["/api/users", "/api/channels/telegram", "/api/channels/max", "/api/payments"]
+STATEMENTS_PER_PAGE = 2
+
+TABLES = [User.__table__, TelegramChannel.__table__, MaxChannel.__table__, CrosspostingLink.__table__]
+
+
+@pytest.fixture
+def engine():
+    """Движок тестовой БД со счетчиком выполненных запросов (engine.statements)."""
+    if TEST_DATABASE_PATH.exists():
+        TEST_DATABASE_PATH.unlink()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}", poolclass=NullPool)
+    engine.statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        engine.statements.append(statement)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: User.metadata.create_all(sync_conn, tables=TABLES))
+
+    asyncio.run(create_tables())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def client(engine):
+    """Клиент API со списками пользователей, каналов и платежей (без авторизации и rate limit)."""
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(users.router, prefix="/api/users")
+    app.include_router(channels.router, prefix="/api/channels")
+    app.include_router(payments.router, prefix="/api/payments")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin] = lambda: None
+
+    limiters = [users.limiter, channels.limiter, payments.limiter]
+    for limiter in limiters:
+        limiter.enabled = False
+    with TestClient(app) as test_client:
+        yield test_client
+    for limiter in limiters:
+        limiter.enabled = True
+
+
+def seed(engine, start: int, count: int) -> None:
+    """
+    Добавить пользователей, у каждого - Telegram канал, MAX канал и оплаченная связь.
+
+    Args:
+        engine: Движок тестовой БД
+        start: Первый ID
+        count: Количество пользователей
+    """
+
+    async def insert_rows():
+        now = datetime.utcnow()
+        async with AsyncSession(engine) as session:
+            for row_id in range(start, start + count):
+                session.add(User(id=row_id, telegram_user_id=100000 + row_id, telegram_username=f"user{row_id}"))
+                session.add(TelegramChannel(id=row_id, user_id=row_id, channel_id=-row_id, channel_title=f"tg{row_id}"))
+                session.add(MaxChannel(id=row_id, user_id=row_id, channel_id=row_id, channel_title=f"max{row_id}"))
+                await session.flush()
+                session.add(
+                    CrosspostingLink(
+                        id=row_id,
+                        user_id=row_id,
+                        telegram_channel_id=row_id,
+                        max_channel_id=row_id,
+                        yookassa_payment_id=f"payment-{row_id}",
+                        payment_status="succeeded",
+                        last_payment_date=now,
+                    )
+                )
+            await session.commit()
+
+    asyncio.run(insert_rows())
+
+
+def page_statements(client, engine, path: str) -> int:
+    """Получить первую страницу списка и вернуть количество выполненных запросов."""
+    engine.statements.clear()
+    response = client.get(path, params={"limit": 100})
+    assert response.status_code == 200, response.text
+    return len(engine.statements)
+
+
+@pytest.mark.parametrize("path", LIST_ENDPOINTS)
+def test_list_page_statement_count_does_not_grow_with_rows(client, engine, path):
+    seed(engine, start=1, count=2)
+    # Первое подключение выполняет служебные запросы диалекта - не учитываем его
+    page_statements(client, engine, path)
+    few_rows = page_statements(client, engine, path)
+
+    seed(engine, start=3, count=30)
+    response = client.get(path, params={"limit": 100})
+    assert len(response.json()["data"]) == 32
+    many_rows = page_statements(client, engine, path)
+
+    assert few_rows == many_rows == STATEMENTS_PER_PAGE
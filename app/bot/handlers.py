@@ -40,6 +40,8 @@ from app.bot.keyboards import (
 from config.database import async_session_maker
 from config.settings import settings
 from app.utils.cache import delete_cache
+from app.core.link_routing import notify_links_changed
+from app.core.message_stats import get_link_totals, get_user_totals
 from app.payments.yookassa_client import create_payment
 
 logger = get_logger(__name__)
@@ -194,6 +196,9 @@ async def _process_delete_yes(message: Message, state: FSMContext, link_id: int)
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_delete", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(telegram_channel_id_for_cleanup)
+
         # Очистка неиспользуемых каналов после удаления связи
         async with async_session_maker() as cleanup_session:
             # Проверяем, есть ли еще связи у Telegram канала
@@ -999,6 +1004,9 @@ async def process_max_channel(message: Message, state: FSMContext):
                     "cache_cleared_on_link_creation", channel_id=telegram_channel.channel_id, link_id=crossposting_link.id
                 )
 
+            # Обновляем таблицы маршрутизации связей в receiver и воркерах
+            await notify_links_changed(crossposting_link.telegram_channel_id)
+
             await log_audit(
                 user.id,
                 AuditAction.CREATE_LINK.value,
@@ -1205,17 +1213,8 @@ async def show_link_detail(message: Message, state: FSMContext, link_id: int):
             await message.answer("Связь не найдена.")
             return
 
-        # Статистика по связи
-        success_count = await session.execute(
-            select(func.count(MessageLog.id))
-            .where(MessageLog.crossposting_link_id == link.id)
-            .where(MessageLog.status == MessageStatus.SUCCESS.value)
-        )
-        failed_count = await session.execute(
-            select(func.count(MessageLog.id))
-            .where(MessageLog.crossposting_link_id == link.id)
-            .where(MessageLog.status == MessageStatus.FAILED.value)
-        )
+        # Статистика по связи (из агрегированной таблицы message_stats)
+        link_stats = (await get_link_totals(session, [link.id])).get(link.id, {})
 
         # Последняя успешная отправка
         last_success = await session.execute(
@@ -1279,8 +1278,8 @@ async def show_link_detail(message: Message, state: FSMContext, link_id: int):
             f"Тип подписки: {subscription_type_text}\n"
             f"{subscription_details}\n"
             f"📊 Статистика:\n"
-            f"Успешных: {success_count.scalar() or 0}\n"
-            f"Неудачных: {failed_count.scalar() or 0}"
+            f"Успешных: {link_stats.get('success', 0)}\n"
+            f"Неудачных: {link_stats.get('failed', 0)}"
         )
 
         if last_success_msg:
@@ -1401,27 +1400,16 @@ async def show_status(message: Message):
         active_count = sum(1 for link in links if link.is_enabled)
         inactive_count = len(links) - active_count
 
-        # Подсчет статистики отправок
-        success_count = await session.execute(
-            select(func.count(MessageLog.id))
-            .join(CrosspostingLink)
-            .where(CrosspostingLink.user_id == user.id)
-            .where(MessageLog.status == MessageStatus.SUCCESS.value)
-        )
-        failed_count = await session.execute(
-            select(func.count(MessageLog.id))
-            .join(CrosspostingLink)
-            .where(CrosspostingLink.user_id == user.id)
-            .where(MessageLog.status == MessageStatus.FAILED.value)
-        )
+        # Подсчет статистики отправок (из агрегированной таблицы message_stats)
+        user_stats = await get_user_totals(session, user.id)
 
         text = (
             f"📊 Статус кросспостинга:\n\n"
             f"Активных связей: {active_count}\n"
             f"Неактивных связей: {inactive_count}\n"
             f"Всего связей: {len(links)}\n\n"
-            f"Успешных отправок: {success_count.scalar() or 0}\n"
-            f"Неудачных отправок: {failed_count.scalar() or 0}\n\n"
+            f"Успешных отправок: {user_stats['success']}\n"
+            f"Неудачных отправок: {user_stats['failed']}\n\n"
             f"Используйте список связей для детальной информации."
         )
 
@@ -1440,17 +1428,8 @@ async def cmd_status_detail(message: Message, user: User, link_id: int):
             await message.answer("Связь не найдена.")
             return
 
-        # Статистика по связи
-        success_count = await session.execute(
-            select(func.count(MessageLog.id))
-            .where(MessageLog.crossposting_link_id == link.id)
-            .where(MessageLog.status == MessageStatus.SUCCESS.value)
-        )
-        failed_count = await session.execute(
-            select(func.count(MessageLog.id))
-            .where(MessageLog.crossposting_link_id == link.id)
-            .where(MessageLog.status == MessageStatus.FAILED.value)
-        )
+        # Статистика по связи (из агрегированной таблицы message_stats)
+        link_stats = (await get_link_totals(session, [link.id])).get(link.id, {})
 
         # Последняя успешная отправка
         last_success = await session.execute(
@@ -1479,8 +1458,8 @@ async def cmd_status_detail(message: Message, user: User, link_id: int):
             f"MAX: {link.max_channel.channel_title}\n"
             f"Статус: {'Активна' if link.is_enabled else 'Неактивна'}\n\n"
             f"Статистика:\n"
-            f"Успешных: {success_count.scalar() or 0}\n"
-            f"Неудачных: {failed_count.scalar() or 0}\n\n"
+            f"Успешных: {link_stats.get('success', 0)}\n"
+            f"Неудачных: {link_stats.get('failed', 0)}\n\n"
         )
 
         if last_success_msg:
@@ -1551,6 +1530,9 @@ async def cmd_enable(message: Message):
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_enable", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(link.telegram_channel_id)
+
         await log_audit(user.id, AuditAction.ENABLE_LINK.value, "crossposting_link", link_id)
 
         await message.answer(f"✅ Кросспостинг для связи #{link_id} включен.")
@@ -1600,6 +1582,9 @@ async def cmd_disable(message: Message):
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_disable", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(link.telegram_channel_id)
+
         await log_audit(user.id, AuditAction.DISABLE_LINK.value, "crossposting_link", link_id)
 
         await message.answer(f"❌ Кросспостинг для связи #{link_id} отключен.")
@@ -1651,6 +1636,9 @@ async def cmd_delete(message: Message):
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_delete", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(telegram_channel_id_for_cleanup)
+
         # Очистка неиспользуемых каналов после удаления связи
         async with async_session_maker() as cleanup_session:
             # Проверяем, есть ли еще связи у Telegram канала
@@ -1759,6 +1747,9 @@ async def message_enable(message: Message, state: FSMContext):
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_enable", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(link.telegram_channel_id)
+
         await log_audit(user.id, AuditAction.ENABLE_LINK.value, "crossposting_link", link_id)
 
         # Обновляем сообщение
@@ -1821,6 +1812,9 @@ async def message_disable(message: Message, state: FSMContext):
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_disable", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(link.telegram_channel_id)
+
         await log_audit(user.id, AuditAction.DISABLE_LINK.value, "crossposting_link", link_id)
 
         # Обновляем сообщение
@@ -1946,6 +1940,9 @@ async def message_delete_yes(message: Message, state: FSMContext):
             await delete_cache(cache_key)
             logger.info("cache_cleared_on_link_delete", channel_id=telegram_channel_id_for_cache, link_id=link_id)
 
+        # Обновляем таблицы маршрутизации связей в receiver и воркерах
+        await notify_links_changed(telegram_channel_id_for_cleanup)
+
         # Очистка неиспользуемых каналов после удаления связи
         async with async_session_maker() as cleanup_session:
             # Проверяем, есть ли еще связи у Telegram канала
@@ -175,9 +175,13 @@ async def message_stop_migration(message: Message, state: FSMContext):
         await session.commit()
         logger.info("link_enabled_after_stopping_migration", link_id=link_id, is_enabled=link.is_enabled)
 
+        from app.core.link_routing import notify_links_changed
+
+        await notify_links_changed(telegram_channel_db_id)
+
         # Пересоздаем кэш
         if telegram_channel_db_id:
-            from app.utils.cache import set_cache, delete_cache, get_cache
+            from app.utils.cache import set_cache
 
             cache_key = f"channel_links:{telegram_channel_db_id}"
 
@@ -191,7 +195,6 @@ async def message_stop_migration(message: Message, state: FSMContext):
 
                 if active_links:
                     link_ids = [link.id for link in active_links]
-                    await delete_cache(cache_key)
                     await set_cache(cache_key, link_ids)
                     logger.info(
                         "cache_recreated_after_stopping_migration", cache_key=cache_key, link_ids=link_ids, link_id=link_id
@@ -66,6 +66,19 @@ async def main():
 
     asyncio.create_task(subscription_tasks_worker(interval_seconds=300, bot_instance=bot_instance))
 
+    # Таблицы логов должны существовать до миграции постов и первой отправки
+    from app.core.log_partitions import ensure_log_storage, partition_maintenance_worker
+    from app.core.message_stats import ensure_message_stats
+
+    try:
+        await ensure_log_storage()
+        await ensure_message_stats()
+    except Exception as e:
+        logger.error("log_storage_init_failed", error=str(e))
+
+    # Создаем будущие секции messages_log и отсоединяем устаревшие
+    asyncio.create_task(partition_maintenance_worker())
+
     logger.info("bot_starting", bot_token=settings.telegram_bot_token[:10] + "...")
 
     try:
@@ -0,0 +1,270 @@
+"""Локальная таблица маршрутизации: Telegram канал -> активные связи с MAX каналами."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app.models.crossposting_link import CrosspostingLink
+from app.models.max_channel import MaxChannel
+from app.models.telegram_channel import TelegramChannel
+from app.utils.logger import get_logger
+from config.database import async_session_maker
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+# Значение события, означающее полную перезагрузку таблицы
+RELOAD_ALL = "*"
+
+
+@dataclass(frozen=True)
+class RoutedMaxChannel:
+    """MAX канал связи (поля, нужные для отправки)."""
+
+    id: int
+    channel_id: str
+
+
+@dataclass(frozen=True)
+class RoutedLink:
+    """
+    Активная связь в таблице маршрутизации.
+
+    Совместима по используемым полям (id, max_channel.channel_id) с CrosspostingLink,
+    поэтому может передаваться в код отправки вместо ORM объекта.
+    """
+
+    id: int
+    telegram_channel_id: int
+    max_channel: RoutedMaxChannel
+
+
+@dataclass(frozen=True)
+class ChannelRoute:
+    """Маршрут Telegram канала."""
+
+    telegram_channel_id: int  # ID записи в БД
+    telegram_chat_id: int  # ID канала в Telegram
+    links: Tuple[RoutedLink, ...]
+
+
+class LinkRoutingTable:
+    """
+    Таблица активных связей в памяти процесса.
+
+    Загружается целиком при старте и обновляется по событиям Redis pub/sub,
+    которые публикуют бот (включение/отключение/удаление связей) и проверка
+    истекших подписок. Событие содержит ID Telegram канала в БД (или "*"),
+    по нему перезагружается только этот канал. Для страховки от потерянных
+    событий таблица периодически перезагружается целиком.
+
+    Пока таблица не загружена, методы возвращают None и вызывающий код
+    идет в БД как раньше.
+    """
+
+    def __init__(self, pubsub_channel: Optional[str] = None):
+        """
+        Инициализация таблицы.
+
+        Args:
+            pubsub_channel: Канал Redis pub/sub событий (по умолчанию settings.link_routing_channel)
+        """
+        self.pubsub_channel = pubsub_channel or settings.link_routing_channel
+        self._routes: Dict[int, ChannelRoute] = {}
+        self._by_chat: Dict[int, int] = {}
+        self._ready = False
+        self._reload_lock = asyncio.Lock()
+        self._listener_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Таблица загружена и поддерживается в актуальном состоянии."""
+        return self._ready
+
+    async def start(self) -> None:
+        """Загрузить таблицу и подписаться на события изменения связей."""
+        if not settings.link_routing_enabled or self._listener_task:
+            return
+
+        await self.reload()
+        self._listener_task = asyncio.create_task(self._listen())
+        self._refresh_task = asyncio.create_task(self._periodic_refresh())
+
+    async def stop(self) -> None:
+        """Остановить обновление таблицы."""
+        self._ready = False
+        tasks = [task for task in (self._listener_task, self._refresh_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener_task = None
+        self._refresh_task = None
+
+    def resolve_chat(self, telegram_chat_id: int) -> Optional[int]:
+        """
+        Получить ID Telegram канала в БД по ID чата.
+
+        Args:
+            telegram_chat_id: ID канала в Telegram
+
+        Returns:
+            ID записи в БД, 0 если у канала нет активных связей, None если таблица не загружена
+        """
+        if not self._ready:
+            return None
+        return self._by_chat.get(telegram_chat_id, 0)
+
+    def get_links(self, telegram_channel_id: int, link_ids: Optional[List[int]] = None) -> Optional[List[RoutedLink]]:
+        """
+        Получить активные связи Telegram канала.
+
+        Args:
+            telegram_channel_id: ID Telegram канала в БД
+            link_ids: Вернуть только эти связи
+
+        Returns:
+            Список связей или None, если таблица не загружена
+        """
+        if not self._ready:
+            return None
+        route = self._routes.get(telegram_channel_id)
+        if not route:
+            return []
+        if link_ids is not None:
+            return [link for link in route.links if link.id in link_ids]
+        return list(route.links)
+
+    async def reload(self, telegram_channel_id: Optional[int] = None) -> None:
+        """
+        Перезагрузить таблицу из БД.
+
+        Args:
+            telegram_channel_id: ID Telegram канала в БД (None - вся таблица)
+        """
+        async with self._reload_lock:
+            query = (
+                select(
+                    TelegramChannel.id,
+                    TelegramChannel.channel_id,
+                    CrosspostingLink.id,
+                    MaxChannel.id,
+                    MaxChannel.channel_id,
+                )
+                .join(CrosspostingLink, CrosspostingLink.telegram_channel_id == TelegramChannel.id)
+                .join(MaxChannel, CrosspostingLink.max_channel_id == MaxChannel.id)
+                .where(CrosspostingLink.is_enabled == True)
+                .order_by(CrosspostingLink.id)
+            )
+            if telegram_channel_id is not None:
+                query = query.where(TelegramChannel.id == telegram_channel_id)
+
+            async with async_session_maker() as session:
+                rows = (await session.execute(query)).all()
+
+            links: Dict[int, List[RoutedLink]] = {}
+            chats: Dict[int, int] = {}
+            for tg_id, tg_chat_id, link_id, max_id, max_chat_id in rows:
+                chats[tg_id] = tg_chat_id
+                links.setdefault(tg_id, []).append(
+                    RoutedLink(id=link_id, telegram_channel_id=tg_id, max_channel=RoutedMaxChannel(max_id, max_chat_id))
+                )
+            routes = {tg_id: ChannelRoute(tg_id, chats[tg_id], tuple(items)) for tg_id, items in links.items()}
+
+            if telegram_channel_id is None:
+                self._routes = routes
+                self._by_chat = {route.telegram_chat_id: tg_id for tg_id, route in routes.items()}
+                self._ready = True
+            else:
+                old_route = self._routes.pop(telegram_channel_id, None)
+                if old_route:
+                    self._by_chat.pop(old_route.telegram_chat_id, None)
+                route = routes.get(telegram_channel_id)
+                if route:
+                    self._routes[telegram_channel_id] = route
+                    self._by_chat[route.telegram_chat_id] = telegram_channel_id
+
+            logger.info(
+                "link_routing_reloaded",
+                telegram_channel_id=telegram_channel_id,
+                channels=len(self._routes),
+                links=sum(len(route.links) for route in self._routes.values()),
+            )
+
+    async def _listen(self) -> None:
+        """Слушать события изменения связей (с переподключением)."""
+        from config.redis_client import get_redis
+
+        reconnect = False
+        while True:
+            pubsub = None
+            try:
+                redis = await get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(self.pubsub_channel)
+                # Пока подписки не было, события могли потеряться - перезагружаем всю таблицу
+                if reconnect:
+                    await self.reload()
+                reconnect = True
+                while True:
+                    # Ждем с таймаутом: блокирующее чтение упиралось бы в socket_timeout пула
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        await self._handle_event(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("link_routing_listener_error", error=str(e))
+                await asyncio.sleep(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    async def _handle_event(self, data) -> None:
+        """Обработать событие изменения связей."""
+        try:
+            if data == RELOAD_ALL:
+                await self.reload()
+            else:
+                await self.reload(int(data))
+        except (TypeError, ValueError):
+            logger.warning("link_routing_invalid_event", data=data)
+        except Exception as e:
+            logger.error("link_routing_reload_failed", data=data, error=str(e))
+
+    async def _periodic_refresh(self) -> None:
+        """Периодически перезагружать таблицу целиком."""
+        while True:
+            await asyncio.sleep(settings.link_routing_refresh_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error("link_routing_refresh_failed", error=str(e))
+
+
+async def notify_links_changed(telegram_channel_id: Optional[int] = None) -> None:
+    """
+    Сообщить процессам, что связи Telegram канала изменились.
+
+    Вызывается после commit изменения связей. Ошибки публикации не пробрасываются:
+    таблицы в процессах все равно будут перезагружены периодическим обновлением.
+
+    Args:
+        telegram_channel_id: ID Telegram канала в БД (None - перезагрузить всю таблицу)
+    """
+    from config.redis_client import get_redis
+
+    try:
+        redis = await get_redis()
+        event = RELOAD_ALL if telegram_channel_id is None else str(telegram_channel_id)
+        await redis.publish(settings.link_routing_channel, event)
+        logger.debug("link_routing_change_published", telegram_channel_id=telegram_channel_id)
+    except Exception as e:
+        logger.warning("link_routing_publish_failed", telegram_channel_id=telegram_channel_id, error=str(e))
+
+
+# Глобальный экземпляр
+link_routing = LinkRoutingTable()
@@ -0,0 +1,312 @@
+"""Секционирование messages_log по месяцам и обслуживание секций."""
+
+import asyncio
+import re
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import text
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics_collector
+from config.database import async_session_maker
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+PARENT_TABLE = "messages_log"
+KEYS_TABLE = "messages_log_keys"
+
+# Секции называются messages_log_pYYYY_MM и содержат строки с created_at в этом месяце
+_PARTITION_NAME_RE = re.compile(r"^messages_log_p(\d{4})_(\d{2})$")
+
+# Индексы секционированной таблицы (создаются на родителе и наследуются секциями)
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_status ON messages_log (status)",
+    "CREATE INDEX IF NOT EXISTS idx_created_at ON messages_log (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_link_created ON messages_log (crossposting_link_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_link_message ON messages_log (crossposting_link_id, telegram_message_id)",
+]
+
+_CREATE_KEYS_TABLE = """
+CREATE TABLE IF NOT EXISTS messages_log_keys (
+    crossposting_link_id BIGINT NOT NULL REFERENCES crossposting_links (id) ON DELETE CASCADE,
+    telegram_message_id BIGINT NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (crossposting_link_id, telegram_message_id)
+)
+"""
+
+
+def month_start(value: datetime) -> datetime:
+    """Начало месяца, в который попадает дата."""
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Сдвинуть начало месяца на months месяцев."""
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    """Имя секции месяца."""
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+
+async def _create_partition(session, parent: str, month: datetime) -> bool:
+    """
+    Создать секцию месяца, если ее нет.
+
+    Returns:
+        True если секция создана
+    """
+    name = partition_name(month)
+    exists = await session.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+    if exists:
+        return False
+    await session.execute(
+        text(
+            f"CREATE TABLE {name} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        )
+    )
+    return True
+
+
+async def ensure_partitions(months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Создать секции текущего и следующих месяцев.
+
+    Args:
+        months_ahead: Сколько месяцев вперед создавать (по умолчанию settings.log_partition_months_ahead)
+
+    Returns:
+        Имена созданных секций
+    """
+    months_ahead = settings.log_partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(datetime.utcnow())
+    created = []
+    async with async_session_maker() as session:
+        async with session.begin():
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if await _create_partition(session, PARENT_TABLE, month):
+                    created.append(partition_name(month))
+
+    if created:
+        logger.info("log_partitions_created", partitions=created)
+    return created
+
+
+async def list_partitions() -> List[str]:
+    """Имена секций messages_log."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :parent ORDER BY child.relname"
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        return [row[0] for row in result.all()]
+
+
+async def detach_old_partitions(retention_months: Optional[int] = None) -> List[str]:
+    """
+    Отсоединить секции старше срока хранения.
+
+    Вместе с секцией удаляются ключи дедупликации ее месяца. Отсоединенные
+    секции удаляются только при settings.log_partition_drop_detached,
+    иначе остаются отдельными таблицами (для архивации).
+
+    Args:
+        retention_months: Сколько месяцев хранить, кроме текущего (по умолчанию
+            settings.log_partition_retention_months, 0 - хранить все)
+
+    Returns:
+        Имена отсоединенных секций
+    """
+    retention_months = settings.log_partition_retention_months if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(datetime.utcnow()), -retention_months)
+    detached = []
+    for name in await list_partitions():
+        match = _PARTITION_NAME_RE.match(name)
+        if not match:
+            continue
+        month = datetime(int(match.group(1)), int(match.group(2)), 1)
+        if month >= cutoff:
+            continue
+
+        async with async_session_maker() as session:
+            async with session.begin():
+                await session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                await session.execute(
+                    text(f"DELETE FROM {KEYS_TABLE} WHERE created_at >= :start AND created_at < :end"),
+                    {"start": month, "end": add_months(month, 1)},
+                )
+                if settings.log_partition_drop_detached:
+                    await session.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+        logger.info("log_partition_detached", partition=name, dropped=settings.log_partition_drop_detached)
+
+    return detached
+
+
+async def is_partitioned() -> bool:
+    """Проверить, что messages_log уже переведена на секции."""
+    async with async_session_maker() as session:
+        relkind = await session.scalar(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT_TABLE}
+        )
+    return relkind == "p"
+
+
+async def ensure_log_storage() -> None:
+    """
+    Подготовить хранение логов перед первой отправкой (вызывается при старте процессов).
+
+    Создает messages_log_keys, если ее нет (до разового convert_messages_log), и
+    заполняет ее ключами существующих логов, чтобы проверка на дубликат их видела.
+    Для секционированной messages_log создает секции текущего и следующих месяцев,
+    чтобы запись не зависела от воркера обслуживания в процессе бота.
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            # Процессы стартуют одновременно - создание выполняет один из них
+            await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": KEYS_TABLE})
+            exists = await session.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": KEYS_TABLE})
+            if not exists:
+                await session.execute(text(_CREATE_KEYS_TABLE))
+                await session.execute(
+                    text(f"CREATE INDEX IF NOT EXISTS ix_{KEYS_TABLE}_created_at ON {KEYS_TABLE} (created_at)")
+                )
+                await session.execute(
+                    text(
+                        f"INSERT INTO {KEYS_TABLE} (crossposting_link_id, telegram_message_id, created_at) "
+                        f"SELECT crossposting_link_id, telegram_message_id, created_at FROM {PARENT_TABLE} "
+                        "ON CONFLICT DO NOTHING"
+                    )
+                )
+                logger.info("messages_log_keys_created")
+
+    if await is_partitioned():
+        await ensure_partitions()
+
+
+async def run_partition_maintenance() -> None:
+    """Создать будущие секции и отсоединить устаревшие."""
+    if not await is_partitioned():
+        logger.warning("messages_log_not_partitioned", hint="python -m app.core.log_partitions")
+        return
+    await ensure_partitions()
+    await detach_old_partitions()
+    if metrics_collector.enabled:
+        metrics_collector.set_gauge("messages_log_partitions", len(await list_partitions()))
+
+
+async def partition_maintenance_worker(interval_seconds: Optional[int] = None):
+    """
+    Фоновый воркер обслуживания секций messages_log.
+
+    Args:
+        interval_seconds: Интервал запуска в секундах (по умолчанию settings.log_partition_maintenance_interval)
+    """
+    interval_seconds = interval_seconds or settings.log_partition_maintenance_interval
+    logger.info("log_partition_worker_started", interval_seconds=interval_seconds)
+
+    while True:
+        try:
+            await run_partition_maintenance()
+        except Exception as e:
+            logger.error("log_partition_maintenance_error", error=str(e), exc_info=True)
+        await asyncio.sleep(interval_seconds)
+
+
+async def convert_messages_log() -> bool:
+    """
+    Перевести существующую таблицу messages_log в секционированную.
+
+    Выполняется один раз одной транзакцией (таблица блокируется на время
+    копирования): создается секционированная копия с секциями для всех месяцев
+    с данными, строки копируются, ключи дедупликации переносятся в
+    messages_log_keys, старая таблица удаляется.
+
+    Returns:
+        True если таблица преобразована, False если она уже секционирована
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            relkind = await session.scalar(
+                text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT_TABLE}
+            )
+            if relkind == "p":
+                logger.info("messages_log_already_partitioned")
+                return False
+
+            sequence = await session.scalar(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": PARENT_TABLE})
+            first_created_at = await session.scalar(text(f"SELECT min(created_at) FROM {PARENT_TABLE}"))
+
+            # Последовательность id переходит к новой таблице
+            if sequence:
+                await session.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+            await session.execute(
+                text(
+                    f"CREATE TABLE {PARENT_TABLE}_partitioned (LIKE {PARENT_TABLE} INCLUDING DEFAULTS) "
+                    "PARTITION BY RANGE (created_at)"
+                )
+            )
+
+            current = month_start(datetime.utcnow())
+            month = month_start(first_created_at) if first_created_at else current
+            last = add_months(current, settings.log_partition_months_ahead)
+            while month <= last:
+                await _create_partition(session, f"{PARENT_TABLE}_partitioned", month)
+                month = add_months(month, 1)
+
+            await session.execute(text(f"INSERT INTO {PARENT_TABLE}_partitioned SELECT * FROM {PARENT_TABLE}"))
+            await session.execute(text(_CREATE_KEYS_TABLE))
+            await session.execute(
+                text(f"CREATE INDEX IF NOT EXISTS ix_{KEYS_TABLE}_created_at ON {KEYS_TABLE} (created_at)")
+            )
+            await session.execute(
+                text(
+                    f"INSERT INTO {KEYS_TABLE} (crossposting_link_id, telegram_message_id, created_at) "
+                    f"SELECT crossposting_link_id, telegram_message_id, created_at FROM {PARENT_TABLE} "
+                    "ON CONFLICT DO NOTHING"
+                )
+            )
+
+            await session.execute(text(f"DROP TABLE {PARENT_TABLE}"))
+            await session.execute(text(f"ALTER TABLE {PARENT_TABLE}_partitioned RENAME TO {PARENT_TABLE}"))
+            await session.execute(
+                text(f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {PARENT_TABLE}_pkey PRIMARY KEY (id, created_at)")
+            )
+            await session.execute(
+                text(
+                    f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {PARENT_TABLE}_crossposting_link_id_fkey "
+                    "FOREIGN KEY (crossposting_link_id) REFERENCES crossposting_links (id) ON DELETE CASCADE"
+                )
+            )
+            for statement in _INDEXES:
+                await session.execute(text(statement))
+            if sequence:
+                await session.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT_TABLE}.id"))
+
+    logger.info("messages_log_partitioned", first_month=str(first_created_at))
+    return True
+
+
+if __name__ == "__main__":
+    # Разовый перевод messages_log на секции: python -m app.core.log_partitions
+    from app.utils.logger import setup_logging
+
+    async def _main():
+        setup_logging()
+        await convert_messages_log()
+        await run_partition_maintenance()
+
+    asyncio.run(_main())
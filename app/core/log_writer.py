@@ -0,0 +1,366 @@
+"""Отложенная запись результатов отправки (статусы MessageLog и FailedMessage)."""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import BigInteger, DateTime, Integer, String, Text, column, func, insert, select, update, values
+from sqlalchemy.orm import aliased
+from app.core.message_stats import apply_status_changes
+from app.models.failed_message import FailedMessage
+from app.models.message_log import MessageLog, MessageLogKey
+from app.utils.enums import MessageStatus
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics_collector
+from config.database import async_session_maker
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+
+def _with_created_at(rows):
+    """
+    Дополнить строки обновлений created_at лога из messages_log_keys.
+
+    messages_log секционирована по created_at: условие по нему в UPDATE
+    позволяет обращаться только к секции лога, а не ко всем месячным секциям.
+
+    Args:
+        rows: VALUES со столбцами link_id и telegram_message_id
+
+    Returns:
+        Подзапрос со столбцами rows и created_at
+    """
+    return (
+        select(rows, MessageLogKey.created_at)
+        .join(
+            MessageLogKey,
+            (MessageLogKey.crossposting_link_id == rows.c.link_id)
+            & (MessageLogKey.telegram_message_id == rows.c.telegram_message_id),
+        )
+        .subquery()
+    )
+
+
+class MessageLogWriter:
+    """
+    Буфер результатов отправки с периодической записью в БД пачками.
+
+    Успешные отправки и ошибки (обновление MessageLog + строка FailedMessage)
+    складываются в память и записываются одной транзакцией вместе с message_stats
+    раз в flush_interval или при накоплении batch_size записей. Строки MessageLog
+    ищутся по ключу (crossposting_link_id, telegram_message_id), сами PENDING логи
+    создаются до отправки синхронно, поэтому проверка дубликатов не зависит от буфера.
+
+    При заполнении буфера до max_buffer записи ждут очередного сброса
+    (backpressure). Если writer не запущен (например, миграция в процессе бота),
+    результаты записываются сразу.
+    """
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_buffer: Optional[int] = None,
+    ):
+        """
+        Инициализация writer.
+
+        Args:
+            flush_interval: Интервал сброса в секундах (по умолчанию settings.log_writer_flush_interval_ms)
+            batch_size: Количество записей, при котором сброс выполняется досрочно
+            max_buffer: Максимальное количество записей в буфере
+        """
+        self.flush_interval = flush_interval or settings.log_writer_flush_interval_ms / 1000
+        self.batch_size = batch_size or settings.log_writer_batch_size
+        self.max_buffer = max_buffer or settings.log_writer_max_buffer
+        self._success: List[Dict[str, Any]] = []
+        self._failed: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Количество записей, ожидающих сброса."""
+        return len(self._success) + len(self._failed)
+
+    async def start(self) -> None:
+        """Запустить периодический сброс."""
+        if not settings.log_writer_enabled or self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("log_writer_started", flush_interval=self.flush_interval, batch_size=self.batch_size)
+
+    async def stop(self) -> None:
+        """Остановить периодический сброс и записать оставшиеся результаты."""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # Записываем все, включая пачки, которые не удалось записать раньше
+        for attempt in range(settings.max_retry_attempts):
+            if await self.flush():
+                break
+            await asyncio.sleep(settings.retry_base_delay * (attempt + 1))
+        if self.pending:
+            logger.error("log_writer_dropped_on_stop", dropped=self.pending)
+            self._success, self._failed = [], []
+        async with self._space:
+            self._space.notify_all()
+        logger.info("log_writer_stopped")
+
+    async def mark_success(self, updates: List[Dict[str, Any]]) -> None:
+        """
+        Записать успешные отправки.
+
+        Args:
+            updates: Список словарей с ключами link_id, telegram_message_id,
+                max_message_id и (опционально) processing_time
+        """
+        if not updates:
+            return
+        sent_at = datetime.utcnow()
+        await self._put(
+            [
+                {
+                    "link_id": u["link_id"],
+                    "telegram_message_id": u["telegram_message_id"],
+                    "max_message_id": u.get("max_message_id"),
+                    "processing_time": u.get("processing_time"),
+                    "sent_at": sent_at,
+                }
+                for u in updates
+            ],
+            [],
+        )
+
+    async def mark_failed(
+        self, link_id: int, telegram_message_id: int, error_message: str, processing_time: Optional[int] = None
+    ) -> None:
+        """
+        Записать ошибку отправки (статус лога и строку FailedMessage).
+
+        Args:
+            link_id: ID связи
+            telegram_message_id: ID сообщения в Telegram
+            error_message: Текст ошибки
+            processing_time: Время обработки (мс)
+        """
+        await self._put(
+            [],
+            [
+                {
+                    "link_id": link_id,
+                    "telegram_message_id": telegram_message_id,
+                    "error_message": error_message,
+                    "processing_time": processing_time,
+                    "created_at": datetime.utcnow(),
+                }
+            ],
+        )
+
+    async def _put(self, success: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> None:
+        """Добавить записи в буфер (или записать сразу, если writer не запущен)."""
+        if self._task is None:
+            async with self._flush_lock:
+                await self._write(success, failed)
+            return
+
+        if self.pending >= self.max_buffer:
+            wait_start = time.monotonic()
+            self._wakeup.set()
+            async with self._space:
+                await self._space.wait_for(lambda: self.pending < self.max_buffer or self._task is None)
+            if metrics_collector.enabled:
+                metrics_collector.record_timing("log_writer_backpressure_wait", time.monotonic() - wait_start)
+
+        self._success.extend(success)
+        self._failed.extend(failed)
+        if self.pending >= self.batch_size:
+            self._wakeup.set()
+        if metrics_collector.enabled:
+            metrics_collector.set_gauge("log_writer_pending", self.pending)
+
+    async def _run(self) -> None:
+        """Сбрасывать буфер по таймеру или при накоплении batch_size записей."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """
+        Записать накопленные результаты одной транзакцией.
+
+        При ошибке записи результаты возвращаются в буфер и пишутся при
+        следующем сбросе.
+
+        Returns:
+            True если буфер записан (или был пуст)
+        """
+        async with self._flush_lock:
+            success, self._success = self._success, []
+            failed, self._failed = self._failed, []
+            if not success and not failed:
+                return True
+
+            try:
+                await self._write(success, failed)
+                written = True
+            except Exception as e:
+                logger.error("log_writer_flush_failed", success=len(success), failed=len(failed), error=str(e))
+                self._success[:0] = success
+                self._failed[:0] = failed
+                written = False
+
+        async with self._space:
+            self._space.notify_all()
+        if metrics_collector.enabled:
+            metrics_collector.set_gauge("log_writer_pending", self.pending)
+        return written
+
+    async def _write(self, success: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> None:
+        """Записать результаты в БД одной транзакцией."""
+        if not success and not failed:
+            return
+
+        start = time.monotonic()
+        updated_count = 0
+        # Копия строки до обновления - для предыдущих статуса и времени обработки в message_stats
+        previous = aliased(MessageLog)
+        status_changes = []
+        async with async_session_maker() as session:
+            async with session.begin():
+                if failed:
+                    rows = values(
+                        column("link_id", BigInteger),
+                        column("telegram_message_id", BigInteger),
+                        column("error_message", Text),
+                        column("processing_time_ms", Integer),
+                        name="failed_updates",
+                    ).data(
+                        [(f["link_id"], f["telegram_message_id"], f["error_message"], f["processing_time"]) for f in failed]
+                    )
+                    rows = _with_created_at(rows)
+                    result = await session.execute(
+                        update(MessageLog)
+                        .where(MessageLog.crossposting_link_id == rows.c.link_id)
+                        .where(MessageLog.telegram_message_id == rows.c.telegram_message_id)
+                        .where(MessageLog.created_at == rows.c.created_at)
+                        .where(previous.id == MessageLog.id, previous.created_at == MessageLog.created_at)
+                        .values(
+                            status=MessageStatus.FAILED.value,
+                            error_message=rows.c.error_message,
+                            processing_time_ms=rows.c.processing_time_ms,
+                        )
+                        .returning(
+                            MessageLog.crossposting_link_id,
+                            MessageLog.created_at,
+                            previous.status,
+                            MessageLog.processing_time_ms,
+                            previous.processing_time_ms,
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    status_changes.extend(
+                        (
+                            link_id,
+                            created_at,
+                            previous_status,
+                            MessageStatus.FAILED.value,
+                            processing_time,
+                            None,
+                            previous_time,
+                        )
+                        for link_id, created_at, previous_status, processing_time, previous_time in result.all()
+                    )
+                    await session.execute(
+                        insert(FailedMessage),
+                        [
+                            {
+                                "crossposting_link_id": f["link_id"],
+                                "telegram_message_id": f["telegram_message_id"],
+                                "error_message": f["error_message"],
+                                "created_at": f["created_at"],
+                            }
+                            for f in failed
+                        ],
+                    )
+
+                # Успешные отправки применяются после ошибок: повторная отправка могла завершиться успешно
+                if success:
+                    rows = values(
+                        column("link_id", BigInteger),
+                        column("telegram_message_id", BigInteger),
+                        column("max_message_id", String),
+                        column("processing_time_ms", Integer),
+                        column("sent_at", DateTime),
+                        name="success_updates",
+                    ).data(
+                        [
+                            (s["link_id"], s["telegram_message_id"], s["max_message_id"], s["processing_time"], s["sent_at"])
+                            for s in success
+                        ]
+                    )
+                    rows = _with_created_at(rows)
+                    result = await session.execute(
+                        update(MessageLog)
+                        .where(MessageLog.crossposting_link_id == rows.c.link_id)
+                        .where(MessageLog.telegram_message_id == rows.c.telegram_message_id)
+                        .where(MessageLog.created_at == rows.c.created_at)
+                        .where(previous.id == MessageLog.id, previous.created_at == MessageLog.created_at)
+                        .values(
+                            max_message_id=rows.c.max_message_id,
+                            status=MessageStatus.SUCCESS.value,
+                            processing_time_ms=func.coalesce(rows.c.processing_time_ms, MessageLog.processing_time_ms),
+                            sent_at=rows.c.sent_at,
+                        )
+                        .returning(
+                            MessageLog.crossposting_link_id,
+                            MessageLog.created_at,
+                            previous.status,
+                            MessageLog.processing_time_ms,
+                            MessageLog.file_size,
+                            previous.processing_time_ms,
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    updated = result.all()
+                    updated_count = len(updated)
+                    status_changes.extend(
+                        (
+                            link_id,
+                            created_at,
+                            previous_status,
+                            MessageStatus.SUCCESS.value,
+                            processing_time,
+                            file_size,
+                            previous_time,
+                        )
+                        for link_id, created_at, previous_status, processing_time, file_size, previous_time in updated
+                    )
+
+                await apply_status_changes(session, status_changes)
+
+        duration = time.monotonic() - start
+        if metrics_collector.enabled:
+            metrics_collector.record_timing("db_message_logs_bulk_update", duration)
+            metrics_collector.record_value("db_message_logs_bulk_update_rows", len(success) + len(failed))
+
+        if updated_count < len(success):
+            logger.error("log_writer_message_logs_not_found", total_updates=len(success), updated_count=updated_count)
+        logger.debug(
+            "log_writer_flushed",
+            success=len(success),
+            failed=len(failed),
+            duration_ms=int(duration * 1000),
+        )
+
+
+# Глобальный экземпляр
+message_log_writer = MessageLogWriter()
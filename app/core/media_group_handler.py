@@ -1,31 +1,78 @@
 """Обработчик медиа-групп из Telegram."""
 
 import asyncio
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
-from collections import defaultdict
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics_collector
+from config.settings import settings
 
 logger = get_logger(__name__)
 
+# Максимальное количество элементов альбома в Telegram
+MAX_MEDIA_GROUP_SIZE = 10
+
+
+@dataclass
+class PendingMediaGroup:
+    """Собираемая медиа-группа."""
+
+    process_callback: Callable
+    client: Any
+    first_at: float  # time.monotonic() первого сообщения
+    deadline: float  # Время сброса по таймауту (time.monotonic())
+    timer_seq: int  # Номер актуальной записи группы в очереди таймеров
+    messages: List[Any] = field(default_factory=list)
 
-class MediaGroupHandler:
-    """Обработчик для группировки медиа из Telegram в альбомы."""
 
-    def __init__(self, timeout_seconds: int = 2):
+class MediaGroupHandler:
+    """
+    Обработчик для группировки медиа из Telegram в альбомы.
+
+    Все собираемые группы обслуживает одна задача-планировщик с кучей сроков
+    (heapq): сообщение группы продлевает срок до timeout_seconds после
+    последнего сообщения, но не дольше max_wait_seconds от первого. Группа
+    сбрасывается сразу при достижении MAX_MEDIA_GROUP_SIZE элементов. Устаревшие
+    записи в куче не удаляются, а пропускаются при извлечении (по timer_seq).
+
+    Состояние группы удаляется до вызова обработчика, поэтому ошибка обработки
+    не оставляет данных в памяти. Количество собираемых групп ограничено
+    max_pending: при превышении досрочно сбрасывается самая старая группа.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: Optional[float] = None,
+        max_wait_seconds: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
         """
         Инициализация обработчика медиа-групп.
 
         Args:
-            timeout_seconds: Время ожидания завершения группы (секунды)
+            timeout_seconds: Время ожидания следующего сообщения группы (секунды)
+            max_wait_seconds: Максимальное время сборки группы (секунды)
+            max_pending: Максимальное количество собираемых групп
         """
-        self.timeout_seconds = timeout_seconds
-        # {media_group_id: [messages]}
-        self.groups: Dict[int, List[Any]] = defaultdict(list)
-        # {media_group_id: asyncio.Task}
-        self.pending_tasks: Dict[int, asyncio.Task] = {}
-        # {media_group_id: datetime}
-        self.group_timestamps: Dict[int, datetime] = {}
+        self.timeout_seconds = timeout_seconds or settings.media_group_timeout
+        self.max_wait_seconds = max(max_wait_seconds or settings.media_group_max_wait, self.timeout_seconds)
+        self.max_pending = max_pending or settings.media_group_max_pending
+        # {media_group_id: PendingMediaGroup}, порядок вставки - порядок первых сообщений
+        self._groups: Dict[Any, PendingMediaGroup] = {}
+        # Куча (deadline, timer_seq, media_group_id)
+        self._timers: List[Tuple[float, int, Any]] = []
+        self._timer_seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Задачи обработки сброшенных групп
+        self._processing: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Количество собираемых групп."""
+        return len(self._groups)
 
     async def add_message(self, message, process_callback, client=None) -> Optional[Any]:
         """
@@ -43,111 +90,125 @@ class MediaGroupHandler:
         if not hasattr(message, "media_group_id") or message.media_group_id is None:
             return await process_callback([message])
 
+        self._ensure_scheduler()
         media_group_id = message.media_group_id
-
-        # Добавляем сообщение в группу
-        self.groups[media_group_id].append(message)
-        self.group_timestamps[media_group_id] = datetime.utcnow()
-
-        logger.debug("media_group_message_added", media_group_id=media_group_id, group_size=len(self.groups[media_group_id]))
-
-        # Отменяем предыдущую задачу для этой группы, если она есть
-        if media_group_id in self.pending_tasks:
-            self.pending_tasks[media_group_id].cancel()
-
-        # Сохраняем client для использования при обработке группы
-        if client and not hasattr(self, "group_clients"):
-            self.group_clients = {}
-        if client:
-            self.group_clients[media_group_id] = client
-
-        # Создаем новую задачу с таймаутом
-        task = asyncio.create_task(self._process_group_after_timeout(media_group_id, process_callback))
-        self.pending_tasks[media_group_id] = task
+        now = time.monotonic()
+
+        group = self._groups.get(media_group_id)
+        if group is None:
+            if len(self._groups) >= self.max_pending:
+                self._flush(next(iter(self._groups)), "overflow")
+            group = PendingMediaGroup(
+                process_callback=process_callback,
+                client=client,
+                first_at=now,
+                deadline=now,
+                timer_seq=0,
+            )
+            self._groups[media_group_id] = group
+        elif client:
+            group.client = client
+
+        group.messages.append(message)
+        logger.debug("media_group_message_added", media_group_id=media_group_id, group_size=len(group.messages))
+
+        if len(group.messages) >= MAX_MEDIA_GROUP_SIZE:
+            # Альбом заполнен - больше сообщений не будет
+            self._flush(media_group_id, "full")
+        else:
+            self._schedule(media_group_id, group, min(now + self.timeout_seconds, group.first_at + self.max_wait_seconds))
+
+        if metrics_collector.enabled:
+            metrics_collector.set_gauge("media_group_pending", len(self._groups))
 
         # Возвращаем None, так как сообщение будет обработано вместе с группой
         return None
 
-    async def _process_group_after_timeout(self, media_group_id: int, process_callback: Any) -> None:
+    def _ensure_scheduler(self) -> None:
+        """Запустить планировщик (или перезапустить, если задача завершилась)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _schedule(self, media_group_id: Any, group: PendingMediaGroup, deadline: float) -> None:
+        """Назначить срок сброса группы."""
+        self._timer_seq += 1
+        group.deadline = deadline
+        group.timer_seq = self._timer_seq
+        heapq.heappush(self._timers, (deadline, self._timer_seq, media_group_id))
+        # Будим планировщик, только если срок стал ближайшим
+        if self._timers[0][1] == self._timer_seq:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        """Сбрасывать группы по истечении сроков."""
+        while True:
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, timer_seq, media_group_id = heapq.heappop(self._timers)
+                group = self._groups.get(media_group_id)
+                # Запись устарела: срок продлен или группа уже сброшена
+                if group is not None and group.timer_seq == timer_seq:
+                    self._flush(media_group_id, "timeout")
+
+            timeout = self._timers[0][0] - now if self._timers else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _flush(self, media_group_id: Any, reason: str) -> None:
         """
-        Обработать группу медиа после таймаута.
+        Передать группу на обработку и удалить ее из собираемых.
 
         Args:
             media_group_id: ID медиа-группы
-            process_callback: Функция для обработки группы сообщений
+            reason: Причина сброса (full, timeout, overflow, shutdown)
         """
+        group = self._groups.pop(media_group_id, None)
+        if group is None or not group.messages:
+            return
+
+        assembly_time = time.monotonic() - group.first_at
+        logger.info(
+            "processing_media_group",
+            media_group_id=media_group_id,
+            messages_count=len(group.messages),
+            reason=reason,
+            assembly_time=round(assembly_time, 3),
+        )
+        if metrics_collector.enabled:
+            metrics_collector.record_timing("media_group_assembly", assembly_time)
+            metrics_collector.record_value(f"media_group_flush_{reason}", len(group.messages))
+            metrics_collector.set_gauge("media_group_pending", len(self._groups))
+
+        task = asyncio.create_task(self._process_group(media_group_id, group))
+        self._processing.add(task)
+        task.add_done_callback(self._processing.discard)
+
+    async def _process_group(self, media_group_id: Any, group: PendingMediaGroup) -> None:
         """
-        Обработать группу после таймаута.
-        
+        Обработать сброшенную группу.
+
         Args:
             media_group_id: ID медиа-группы
-            process_callback: Функция для обработки группы сообщений
+            group: Группа
         """
         try:
-            # Ждем таймаут
-            await asyncio.sleep(self.timeout_seconds)
-
-            # Проверяем, что группа еще существует
-            if media_group_id not in self.groups:
-                return
-
-            # Получаем все сообщения группы
-            messages = self.groups[media_group_id]
-
-            if not messages:
-                return
-
-            logger.info("processing_media_group", media_group_id=media_group_id, messages_count=len(messages))
-
-            # Обрабатываем группу
-            try:
-                # Получаем client для этой группы
-                client = getattr(self, "group_clients", {}).get(media_group_id)
-                await process_callback(messages, client)
-            except Exception as e:
-                logger.error("media_group_processing_error", media_group_id=media_group_id, error=str(e), exc_info=True)
-            finally:
-                # Удаляем группу после обработки
-                if media_group_id in self.groups:
-                    del self.groups[media_group_id]
-                if media_group_id in self.group_timestamps:
-                    del self.group_timestamps[media_group_id]
-                if media_group_id in self.pending_tasks:
-                    del self.pending_tasks[media_group_id]
-                if hasattr(self, "group_clients") and media_group_id in self.group_clients:
-                    del self.group_clients[media_group_id]
-
-        except asyncio.CancelledError:
-            # Задача была отменена (добавлено новое сообщение в группу)
-            logger.debug("media_group_task_cancelled", media_group_id=media_group_id)
+            await group.process_callback(group.messages, group.client)
         except Exception as e:
-            logger.error("media_group_timeout_error", media_group_id=media_group_id, error=str(e), exc_info=True)
+            logger.error("media_group_processing_error", media_group_id=media_group_id, error=str(e), exc_info=True)
 
-    def cleanup_old_groups(self, max_age_seconds: int = 60) -> int:
-        """
-        Очистить старые группы, которые не были обработаны.
+    async def close(self) -> None:
+        """Остановить планировщик, обработать собираемые группы и дождаться обработки."""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
 
-        Args:
-            max_age_seconds: Максимальный возраст группы (секунды)
+        for media_group_id in list(self._groups):
+            self._flush(media_group_id, "shutdown")
+        self._timers.clear()
 
-        Returns:
-            Количество удаленных групп
-        """
-        now = datetime.utcnow()
-        removed_count = 0
-
-        for media_group_id in list(self.groups.keys()):
-            if media_group_id in self.group_timestamps:
-                age = (now - self.group_timestamps[media_group_id]).total_seconds()
-                if age > max_age_seconds:
-                    logger.warning("removing_stale_media_group", media_group_id=media_group_id, age_seconds=age)
-                    if media_group_id in self.groups:
-                        del self.groups[media_group_id]
-                    if media_group_id in self.group_timestamps:
-                        del self.group_timestamps[media_group_id]
-                    if media_group_id in self.pending_tasks:
-                        self.pending_tasks[media_group_id].cancel()
-                        del self.pending_tasks[media_group_id]
-                    removed_count += 1
-
-        return removed_count
+        if self._processing:
+            await asyncio.gather(*self._processing, return_exceptions=True)
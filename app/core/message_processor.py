@@ -10,14 +10,16 @@ import asyncio
 
 from app.models.crossposting_link import CrosspostingLink
 from app.models.message_log import MessageLog
-from app.models.failed_message import FailedMessage
 from app.max_api.client import MaxAPIClient
+from app.core.link_routing import link_routing
+from app.core.log_writer import message_log_writer
 from app.utils.logger import get_logger
-from app.utils.cache import get_cache, set_cache, delete_cache
+from app.utils.cache import get_or_load_cache, set_cache, delete_cache
 from app.utils.enums import MessageStatus
 from app.utils.exceptions import APIError, DatabaseError, MediaProcessingError
 from app.utils.rate_limiter import max_api_limiter
-from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.circuit_breaker import CircuitBreakerRegistry, classify_error
+from app.utils.deadline import deadline_scope
 from app.utils.metrics import metrics_collector, record_operation_time
 from app.utils.chat_id_converter import convert_chat_id
 from config.database import async_session_maker
@@ -25,13 +27,21 @@ from config.settings import settings
 
 logger = get_logger(__name__)
 
-# Circuit breaker для MAX API
-max_api_circuit_breaker = CircuitBreaker(
+# Circuit breaker для MAX API: по одному на MAX канал и на класс endpoint
+max_api_circuit_breakers = CircuitBreakerRegistry(
     failure_threshold=settings.circuit_breaker_failure_threshold,
     recovery_timeout=settings.circuit_breaker_recovery_timeout,
-    expected_exception=APIError,
 )
 
+# Классы endpoint MAX API
+ENDPOINT_MESSAGES = "endpoint:messages"
+ENDPOINT_UPLOADS = "endpoint:uploads"
+
+
+def max_channel_breaker_key(max_channel_id: str) -> str:
+    """Ключ circuit breaker MAX канала."""
+    return f"channel:{max_channel_id}"
+
 
 class MessageProcessor:
     """Обработчик сообщений для кросспостинга."""
@@ -40,10 +50,15 @@ class MessageProcessor:
         self.max_client = MaxAPIClient()
         from app.core.media_group_handler import MediaGroupHandler
 
-        self.media_group_handler = MediaGroupHandler(timeout_seconds=2)
+        self.media_group_handler = MediaGroupHandler()
 
     async def process_message(
-        self, telegram_channel_id: int, telegram_message_id: int, message_data: Dict[str, Any], link_id: Optional[int] = None
+        self,
+        telegram_channel_id: int,
+        telegram_message_id: int,
+        message_data: Dict[str, Any],
+        link_id: Optional[int] = None,
+        link_ids: Optional[List[int]] = None,
     ) -> bool:
         """
         Обработать сообщение из Telegram и отправить в MAX.
@@ -52,12 +67,27 @@ class MessageProcessor:
             telegram_channel_id: ID Telegram канала
             telegram_message_id: ID сообщения в Telegram
             message_data: Данные сообщения
+            link_id: ID связи для миграции (опционально)
+            link_ids: Обработать только эти активные связи (партиция очереди отправки)
 
         Returns:
             True если успешно, False в противном случае
         """
-        start_time = datetime.utcnow()
+        # Срок и бюджет повторов поста доступны всем уровням отправки (см. app.utils.deadline)
+        with deadline_scope(settings.send_post_deadline, settings.send_retry_budget, "post"):
+            return await self._process_message(
+                telegram_channel_id, telegram_message_id, message_data, link_id=link_id, link_ids=link_ids
+            )
 
+    async def _process_message(
+        self,
+        telegram_channel_id: int,
+        telegram_message_id: int,
+        message_data: Dict[str, Any],
+        link_id: Optional[int] = None,
+        link_ids: Optional[List[int]] = None,
+    ) -> bool:
+        """Обработать сообщение (аргументы и результат - как у process_message)."""
         # Используем одну транзакцию для всего процесса
         async with async_session_maker() as session:
             async with session.begin():
@@ -79,18 +109,25 @@ class MessageProcessor:
                             )
                             return False
                         links = [link]
+                    elif link_routing.ready:
+                        # Активные связи из таблицы маршрутизации в памяти (без запросов к БД)
+                        cache_key = None
+                        links = link_routing.get_links(telegram_channel_id)
                     else:
                         # Получаем активные связи с eager loading для оптимизации
+                        # При промахе кэша ID связей загружает из БД только один из одновременных вызовов
                         cache_key = f"channel_links:{telegram_channel_id}"
-                        cached_data = await get_cache(cache_key)
+                        cached_data = await get_or_load_cache(
+                            cache_key, lambda: self._load_active_link_ids(telegram_channel_id)
+                        )
 
                         if cached_data and isinstance(cached_data, list) and len(cached_data) > 0:
                             # Используем кэш
-                            link_ids = cached_data
+                            cached_link_ids = cached_data
                             logger.info(
                                 "using_cache_for_links",
                                 cache_key=cache_key,
-                                link_ids=link_ids,
+                                cached_link_ids=cached_link_ids,
                                 telegram_channel_id=telegram_channel_id,
                             )
                             result = await session.execute(
@@ -98,25 +135,25 @@ class MessageProcessor:
                                 .options(
                                     selectinload(CrosspostingLink.max_channel), selectinload(CrosspostingLink.telegram_channel)
                                 )
-                                .where(CrosspostingLink.id.in_(link_ids))
+                                .where(CrosspostingLink.id.in_(cached_link_ids))
                                 .where(CrosspostingLink.is_enabled == True)
                             )
                             links: List[CrosspostingLink] = result.scalars().all()
                             logger.info(
                                 "links_from_cache",
                                 cache_key=cache_key,
-                                cached_link_ids=link_ids,
+                                cached_link_ids=cached_link_ids,
                                 found_links_count=len(links),
                                 telegram_channel_id=telegram_channel_id,
                             )
-                            if len(links) == 0 and len(link_ids) > 0:
+                            if len(links) == 0 and len(cached_link_ids) > 0:
                                 # Проблема: кэш содержит ID связей, но они не найдены в БД или отключены
                                 # Это может произойти после миграции, если кэш был создан до коммита или данные изменились
                                 # Очищаем кэш и перезагружаем связи из БД
                                 logger.warning(
                                     "cache_contains_invalid_links",
                                     cache_key=cache_key,
-                                    cached_link_ids=link_ids,
+                                    cached_link_ids=cached_link_ids,
                                     telegram_channel_id=telegram_channel_id,
                                 )
                                 from app.utils.cache import delete_cache
@@ -141,16 +178,13 @@ class MessageProcessor:
                                 )
                                 # Обновляем кэш с актуальными данными
                                 if links:
-                                    link_ids = [link.id for link in links]
-                                    await set_cache(cache_key, link_ids)
-                                    # Проверяем, что кэш обновлен правильно
-                                    verify_cache = await get_cache(cache_key)
+                                    cached_link_ids = [link.id for link in links]
+                                    await set_cache(cache_key, cached_link_ids)
                                     logger.info(
                                         "cache_updated_after_invalidation",
                                         cache_key=cache_key,
-                                        link_ids=link_ids,
+                                        cached_link_ids=cached_link_ids,
                                         telegram_channel_id=telegram_channel_id,
-                                        cache_verified=verify_cache == link_ids,
                                     )
                                 else:
                                     logger.warning(
@@ -159,34 +193,11 @@ class MessageProcessor:
                                         telegram_channel_id=telegram_channel_id,
                                     )
                         else:
-                            # Поиск активных связей для канала с eager loading
-                            logger.warning("cache_miss_or_empty", cache_key=cache_key, telegram_channel_id=telegram_channel_id)
-                            result = await session.execute(
-                                select(CrosspostingLink)
-                                .options(
-                                    selectinload(CrosspostingLink.max_channel), selectinload(CrosspostingLink.telegram_channel)
-                                )
-                                .where(CrosspostingLink.telegram_channel_id == telegram_channel_id)
-                                .where(CrosspostingLink.is_enabled == True)
-                            )
-                            links = result.scalars().all()
-                            logger.info(
-                                "links_from_db",
-                                cache_key=cache_key,
-                                found_links_count=len(links),
-                                telegram_channel_id=telegram_channel_id,
-                            )
+                            # Активных связей нет (отсутствие закэшировано на cache_negative_ttl)
+                            links = []
 
-                            # Кэширование ID связей
-                            if links:
-                                link_ids = [link.id for link in links]
-                                await set_cache(cache_key, link_ids)
-                                logger.info(
-                                    "cache_updated",
-                                    cache_key=cache_key,
-                                    link_ids=link_ids,
-                                    telegram_channel_id=telegram_channel_id,
-                                )
+                    if link_ids is not None:
+                        links = [link for link in links if link.id in link_ids]
 
                     if not links:
                         logger.warning(
@@ -206,23 +217,22 @@ class MessageProcessor:
                             )
                         return False
 
-                    # Проверка на дубликат для всех связей одним запросом
-                    # ВАЖНО: Проверяем только записи со статусом SUCCESS, чтобы не пропускать
-                    # сообщения, которые были обработаны с ошибкой (FAILED) или еще обрабатываются (PENDING)
-                    link_ids_list = [link.id for link in links]
-                    existing_logs = await session.execute(
-                        select(MessageLog).where(
-                            MessageLog.crossposting_link_id.in_(link_ids_list),
-                            MessageLog.telegram_message_id == telegram_message_id,
-                            MessageLog.status == MessageStatus.SUCCESS.value,
-                        )
+                    # Создаем PENDING логи для всех связей одним запросом с проверкой на дубликат
+                    # ВАЖНО: Пропускаются только связи с логом SUCCESS, логи с ошибкой (FAILED)
+                    # или незавершенные (PENDING) переводятся в PENDING и отправляются повторно
+                    message_type = message_data.get("type", "text")  # Используем строковое значение напрямую
+                    log_ids = await self._upsert_pending_logs(
+                        session,
+                        [(link.id, telegram_message_id, message_type, message_data.get("file_size")) for link in links],
                     )
-                    existing_link_ids = {log.crossposting_link_id for log in existing_logs.scalars().all()}
-
-                    # Обрабатываем только те связи, для которых еще нет успешного лога
-                    links_to_process = [link for link in links if link.id not in existing_link_ids]
-
-                    if not links_to_process:
+                    # Сохраняем (связь, ID лога) для обработки вне транзакции
+                    message_logs = [
+                        (link, log_ids[(link.id, telegram_message_id)])
+                        for link in links
+                        if (link.id, telegram_message_id) in log_ids
+                    ]
+
+                    if not message_logs:
                         logger.debug(
                             "all_messages_duplicate", telegram_channel_id=telegram_channel_id, message_id=telegram_message_id
                         )
@@ -230,47 +240,35 @@ class MessageProcessor:
 
                     # Обрабатываем каждую связь
                     success_count = 0
-                    message_logs = []  # Сохраняем логи для обработки вне транзакции
-
-                    for link in links_to_process:
-                        try:
-                            # Создание записи в логе
-                            message_log = MessageLog(
-                                crossposting_link_id=link.id,
-                                telegram_message_id=telegram_message_id,
-                                status=MessageStatus.PENDING.value,
-                                message_type=message_data.get("type", "text"),  # Используем строковое значение напрямую
-                                created_at=datetime.utcnow(),
-                            )
-                            session.add(message_log)
-                            await session.flush()  # Flush для получения ID
-                            message_logs.append((link, message_log))
-                        except Exception as e:
-                            logger.error("link_processing_error", link_id=link.id, error=str(e))
-                            continue
 
-                    # Коммитим все логи одной транзакцией, чтобы они были доступны для обновления
-                    # в _batch_update_message_logs, которая использует новую сессию
+                    # Коммитим все логи одной транзакцией до отправки, чтобы повторная доставка
+                    # видела их, а message_log_writer мог обновить их после отправки
                     await session.commit()
 
                     # Теперь обрабатываем отправку сообщений параллельно
-                    async def process_link(
-                        link: CrosspostingLink, message_log: MessageLog
-                    ) -> Tuple[int, Optional[Dict], Optional[str], int]:
+                    async def process_link(link: CrosspostingLink) -> Tuple[int, Optional[Dict], Optional[str], int]:
                         """Обработать одну связь."""
                         link_start_time = datetime.utcnow()
                         try:
                             # Rate limiting
                             await max_api_limiter.wait_if_needed(f"max_api_{link.max_channel.channel_id}")
 
-                            # Используем circuit breaker с таймаутом
-                            try:
-                                max_message = await asyncio.wait_for(
-                                    max_api_circuit_breaker.call(self._send_to_max, link, message_data),
-                                    timeout=settings.max_api_timeout,
-                                )
-                            except asyncio.TimeoutError:
-                                raise APIError(f"Таймаут при отправке в MAX API (>{settings.max_api_timeout}с)")
+                            # Срок связи (не позже срока поста); повторы на всех уровнях списываются
+                            # из бюджета поста и прекращаются до срока, wait_for - только страховка
+                            with deadline_scope(settings.max_api_timeout, name="link") as deadline:
+                                # Используем circuit breaker канала и endpoint с таймаутом
+                                # (таймаут учитывается breaker как временная ошибка)
+                                async def send() -> Dict[str, Any]:
+                                    return await asyncio.wait_for(
+                                        self._send_to_max(link, message_data), timeout=deadline.remaining()
+                                    )
+
+                                try:
+                                    max_message = await max_api_circuit_breakers.call(
+                                        [max_channel_breaker_key(link.max_channel.channel_id), ENDPOINT_MESSAGES], send
+                                    )
+                                except asyncio.TimeoutError:
+                                    raise APIError(f"Таймаут при отправке в MAX API (>{deadline.timeout:.0f}с)")
 
                             processing_time = int((datetime.utcnow() - link_start_time).total_seconds() * 1000)
 
@@ -291,9 +289,16 @@ class MessageProcessor:
                         except (APIError, httpx.HTTPStatusError, httpx.RequestError, asyncio.TimeoutError) as e:
                             # Конкретные исключения для API ошибок
                             error_msg = str(e)
+                            logger.warning(
+                                "max_send_failed",
+                                link_id=link.id,
+                                max_channel_id=link.max_channel.channel_id,
+                                error_class=classify_error(e).value,
+                                error=error_msg,
+                            )
                             processing_time = int((datetime.utcnow() - link_start_time).total_seconds() * 1000)
                             await self._handle_send_error(
-                                link.id, telegram_message_id, message_log, error_msg, link_start_time
+                                link.id, telegram_message_id, error_msg, link_start_time
                             )
                             return (link.id, None, error_msg, processing_time)
                         except (DatabaseError, MediaProcessingError) as e:
@@ -301,7 +306,7 @@ class MessageProcessor:
                             error_msg = str(e)
                             processing_time = int((datetime.utcnow() - link_start_time).total_seconds() * 1000)
                             await self._handle_send_error(
-                                link.id, telegram_message_id, message_log, error_msg, link_start_time
+                                link.id, telegram_message_id, error_msg, link_start_time
                             )
                             return (link.id, None, error_msg, processing_time)
                         except Exception as e:
@@ -310,14 +315,22 @@ class MessageProcessor:
                             processing_time = int((datetime.utcnow() - link_start_time).total_seconds() * 1000)
                             logger.error("unexpected_error_processing_link", link_id=link.id, error=str(e), exc_info=True)
                             await self._handle_send_error(
-                                link.id, telegram_message_id, message_log, error_msg, link_start_time
+                                link.id, telegram_message_id, error_msg, link_start_time
                             )
                             return (link.id, None, error_msg, processing_time)
 
+                    # Загружаем медиа поста в MAX один раз и переиспользуем token для всех связей
+                    await self._upload_media_once(message_data)
+
                     # Параллельная обработка всех связей
-                    results = await asyncio.gather(
-                        *[process_link(link, message_log) for link, message_log in message_logs], return_exceptions=True
-                    )
+                    try:
+                        results = await asyncio.gather(
+                            *[process_link(link) for link, _ in message_logs],
+                            return_exceptions=True,
+                        )
+                    finally:
+                        # Удаляем локальный файл только после отправки во все связи
+                        await self._delete_local_media(message_data)
 
                     # Batch update для всех успешных сообщений
                     success_updates = []
@@ -332,18 +345,14 @@ class MessageProcessor:
                         # max_message может быть пустым словарем {} или None, но отправка все равно успешна
                         if error_msg is None:
                             # Безопасный поиск message_log с обработкой случая, когда link_id не найден
-                            message_log = None
-                            for l, ml in message_logs:
-                                if l.id == link_id:
-                                    message_log = ml
-                                    break
+                            message_log_id = log_ids.get((link_id, telegram_message_id))
 
-                            if message_log is None:
+                            if message_log_id is None:
                                 logger.error(
                                     "message_log_not_found_for_link",
                                     link_id=link_id,
                                     telegram_message_id=telegram_message_id,
-                                    available_link_ids=[l.id for l, ml in message_logs],
+                                    available_link_ids=[l.id for l, _ in message_logs],
                                 )
                                 continue
 
@@ -353,23 +362,19 @@ class MessageProcessor:
                                 max_message_id = str(max_message.get("message_id", ""))
                             success_updates.append(
                                 {
-                                    "message_log_id": message_log.id,
+                                    "link_id": link_id,
+                                    "telegram_message_id": telegram_message_id,
                                     "max_message_id": max_message_id,
                                     "processing_time": processing_time,
                                 }
                             )
                             success_count += 1
 
-                    # Batch update для всех успешных обновлений
+                    # Статусы успешных отправок записываются в БД в фоне пачками
                     if success_updates:
-                        logger.info(
-                            "batch_updating_message_logs",
-                            updates_count=len(success_updates),
-                            telegram_message_id=telegram_message_id,
-                        )
-                        await self._batch_update_message_logs(success_updates, start_time)
-                        logger.info(
-                            "batch_update_completed",
+                        await message_log_writer.mark_success(success_updates)
+                        logger.debug(
+                            "success_updates_queued",
                             updates_count=len(success_updates),
                             telegram_message_id=telegram_message_id,
                         )
@@ -390,82 +395,236 @@ class MessageProcessor:
                     logger.error("message_processing_unexpected_error", error=str(e), exc_info=True)
                     raise DatabaseError(f"Неожиданная ошибка обработки сообщения: {e}")
 
-    async def _handle_send_error(
-        self, link_id: int, telegram_message_id: int, message_log: MessageLog, error_message: str, start_time: datetime
-    ) -> None:
-        """Обработать ошибку отправки сообщения."""
-        async with async_session_maker() as session:
-            async with session.begin():
-                await session.merge(message_log)
-                message_log.status = MessageStatus.FAILED.value
-                message_log.error_message = error_message
-                message_log.processing_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
-
-                # Добавление в таблицу неудачных отправок
-                failed_message = FailedMessage(
-                    crossposting_link_id=link_id, telegram_message_id=telegram_message_id, error_message=error_message
+    async def _upload_media_once(self, message_data: Dict[str, Any]) -> None:
+        """
+        Загрузить медиа поста в MAX один раз для всех связей.
+
+        Полученный token сохраняется в message_data["upload_token"] и используется
+        при отправке в каждый MAX канал. При ошибке загрузки каждая связь попробует
+        загрузить файл самостоятельно.
+
+        Args:
+            message_data: Данные сообщения
+        """
+        message_type = message_data.get("type")
+        local_file_path = message_data.get("local_file_path")
+        media_bytes = message_data.pop("media_bytes", None)
+        media_filename = message_data.pop("media_filename", None)
+        if (not local_file_path and media_bytes is None) or message_data.get("upload_token"):
+            return
+
+        if message_type == "photo" and (message_data.get("photo_url") or media_bytes is not None):
+            upload_type = "image"
+        elif message_type == "video":
+            upload_type = "video"
+        else:
+            return
+
+        if media_bytes is not None:
+            try:
+                message_data["upload_token"] = await max_api_circuit_breakers.call(
+                    [ENDPOINT_UPLOADS], self.max_client.upload_file_cached, media_filename, upload_type, data=media_bytes
                 )
-                session.add(failed_message)
+                logger.info("media_uploaded_from_memory", file_name=media_filename, upload_type=upload_type)
+                return
+            except Exception as e:
+                logger.warning("media_in_memory_upload_failed", file_name=media_filename, error=str(e))
 
-        logger.error(
-            "message_processing_failed", link_id=link_id, telegram_message_id=telegram_message_id, error=error_message
-        )
+            # Fallback: сохраняем файл на диск, чтобы каждая связь могла загрузить его сама
+            from app.utils.media_handler import store_media_bytes
+
+            try:
+                public_url, local_file_path = await store_media_bytes(media_bytes, media_filename)
+            except Exception as e:
+                logger.error("failed_to_store_media_fallback", file_name=media_filename, error=str(e))
+                return
+            message_data["local_file_path"] = local_file_path
+            message_data["photo_url" if message_type == "photo" else "video_url"] = public_url
+            return
 
-    async def _batch_update_message_logs(self, updates: List[Dict[str, Any]], start_time: datetime) -> None:
+        try:
+            message_data["upload_token"] = await max_api_circuit_breakers.call(
+                [ENDPOINT_UPLOADS], self.max_client.upload_file_cached, local_file_path, upload_type
+            )
+            logger.info("media_uploaded_once_for_links", file_path=local_file_path, upload_type=upload_type)
+        except Exception as e:
+            logger.warning("media_preupload_failed", file_path=local_file_path, upload_type=upload_type, error=str(e))
+
+    async def _download_media_in_memory(self, client, message, file_type: str, message_data: Dict[str, Any]) -> bool:
         """
-        Batch update для message logs.
+        Попробовать скачать медиа сообщения в память (без записи на диск).
 
         Args:
-            updates: Список словарей с данными для обновления
-            start_time: Время начала обработки
+            client: Pyrogram клиент
+            message: Сообщение из Pyrogram
+            file_type: Тип файла (photo, video)
+            message_data: Данные сообщения (дополняются media_bytes и media_filename)
+
+        Returns:
+            True если файл скачан в память, False если нужно использовать диск
         """
-        if not updates:
-            logger.warning("batch_update_message_logs_empty_updates")
+        from app.utils.media_handler import download_media_to_memory
+
+        downloaded = await download_media_to_memory(client, message, file_type)
+        if not downloaded:
+            return False
+
+        message_data["media_bytes"], message_data["media_filename"] = downloaded
+        return True
+
+    async def _delete_local_media(self, message_data: Dict[str, Any]) -> None:
+        """Удалить локальный медиа-файл поста после отправки во все связи."""
+        local_file_path = message_data.get("local_file_path")
+        if not local_file_path or message_data.get("shared_media"):
+            # Файл общий для нескольких задач очереди - его удаляет воркер после последней задачи
             return
 
-        logger.info(
-            "batch_update_message_logs_start",
-            updates_count=len(updates),
-            message_log_ids=[u.get("message_log_id") for u in updates],
+        from app.utils.media_handler import delete_media_file
+
+        try:
+            await delete_media_file(local_file_path)
+            logger.info("media_file_deleted_after_send", file_path=local_file_path)
+        except Exception as delete_error:
+            # Логируем ошибку удаления, но не прерываем процесс
+            logger.warning("failed_to_delete_media_after_send", file_path=local_file_path, error=str(delete_error))
+
+    async def _upsert_pending_logs(
+        self, session: AsyncSession, rows: List[Tuple[int, int, str, Optional[int]]]
+    ) -> Dict[Tuple[int, int], int]:
+        """
+        Создать PENDING логи с атомарной проверкой на дубликат.
+
+        messages_log секционирована по created_at, поэтому уникальность
+        (связь, сообщение) хранится в messages_log_keys. Ключи вставляются одним
+        INSERT ... ON CONFLICT, который блокирует ключ до конца транзакции и
+        возвращает created_at существующего лога. Для новых ключей логи создаются
+        одним INSERT, существующие логи со статусом не SUCCESS переводятся в
+        PENDING одним UPDATE (по created_at выбирается секция), логи SUCCESS
+        не изменяются и не возвращаются. Изменения статусов учитываются в message_stats.
+
+        Args:
+            session: Сессия БД
+            rows: Список (ID связи, ID сообщения в Telegram, тип сообщения, размер файла в байтах)
+
+        Returns:
+            Словарь {(ID связи, ID сообщения в Telegram): ID лога} для записей, которые нужно отправить
+        """
+        if not rows:
+            return {}
+
+        from sqlalchemy import BigInteger, DateTime, String, column, literal_column, values
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        from sqlalchemy.orm import aliased
+        from app.core.message_stats import apply_status_changes
+        from app.models.message_log import MessageLogKey
+
+        now = datetime.utcnow()
+        message_types = {(link_id, tg_id): message_type for link_id, tg_id, message_type, _ in rows}
+        file_sizes = {(link_id, tg_id): file_size for link_id, tg_id, _, file_size in rows}
+
+        key_stmt = pg_insert(MessageLogKey).values(
+            [
+                {"crossposting_link_id": link_id, "telegram_message_id": telegram_message_id, "created_at": now}
+                for link_id, telegram_message_id in message_types
+            ]
         )
+        # Пустое обновление нужно, чтобы RETURNING вернул и существующие ключи
+        key_stmt = key_stmt.on_conflict_do_update(
+            index_elements=[MessageLogKey.crossposting_link_id, MessageLogKey.telegram_message_id],
+            set_={"crossposting_link_id": key_stmt.excluded.crossposting_link_id},
+        ).returning(
+            MessageLogKey.crossposting_link_id,
+            MessageLogKey.telegram_message_id,
+            MessageLogKey.created_at,
+            literal_column("xmax = 0").label("inserted"),
+        )
+        keys = (await session.execute(key_stmt)).all()
+
+        log_ids: Dict[Tuple[int, int], int] = {}
+        status_changes = []
+        new_keys = [(link_id, tg_id) for link_id, tg_id, _, inserted in keys if inserted]
+        existing_keys = [(link_id, tg_id, created_at) for link_id, tg_id, created_at, inserted in keys if not inserted]
+
+        if new_keys:
+            result = await session.execute(
+                pg_insert(MessageLog)
+                .values(
+                    [
+                        {
+                            "crossposting_link_id": link_id,
+                            "telegram_message_id": tg_id,
+                            "status": MessageStatus.PENDING.value,
+                            "message_type": message_types[(link_id, tg_id)],
+                            "file_size": file_sizes[(link_id, tg_id)],
+                            "created_at": now,
+                        }
+                        for link_id, tg_id in new_keys
+                    ]
+                )
+                .returning(MessageLog.id, MessageLog.crossposting_link_id, MessageLog.telegram_message_id)
+            )
+            log_ids.update({(link_id, tg_id): log_id for log_id, link_id, tg_id in result.all()})
+            status_changes.extend(
+                (link_id, now, None, MessageStatus.PENDING.value, None, None, None) for link_id, _ in new_keys
+            )
 
-        async with async_session_maker() as session:
-            async with session.begin():
-                updated_count = 0
-                for update_data in updates:
-                    message_log_id = update_data.get("message_log_id")
-                    max_message_id = update_data.get("max_message_id")
-                    processing_time = update_data.get("processing_time", 0)
+        if existing_keys:
+            existing = values(
+                column("link_id", BigInteger),
+                column("telegram_message_id", BigInteger),
+                column("created_at", DateTime),
+                column("message_type", String),
+                name="existing_logs",
+            ).data(
+                [
+                    (link_id, tg_id, created_at, message_types[(link_id, tg_id)])
+                    for link_id, tg_id, created_at in existing_keys
+                ]
+            )
+            # Копия строки до обновления - для предыдущего статуса в message_stats
+            previous = aliased(MessageLog)
+            result = await session.execute(
+                update(MessageLog)
+                .where(MessageLog.crossposting_link_id == existing.c.link_id)
+                .where(MessageLog.telegram_message_id == existing.c.telegram_message_id)
+                .where(MessageLog.created_at == existing.c.created_at)
+                .where(MessageLog.status != MessageStatus.SUCCESS.value)
+                .where(previous.id == MessageLog.id, previous.created_at == MessageLog.created_at)
+                .values(status=MessageStatus.PENDING.value, message_type=existing.c.message_type)
+                .returning(
+                    MessageLog.id,
+                    MessageLog.crossposting_link_id,
+                    MessageLog.telegram_message_id,
+                    MessageLog.created_at,
+                    previous.status,
+                    previous.processing_time_ms,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            for log_id, link_id, tg_id, created_at, previous_status, previous_time in result.all():
+                log_ids[(link_id, tg_id)] = log_id
+                status_changes.append(
+                    (link_id, created_at, previous_status, MessageStatus.PENDING.value, None, None, previous_time)
+                )
 
-                    if message_log_id:
-                        result = await session.execute(
-                            update(MessageLog)
-                            .where(MessageLog.id == message_log_id)
-                            .values(
-                                max_message_id=max_message_id,
-                                status=MessageStatus.SUCCESS.value,
-                                processing_time_ms=processing_time,
-                                sent_at=datetime.utcnow(),
-                            )
-                        )
-                        rows_affected = result.rowcount
-                        if rows_affected == 0:
-                            logger.error(
-                                "batch_update_message_log_not_found",
-                                message_log_id=message_log_id,
-                            )
-                        else:
-                            updated_count += 1
-                            logger.debug(
-                                "batch_update_message_log_updated",
-                                message_log_id=message_log_id,
-                                max_message_id=max_message_id,
-                            )
+        await apply_status_changes(session, status_changes)
 
-        logger.info(
-            "batch_update_message_logs_completed",
-            total_updates=len(updates),
-            updated_count=updated_count,
+        logger.debug("pending_logs_upserted", requested=len(rows), new=len(new_keys), returned=len(log_ids))
+        return log_ids
+
+    async def _handle_send_error(
+        self, link_id: int, telegram_message_id: int, error_message: str, start_time: datetime
+    ) -> None:
+        """Обработать ошибку отправки сообщения (запись в БД выполняет message_log_writer)."""
+        await message_log_writer.mark_failed(
+            link_id,
+            telegram_message_id,
+            error_message,
+            processing_time=int((datetime.utcnow() - start_time).total_seconds() * 1000),
+        )
+
+        logger.error(
+            "message_processing_failed", link_id=link_id, telegram_message_id=telegram_message_id, error=error_message
         )
 
     @record_operation_time("send_to_max")
@@ -494,90 +653,48 @@ class MessageProcessor:
                 )
             elif message_type == "photo":
                 photo_url = message_data.get("photo_url")
-                if not photo_url:
+                if not photo_url and not message_data.get("upload_token"):
                     # Если нет URL, отправляем как текст с упоминанием фото
                     text = message_data.get("text", message_data.get("caption", "")) or "[Фото]"
                     return await self.max_client.send_message(chat_id=max_channel_id, text=text)
                 caption = message_data.get("caption")
                 caption_parse_mode = message_data.get("caption_parse_mode")
                 local_file_path = message_data.get("local_file_path")
+                # Локальный файл удаляется в process_message после отправки во все связи
                 try:
-                    result = await self.max_client.send_photo(
+                    return await self.max_client.send_photo(
                         chat_id=max_channel_id,
                         photo_url=photo_url,
                         caption=caption,
                         local_file_path=local_file_path,
                         parse_mode=caption_parse_mode,
+                        upload_token=message_data.get("upload_token"),
                     )
-                    # Удаляем файл после успешной отправки (ДО return)
-                    if local_file_path:
-                        from app.utils.media_handler import delete_media_file
-
-                        try:
-                            await delete_media_file(local_file_path)
-                            logger.info("media_file_deleted_after_send", file_path=local_file_path)
-                        except Exception as delete_error:
-                            # Логируем ошибку удаления, но не прерываем процесс
-                            logger.warning(
-                                "failed_to_delete_media_after_send", file_path=local_file_path, error=str(delete_error)
-                            )
-                    return result
                 except Exception as e:
-                    # Удаляем файл даже при ошибке отправки
-                    if local_file_path:
-                        from app.utils.media_handler import delete_media_file
-
-                        try:
-                            await delete_media_file(local_file_path)
-                            logger.info("media_file_deleted_after_error", file_path=local_file_path)
-                        except Exception as delete_error:
-                            logger.warning(
-                                "failed_to_delete_media_after_error", file_path=local_file_path, error=str(delete_error)
-                            )
                     logger.warning("failed_to_send_photo", error=str(e), photo_url=photo_url)
                     raise
             elif message_type == "video":
-                from app.utils.media_handler import delete_media_file
-
                 video_url = message_data.get("video_url")
                 local_file_path = message_data.get("local_file_path")
                 caption = message_data.get("caption")
                 parse_mode = message_data.get("parse_mode")
 
-                if not local_file_path:
+                if not local_file_path and not message_data.get("upload_token"):
                     # Fallback: отправляем текст, если не удалось скачать видео
                     text = message_data.get("text", message_data.get("caption", "")) or "[Видео]"
                     return await self.max_client.send_message(chat_id=max_channel_id, text=text, parse_mode=parse_mode)
 
+                # Локальный файл удаляется в process_message после отправки во все связи
                 try:
-                    result = await self.max_client.send_video(
+                    return await self.max_client.send_video(
                         chat_id=max_channel_id,
                         video_url=video_url,
                         caption=caption,
                         local_file_path=local_file_path,
                         parse_mode=parse_mode,
+                        upload_token=message_data.get("upload_token"),
                     )
-                    # Удаляем файл после успешной отправки (ДО return)
-                    if local_file_path:
-                        try:
-                            await delete_media_file(local_file_path)
-                            logger.info("video_file_deleted_after_send", file_path=local_file_path)
-                        except Exception as delete_error:
-                            # Логируем ошибку удаления, но не прерываем процесс
-                            logger.warning(
-                                "failed_to_delete_video_after_send", file_path=local_file_path, error=str(delete_error)
-                            )
-                    return result
                 except Exception as e:
-                    # Удаляем файл даже при ошибке отправки
-                    if local_file_path:
-                        try:
-                            await delete_media_file(local_file_path)
-                            logger.info("video_file_deleted_after_error", file_path=local_file_path)
-                        except Exception as delete_error:
-                            logger.warning(
-                                "failed_to_delete_video_after_error", file_path=local_file_path, error=str(delete_error)
-                            )
                     logger.warning("failed_to_send_video", error=str(e), video_url=video_url)
                     raise
             else:
@@ -592,6 +709,9 @@ class MessageProcessor:
             )
         except httpx.RequestError as e:
             raise APIError(f"Ошибка сети при отправке в MAX: {e}")
+        except APIError:
+            # Уже содержит status_code (нужен для классификации ошибки в circuit breaker)
+            raise
         except Exception as e:
             raise APIError(f"Неожиданная ошибка при отправке в MAX: {e}")
 
@@ -628,10 +748,13 @@ class MessageProcessor:
                 return
             # Если группа обработана сразу (не должно быть), продолжаем
 
+        from app.utils.media_handler import get_message_file_size
+
         # Подготовка данных сообщения
         message_data = {
             "type": "text",  # Используем строковое значение напрямую
             "text": message.text or message.caption or "",
+            "file_size": get_message_file_size(message),  # Для статистики отправленных байт
         }
 
         # Определение типа сообщения и получение URL медиа
@@ -647,7 +770,10 @@ class MessageProcessor:
                 message_data["caption_parse_mode"] = caption_parse_mode
             else:
                 message_data["caption"] = message.caption
-            if client:
+            if client and await self._download_media_in_memory(client, message, "photo", message_data):
+                # Небольшое фото загружено в память и будет передано в MAX без записи на диск
+                message_data["photo_url"] = None
+            elif client:
                 try:
                     # Скачиваем фото и получаем публичный URL и локальный путь
                     logger.info("downloading_photo_start", chat_id=message.chat.id if message.chat else None)
@@ -677,7 +803,11 @@ class MessageProcessor:
                 message_data["parse_mode"] = caption_parse_mode
             else:
                 message_data["caption"] = message.caption
-            if client:
+            if client and await self._download_media_in_memory(client, message, "video", message_data):
+                # Небольшое видео загружено в память и будет передано в MAX без записи на диск
+                message_data["video_url"] = None
+                message_data["local_file_path"] = None
+            elif client:
                 try:
                     # Скачиваем видео и получаем публичный URL и локальный путь
                     logger.info("downloading_video_start", chat_id=message.chat.id if message.chat else None)
@@ -759,30 +889,28 @@ class MessageProcessor:
         if not telegram_chat_id:
             return
 
-        # Находим запись канала в БД по channel_id
-        from app.models.telegram_channel import TelegramChannel
-
-        async with async_session_maker() as session:
-            result = await session.execute(select(TelegramChannel).where(TelegramChannel.channel_id == telegram_chat_id))
-            telegram_channel = result.scalar_one_or_none()
-
-            if not telegram_channel:
-                logger.debug(
-                    "telegram_channel_not_found",
-                    channel_id=telegram_chat_id,
-                    channel_title=message.chat.title if message.chat else None,
-                )
-                return
-
-            # Используем ID записи в БД для поиска связей
-            telegram_channel_id = telegram_channel.id
-            logger.info(
-                "processing_message_from_telegram",
-                telegram_channel_db_id=telegram_channel_id,
-                telegram_chat_id=telegram_chat_id,
-                message_id=message.id,
+        # Находим запись канала в БД по channel_id (сначала в таблице маршрутизации)
+        telegram_channel_id = await self._resolve_telegram_channel(telegram_chat_id)
+        if not telegram_channel_id:
+            logger.debug(
+                "telegram_channel_not_found",
+                channel_id=telegram_chat_id,
                 channel_title=message.chat.title if message.chat else None,
             )
+            return
+
+        logger.info(
+            "processing_message_from_telegram",
+            telegram_channel_db_id=telegram_channel_id,
+            telegram_chat_id=telegram_chat_id,
+            message_id=message.id,
+            channel_title=message.chat.title if message.chat else None,
+        )
+
+        # В режиме очереди receiver только ставит задачу, отправку выполняют воркеры
+        if settings.send_queue_enabled:
+            await self._enqueue_message(telegram_channel_id, message.id, message_data)
+            return
 
         # Обрабатываем сообщение
         result = await self.process_message(
@@ -796,6 +924,181 @@ class MessageProcessor:
             success=result is True,
         )
 
+    async def _load_active_link_ids(self, telegram_channel_id: int) -> Optional[List[int]]:
+        """
+        Загрузить ID активных связей Telegram канала из БД.
+
+        Args:
+            telegram_channel_id: ID Telegram канала в БД
+
+        Returns:
+            Список ID связей или None, если активных связей нет
+        """
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(CrosspostingLink.id)
+                .where(CrosspostingLink.telegram_channel_id == telegram_channel_id)
+                .where(CrosspostingLink.is_enabled == True)
+            )
+            link_ids = list(result.scalars().all())
+        logger.info("links_from_db", telegram_channel_id=telegram_channel_id, found_links_count=len(link_ids))
+        return link_ids or None
+
+    async def _resolve_telegram_channel(self, telegram_chat_id: int, use_routing: bool = True) -> Optional[int]:
+        """
+        Получить ID Telegram канала в БД по ID чата.
+
+        Если таблица маршрутизации загружена, запрос к БД не выполняется:
+        каналы без активных связей в ней отсутствуют и пропускаются сразу.
+
+        Args:
+            telegram_chat_id: ID канала в Telegram
+            use_routing: Использовать таблицу маршрутизации (только для активных связей)
+
+        Returns:
+            ID записи в БД или None, если канал не найден (или у него нет активных связей)
+        """
+        routed_channel_id = link_routing.resolve_chat(telegram_chat_id) if use_routing else None
+        if routed_channel_id is not None:
+            return routed_channel_id or None
+
+        from app.models.telegram_channel import TelegramChannel
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(TelegramChannel.id).where(TelegramChannel.channel_id == telegram_chat_id)
+            )
+            return result.scalar_one_or_none()
+
+    async def _enqueue_message(self, telegram_channel_id: int, telegram_message_id: int, message_data: Dict[str, Any]):
+        """
+        Поставить сообщение в очередь отправки (Redis Streams).
+
+        Args:
+            telegram_channel_id: ID Telegram канала в БД
+            telegram_message_id: ID сообщения в Telegram
+            message_data: Данные сообщения
+        """
+        from app.core.send_queue import TASK_MESSAGE
+
+        # Содержимое файла в памяти не передается через очередь - сохраняем его на диск
+        media_bytes = message_data.pop("media_bytes", None)
+        media_filename = message_data.pop("media_filename", None)
+        if media_bytes is not None:
+            from app.utils.media_handler import store_media_bytes
+
+            public_url, local_file_path = await store_media_bytes(media_bytes, media_filename)
+            message_data["local_file_path"] = local_file_path
+            message_data["photo_url" if message_data.get("type") == "photo" else "video_url"] = public_url
+
+        local_file_path = message_data.get("local_file_path")
+        if local_file_path:
+            message_data["shared_media"] = True
+
+        await self._enqueue_partitioned(
+            telegram_channel_id,
+            {
+                "kind": TASK_MESSAGE,
+                "telegram_channel_id": telegram_channel_id,
+                "telegram_message_id": telegram_message_id,
+                "message_data": message_data,
+            },
+            [local_file_path] if local_file_path else [],
+        )
+
+    async def _enqueue_partitioned(self, telegram_channel_id: int, task: Dict[str, Any], media_files: List[str]):
+        """
+        Разложить задачу по партициям очереди отправки (по MAX каналам активных связей).
+
+        Связи, чьи MAX каналы попадают в одну партицию, обрабатываются одной задачей.
+        Медиа-файлы общие для всех задач и удаляются воркером после последней из них.
+
+        Args:
+            telegram_channel_id: ID Telegram канала в БД
+            task: Задача без link_ids
+            media_files: Локальные файлы, используемые задачей
+        """
+        from collections import defaultdict
+        from app.core.send_queue import send_queue
+        from app.models.max_channel import MaxChannel
+        from app.utils.media_handler import delete_media_file
+
+        routed_links = link_routing.get_links(telegram_channel_id)
+        if routed_links is not None:
+            rows = [(link.id, link.max_channel.channel_id) for link in routed_links]
+        else:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(CrosspostingLink.id, MaxChannel.channel_id)
+                    .join(MaxChannel, CrosspostingLink.max_channel_id == MaxChannel.id)
+                    .where(CrosspostingLink.telegram_channel_id == telegram_channel_id)
+                    .where(CrosspostingLink.is_enabled == True)
+                )
+                rows = result.all()
+
+        partitions: Dict[int, List[int]] = defaultdict(list)
+        for link_id, max_channel_id in rows:
+            partitions[send_queue.partition_for(max_channel_id)].append(link_id)
+
+        if not partitions:
+            logger.warning("no_active_links_for_enqueue", telegram_channel_id=telegram_channel_id, kind=task.get("kind"))
+            for file_path in media_files:
+                await delete_media_file(file_path)
+            return
+
+        if media_files:
+            first_message_id = task.get("telegram_message_id") or task["messages"][0]["id"]
+            media_ref = f"{telegram_channel_id}:{first_message_id}"
+            await send_queue.add_media_refs(media_ref, len(partitions))
+            task = {**task, "media_ref": media_ref, "media_files": media_files}
+
+        for partition, link_ids in partitions.items():
+            entry_id = await send_queue.enqueue({**task, "link_ids": link_ids}, partition)
+            logger.info(
+                "send_task_enqueued_for_partition",
+                telegram_channel_id=telegram_channel_id,
+                kind=task.get("kind"),
+                partition=partition,
+                link_ids=link_ids,
+                entry_id=entry_id,
+            )
+
+    async def handle_send_task(self, task: Dict[str, Any]) -> bool:
+        """
+        Выполнить задачу из очереди отправки (вызывается воркером).
+
+        Args:
+            task: Задача из send_queue
+
+        Returns:
+            True если задача обработана успешно, False в противном случае
+        """
+        from app.core.send_queue import TASK_MESSAGE, TASK_MEDIA_GROUP
+
+        kind = task.get("kind")
+        if kind == TASK_MESSAGE:
+            return await self.process_message(
+                telegram_channel_id=task["telegram_channel_id"],
+                telegram_message_id=task["telegram_message_id"],
+                message_data=task["message_data"],
+                link_ids=task.get("link_ids"),
+            )
+        if kind == TASK_MEDIA_GROUP:
+            await self._deliver_media_group(
+                telegram_channel_id=task["telegram_channel_id"],
+                group_messages=task["messages"],
+                photos_data=task["photos_data"],
+                videos_data=task["videos_data"],
+                caption=task.get("caption"),
+                caption_parse_mode=task.get("caption_parse_mode"),
+                link_ids=task.get("link_ids"),
+                delete_files=False,
+            )
+            return True
+
+        logger.error("unknown_send_task_kind", kind=kind)
+        return False
+
     async def _process_media_group(self, messages: List, client=None, link_id: Optional[int] = None) -> None:
         """
         Обработать группу медиа-сообщений (альбом).
@@ -819,17 +1122,11 @@ class MessageProcessor:
             return
 
         # Находим запись канала в БД
-        from app.models.telegram_channel import TelegramChannel
-
-        async with async_session_maker() as session:
-            result = await session.execute(select(TelegramChannel).where(TelegramChannel.channel_id == telegram_chat_id))
-            telegram_channel = result.scalar_one_or_none()
-
-            if not telegram_channel:
-                logger.debug("telegram_channel_not_found_for_media_group", channel_id=telegram_chat_id)
-                return
-
-            telegram_channel_id = telegram_channel.id
+        # При миграции связь временно отключена, поэтому таблицу маршрутизации не используем
+        telegram_channel_id = await self._resolve_telegram_channel(telegram_chat_id, use_routing=link_id is None)
+        if not telegram_channel_id:
+            logger.debug("telegram_channel_not_found_for_media_group", channel_id=telegram_chat_id)
+            return
 
         # Собираем все медиа из группы (фото и видео)
         # ВАЖНО: Нет ограничений на количество медиафайлов - обрабатываются ВСЕ файлы из группы
@@ -871,18 +1168,85 @@ class MessageProcessor:
                 except Exception as e:
                     logger.error("failed_to_download_video_from_group", error=str(e))
 
+        from app.utils.media_handler import get_message_file_size
+
+        group_messages = [
+            {
+                "id": msg.id,
+                "type": "photo" if msg.photo else "video" if msg.video else "text",
+                "file_size": get_message_file_size(msg),
+            }
+            for msg in messages
+        ]
+
+        # В режиме очереди receiver только ставит задачу (миграция всегда выполняется сразу)
+        if settings.send_queue_enabled and not link_id:
+            from app.core.send_queue import TASK_MEDIA_GROUP
+
+            await self._enqueue_partitioned(
+                telegram_channel_id,
+                {
+                    "kind": TASK_MEDIA_GROUP,
+                    "telegram_channel_id": telegram_channel_id,
+                    "messages": group_messages,
+                    "photos_data": photos_data,
+                    "videos_data": videos_data,
+                    "caption": caption,
+                    "caption_parse_mode": caption_parse_mode,
+                },
+                [media["local_file_path"] for media in photos_data + videos_data],
+            )
+            return
+
+        await self._deliver_media_group(
+            telegram_channel_id,
+            group_messages,
+            photos_data,
+            videos_data,
+            caption,
+            caption_parse_mode,
+            link_id=link_id,
+        )
+
+    async def _deliver_media_group(
+        self,
+        telegram_channel_id: int,
+        group_messages: List[Dict[str, Any]],
+        photos_data: List[Dict[str, str]],
+        videos_data: List[Dict[str, str]],
+        caption: Optional[str],
+        caption_parse_mode: Optional[str],
+        link_id: Optional[int] = None,
+        link_ids: Optional[List[int]] = None,
+        delete_files: bool = True,
+    ) -> None:
+        """
+        Создать записи MessageLog и отправить подготовленную медиа-группу в MAX.
+
+        Args:
+            telegram_channel_id: ID Telegram канала в БД
+            group_messages: Сообщения группы [{"id": ..., "type": ...}]
+            photos_data: Скачанные фото группы
+            videos_data: Скачанные видео группы
+            caption: Подпись альбома
+            caption_parse_mode: Режим парсинга подписи
+            link_id: ID связи для миграции (опционально)
+            link_ids: Обработать только эти активные связи (партиция очереди отправки)
+            delete_files: Удалить локальные файлы после отправки
+        """
+        message_ids = [msg["id"] for msg in group_messages]
+
         # КРИТИЧНО: Создаем записи в MessageLog для всех сообщений из группы
         # Это нужно как для миграции (link_id указан), так и для кросспостинга (link_id не указан)
-        from app.models.message_log import MessageLog
-        from app.utils.enums import MessageStatus
-        from datetime import datetime
-        from app.models.crossposting_link import CrosspostingLink
 
         async with async_session_maker() as session:
             # Определяем, для каких связей нужно создать записи
             if link_id:
                 # Для миграции используем только указанную связь
                 links_to_log = [link_id]
+            elif link_routing.ready:
+                # Активные связи из таблицы маршрутизации в памяти
+                links_to_log = [link.id for link in link_routing.get_links(telegram_channel_id, link_ids)]
             else:
                 # Для кросспостинга используем все активные связи
                 result = await session.execute(
@@ -892,47 +1256,25 @@ class MessageProcessor:
                 )
                 # result.scalars().all() уже возвращает список ID (int), не нужно обращаться к .id
                 links_to_log = list(result.scalars().all())
-
-            # Создаем записи в MessageLog для всех сообщений и всех связей
-            for msg in messages:
-                # Определяем тип сообщения
-                msg_type = "photo" if msg.photo else "video" if msg.video else "text"
-
-                for link_id_for_log in links_to_log:
-                    # Проверяем, есть ли уже запись со статусом SUCCESS (дубликат)
-                    existing_log = await session.execute(
-                        select(MessageLog)
-                        .where(MessageLog.telegram_message_id == msg.id)
-                        .where(MessageLog.crossposting_link_id == link_id_for_log)
-                        .where(MessageLog.status == MessageStatus.SUCCESS.value)
-                    )
-                    if existing_log.scalar_one_or_none():
-                        # Уже есть успешная запись - пропускаем
-                        continue
-
-                    # Проверяем, есть ли запись со статусом PENDING или FAILED
-                    existing_pending = await session.execute(
-                        select(MessageLog)
-                        .where(MessageLog.telegram_message_id == msg.id)
-                        .where(MessageLog.crossposting_link_id == link_id_for_log)
-                    )
-                    message_log = existing_pending.scalar_one_or_none()
-
-                    if not message_log:
-                        # Создаем новую запись
-                        message_log = MessageLog(
-                            crossposting_link_id=link_id_for_log,
-                            telegram_message_id=msg.id,
-                            status=MessageStatus.PENDING.value,
-                            message_type=msg_type,
-                            created_at=datetime.utcnow(),
-                        )
-                        session.add(message_log)
-                    else:
-                        # Обновляем существующую запись на PENDING
-                        message_log.status = MessageStatus.PENDING.value
+                if link_ids is not None:
+                    links_to_log = [link_id_for_log for link_id_for_log in links_to_log if link_id_for_log in link_ids]
+
+            # Создаем записи в MessageLog для всех сообщений и всех связей одним запросом
+            # (тип сообщения определен при подготовке группы, записи SUCCESS не изменяются)
+            await self._upsert_pending_logs(
+                session,
+                [
+                    (link_id_for_log, msg["id"], msg["type"], msg.get("file_size"))
+                    for msg in group_messages
+                    for link_id_for_log in links_to_log
+                ],
+            )
             await session.commit()
 
+        # Бюджет повторов альбома общий для всех связей (см. app.utils.deadline). Связи альбома
+        # отправляются последовательно, поэтому срок - send_post_deadline на каждую связь
+        post_deadline = settings.send_post_deadline * max(1, len(links_to_log))
+
         # Определяем тип группы и обрабатываем соответственно
         if photos_data and not videos_data:
             # Только фото - отправляем как альбом фото
@@ -945,39 +1287,43 @@ class MessageProcessor:
         elif photos_data and videos_data:
             # Смешанная группа - отправляем все медиа одним сообщением
             logger.info("mixed_media_group", photos_count=len(photos_data), videos_count=len(videos_data))
-            # КРИТИЧНО: Передаем messages всегда, чтобы можно было обновить MessageLog
-            await self._send_mixed_media_group(
-                telegram_channel_id,
-                photos_data,
-                videos_data,
-                caption,
-                caption_parse_mode,
-                client,
-                link_id=link_id,
-                messages=messages,
-            )
+            # КРИТИЧНО: Передаем message_ids всегда, чтобы можно было обновить MessageLog
+            with deadline_scope(post_deadline, settings.send_retry_budget, "post"):
+                await self._send_mixed_media_group(
+                    telegram_channel_id,
+                    photos_data,
+                    videos_data,
+                    caption,
+                    caption_parse_mode,
+                    link_id=link_id,
+                    message_ids=message_ids,
+                    link_ids=link_ids,
+                    delete_files=delete_files,
+                )
             return
         else:
             logger.warning("no_media_in_media_group")
             return
 
-            logger.info(
-                "processing_media_group", media_type=media_type, media_count=len(media_data), channel_id=telegram_chat_id
-            )
-
-            # Отправляем группу медиа
-        # КРИТИЧНО: Передаем messages всегда, чтобы можно было обновить MessageLog
-        await self._send_media_group(
-            telegram_channel_id,
-            media_data,
-            media_type,
-            caption,
-            caption_parse_mode,
-            client,
-            link_id=link_id,
-            messages=messages,
+        logger.info(
+            "processing_media_group", media_type=media_type, media_count=len(media_data), channel_id=telegram_channel_id
         )
 
+        # Отправляем группу медиа
+        # КРИТИЧНО: Передаем message_ids всегда, чтобы можно было обновить MessageLog
+        with deadline_scope(post_deadline, settings.send_retry_budget, "post"):
+            await self._send_media_group(
+                telegram_channel_id,
+                media_data,
+                media_type,
+                caption,
+                caption_parse_mode,
+                link_id=link_id,
+                message_ids=message_ids,
+                link_ids=link_ids,
+                delete_files=delete_files,
+            )
+
     async def _send_media_group(
         self,
         telegram_channel_id: int,
@@ -985,9 +1331,10 @@ class MessageProcessor:
         media_type: str,
         caption: Optional[str],
         caption_parse_mode: Optional[str],
-        client,
         link_id: Optional[int] = None,
-        messages: Optional[List] = None,
+        message_ids: Optional[List[int]] = None,
+        link_ids: Optional[List[int]] = None,
+        delete_files: bool = True,
     ):
         """
         Отправить группу медиа (фото или видео) в MAX.
@@ -998,8 +1345,10 @@ class MessageProcessor:
             media_type: "photos" или "videos"
             caption: Подпись к группе
             caption_parse_mode: Режим форматирования подписи
-            client: Pyrogram клиент
             link_id: ID связи для миграции (опционально, если указан - используется только эта связь)
+            message_ids: ID сообщений группы в Telegram для обновления MessageLog
+            link_ids: Обработать только эти активные связи (партиция очереди отправки)
+            delete_files: Удалить локальные файлы после отправки во все связи
         """
         from app.utils.media_handler import delete_media_file
 
@@ -1015,6 +1364,9 @@ class MessageProcessor:
                         .options(selectinload(CrosspostingLink.max_channel))
                     )
                     links = result.scalars().all()
+                elif link_routing.ready:
+                    # Активные связи из таблицы маршрутизации в памяти
+                    links = link_routing.get_links(telegram_channel_id, link_ids)
                 else:
                     # Для обычного кросспостинга используем все активные связи
                     result = await session.execute(
@@ -1024,12 +1376,25 @@ class MessageProcessor:
                         .options(selectinload(CrosspostingLink.max_channel))
                     )
                     links = result.scalars().all()
+                    if link_ids is not None:
+                        links = [link for link in links if link.id in link_ids]
 
             if not links:
                 logger.debug("no_active_links_for_media_group", channel_id=telegram_channel_id, link_id=link_id)
                 return
 
+            # Загружаем файлы альбома в MAX один раз и переиспользуем token для всех связей
+            local_paths = [media["local_file_path"] for media in media_data]
+            upload_tokens = None
+            try:
+                upload_tokens = await max_api_circuit_breakers.call(
+                    [ENDPOINT_UPLOADS], self.max_client.upload_files, local_paths, "image" if media_type == "photos" else "video"
+                )
+            except Exception as e:
+                logger.warning("media_group_preupload_failed", media_type=media_type, error=str(e))
+
             # Отправляем в каждый MAX канал
+            log_updates = []
             for link in links:
                 try:
                     max_channel_id = link.max_channel.channel_id
@@ -1037,97 +1402,52 @@ class MessageProcessor:
                     # Используем caption или text как подпись
                     album_caption = caption or ""
 
-                    if media_type == "photos":
-                        # Отправляем альбом фото
-                        local_paths = [media["local_file_path"] for media in media_data]
-                        result = await self.max_client.send_photos(
-                            chat_id=max_channel_id,
-                            local_file_paths=local_paths,
-                            caption=album_caption,
-                            parse_mode=caption_parse_mode,
-                        )
+                    breaker_keys = [max_channel_breaker_key(max_channel_id), ENDPOINT_MESSAGES]
+
+                    # Срок отправки в связь, повторы - из бюджета альбома (см. app.utils.deadline)
+                    with deadline_scope(settings.max_api_timeout, name="link"):
+                        if media_type == "photos":
+                            # Отправляем альбом фото
+                            result = await max_api_circuit_breakers.call(
+                                breaker_keys,
+                                self.max_client.send_photos,
+                                chat_id=max_channel_id,
+                                local_file_paths=local_paths,
+                                caption=album_caption,
+                                parse_mode=caption_parse_mode,
+                                upload_tokens=upload_tokens,
+                            )
 
-                        logger.info("photos_group_sent", max_channel_id=max_channel_id, photos_count=len(local_paths))
-                    elif media_type == "videos":
-                        # Отправляем альбом видео
-                        local_paths = [media["local_file_path"] for media in media_data]
-                        result = await self.max_client.send_videos(
-                            chat_id=max_channel_id,
-                            local_file_paths=local_paths,
-                            caption=album_caption,
-                            parse_mode=caption_parse_mode,
-                        )
+                            logger.info("photos_group_sent", max_channel_id=max_channel_id, photos_count=len(local_paths))
+                        elif media_type == "videos":
+                            # Отправляем альбом видео
+                            result = await max_api_circuit_breakers.call(
+                                breaker_keys,
+                                self.max_client.send_videos,
+                                chat_id=max_channel_id,
+                                local_file_paths=local_paths,
+                                caption=album_caption,
+                                parse_mode=caption_parse_mode,
+                                upload_tokens=upload_tokens,
+                            )
 
-                        logger.info("videos_group_sent", max_channel_id=max_channel_id, videos_count=len(local_paths))
+                            logger.info("videos_group_sent", max_channel_id=max_channel_id, videos_count=len(local_paths))
 
-                    # КРИТИЧНО: Обновляем MessageLog для всех сообщений из группы
+                    # КРИТИЧНО: Запоминаем обновление MessageLog для всех сообщений из группы
                     # Это нужно как для миграции (link_id указан), так и для кросспостинга (link_id не указан)
-                    if result and messages:
-                        from app.models.message_log import MessageLog
-                        from app.utils.enums import MessageStatus
-                        from datetime import datetime
-                        from sqlalchemy import update
-
+                    if result and message_ids:
                         # Извлекаем message_id из результата
-                        max_message_id = None
-                        if isinstance(result, dict):
-                            max_message_id = result.get("message_id")
-
-                        # Обновляем все записи для сообщений из группы
-                        async with async_session_maker() as session_for_update:
-                            for msg in messages:
-                                if link_id:
-                                    # Для миграции обновляем только указанную связь
-                                    await session_for_update.execute(
-                                        update(MessageLog)
-                                        .where(MessageLog.telegram_message_id == msg.id)
-                                        .where(MessageLog.crossposting_link_id == link_id)
-                                        .values(
-                                            max_message_id=str(max_message_id) if max_message_id else None,
-                                            status=MessageStatus.SUCCESS.value,
-                                            sent_at=datetime.utcnow(),
-                                        )
-                                    )
-                                else:
-                                    # Для кросспостинга обновляем все активные связи для этого сообщения
-                                    await session_for_update.execute(
-                                        update(MessageLog)
-                                        .where(MessageLog.telegram_message_id == msg.id)
-                                        .where(MessageLog.crossposting_link_id == link.id)
-                                        .values(
-                                            max_message_id=str(max_message_id) if max_message_id else None,
-                                            status=MessageStatus.SUCCESS.value,
-                                            sent_at=datetime.utcnow(),
-                                        )
-                                    )
-                            await session_for_update.commit()
-
-                    # Удаляем файлы после успешной отправки (ДО выхода из try блока)
-                    for media_item in media_data:
-                        if media_item.get("local_file_path"):
-                            try:
-                                await delete_media_file(media_item["local_file_path"])
-                            except Exception as delete_error:
-                                # Логируем ошибку удаления, но не прерываем процесс
-                                logger.warning(
-                                    "failed_to_delete_media_in_group",
-                                    file_path=media_item["local_file_path"],
-                                    error=str(delete_error),
-                                )
+                        max_message_id = result.get("message_id") if isinstance(result, dict) else None
+                        log_updates.extend(
+                            {
+                                "link_id": link.id,
+                                "telegram_message_id": telegram_message_id,
+                                "max_message_id": str(max_message_id) if max_message_id else None,
+                            }
+                            for telegram_message_id in message_ids
+                        )
 
                 except Exception as e:
-                    # Удаляем файлы даже при ошибке отправки
-                    for media_item in media_data:
-                        if media_item.get("local_file_path"):
-                            try:
-                                await delete_media_file(media_item["local_file_path"])
-                                logger.info("media_file_deleted_after_error", file_path=media_item["local_file_path"])
-                            except Exception as delete_error:
-                                logger.warning(
-                                    "failed_to_delete_media_after_error",
-                                    file_path=media_item["local_file_path"],
-                                    error=str(delete_error),
-                                )
                     logger.error(
                         "failed_to_send_media_group",
                         max_channel_id=link.max_channel.channel_id,
@@ -1135,8 +1455,24 @@ class MessageProcessor:
                         error=str(e),
                     )
 
+            # Обновляем MessageLog всех отправленных связей (пачкой, в фоне)
+            await message_log_writer.mark_success(log_updates)
+
         except Exception as e:
             logger.error("media_group_send_error", media_type=media_type, error=str(e), exc_info=True)
+        finally:
+            # Удаляем файлы только после отправки во все связи
+            for media_item in media_data if delete_files else []:
+                if media_item.get("local_file_path"):
+                    try:
+                        await delete_media_file(media_item["local_file_path"])
+                    except Exception as delete_error:
+                        # Логируем ошибку удаления, но не прерываем процесс
+                        logger.warning(
+                            "failed_to_delete_media_in_group",
+                            file_path=media_item["local_file_path"],
+                            error=str(delete_error),
+                        )
 
     async def _send_mixed_media_group(
         self,
@@ -1145,9 +1481,10 @@ class MessageProcessor:
         videos_data: List[Dict[str, str]],
         caption: Optional[str],
         caption_parse_mode: Optional[str],
-        client,
         link_id: Optional[int] = None,
-        messages: Optional[List] = None,
+        message_ids: Optional[List[int]] = None,
+        link_ids: Optional[List[int]] = None,
+        delete_files: bool = True,
     ):
         """
         Отправить смешанную группу медиа (фото + видео) одним сообщением в MAX.
@@ -1160,8 +1497,10 @@ class MessageProcessor:
             videos_data: Список словарей с данными видео (без ограничений по количеству)
             caption: Подпись к группе
             caption_parse_mode: Режим форматирования подписи
-            client: Pyrogram клиент
             link_id: ID связи для миграции (опционально, если указан - используется только эта связь)
+            message_ids: ID сообщений группы в Telegram для обновления MessageLog
+            link_ids: Обработать только эти активные связи (партиция очереди отправки)
+            delete_files: Удалить локальные файлы после отправки во все связи
         """
         from app.utils.media_handler import delete_media_file
 
@@ -1177,6 +1516,9 @@ class MessageProcessor:
                         .options(selectinload(CrosspostingLink.max_channel))
                     )
                     links = result.scalars().all()
+                elif link_routing.ready:
+                    # Активные связи из таблицы маршрутизации в памяти
+                    links = link_routing.get_links(telegram_channel_id, link_ids)
                 else:
                     # Для обычного кросспостинга используем все активные связи
                     result = await session.execute(
@@ -1186,12 +1528,50 @@ class MessageProcessor:
                         .options(selectinload(CrosspostingLink.max_channel))
                     )
                     links = result.scalars().all()
+                    if link_ids is not None:
+                        links = [link for link in links if link.id in link_ids]
 
             if not links:
                 logger.debug("no_active_links_for_mixed_media_group", channel_id=telegram_channel_id, link_id=link_id)
                 return
 
+            # Загружаем все медиа один раз и получаем токены (переиспользуются для всех связей)
+            attachments = []
+
+            # Загружаем фото
+            for photo_data in photos_data:
+                local_path = photo_data.get("local_file_path")
+                if local_path:
+                    try:
+                        token = await max_api_circuit_breakers.call(
+                            [ENDPOINT_UPLOADS], self.max_client.upload_file_cached, local_path, "image"
+                        )
+                        attachments.append({"type": "image", "payload": {"token": token}})
+                        await asyncio.sleep(settings.media_upload_delay_photo)
+                    except Exception as e:
+                        logger.error("failed_to_upload_photo_in_mixed_group", error=str(e))
+
+            # Загружаем видео
+            for video_data in videos_data:
+                local_path = video_data.get("local_file_path")
+                if local_path:
+                    try:
+                        token = await max_api_circuit_breakers.call(
+                            [ENDPOINT_UPLOADS], self.max_client.upload_file_cached, local_path, "video"
+                        )
+                        attachments.append({"type": "video", "payload": {"token": token}})
+                        await asyncio.sleep(settings.media_upload_delay_video)
+                    except Exception as e:
+                        logger.error("failed_to_upload_video_in_mixed_group", error=str(e))
+
+            if not attachments:
+                logger.warning("no_attachments_in_mixed_group")
+                return
+
+            attachment_tokens = [attachment["payload"]["token"] for attachment in attachments]
+
             # Отправляем в каждый MAX канал
+            log_updates = []
             for link in links:
                 try:
                     max_channel_id = link.max_channel.channel_id
@@ -1199,217 +1579,71 @@ class MessageProcessor:
                     # Используем caption или text как подпись
                     album_caption = caption or ""
 
-                    # Загружаем все медиа и получаем токены
-                    attachments = []
-
-                    # Загружаем фото
-                    for photo_data in photos_data:
-                        local_path = photo_data.get("local_file_path")
-                        if local_path:
-                            try:
-                                token = await self.max_client.upload_file(local_path, "image")
-                                attachments.append({"type": "image", "payload": {"token": token}})
-                                await asyncio.sleep(settings.media_upload_delay_photo)
-                            except Exception as e:
-                                logger.error("failed_to_upload_photo_in_mixed_group", error=str(e))
-
-                    # Загружаем видео
-                    for video_data in videos_data:
-                        local_path = video_data.get("local_file_path")
-                        if local_path:
-                            try:
-                                token = await self.max_client.upload_file(local_path, "video")
-                                attachments.append({"type": "video", "payload": {"token": token}})
-                                await asyncio.sleep(settings.media_upload_delay_video)
-                            except Exception as e:
-                                logger.error("failed_to_upload_video_in_mixed_group", error=str(e))
-
-                    if not attachments:
-                        logger.warning("no_attachments_in_mixed_group")
-                        continue
-
-                    # Адаптивная задержка обработки
-                    processing_delay = min(settings.media_processing_delay_video * (1 + len(attachments) * 0.1), 10.0)
-                    await asyncio.sleep(processing_delay)
-
                     # Формируем запрос с массивом attachments (фото + видео)
                     text = album_caption or ""
                     data = {"text": text, "attachments": attachments}
                     if caption_parse_mode:
                         data["format"] = caption_parse_mode
 
-                    # Преобразуем chat_id
-                    try:
-                        if isinstance(max_channel_id, str) and (
-                            max_channel_id.lstrip("-").isdigit() or max_channel_id.lstrip("-").replace(".", "").isdigit()
-                        ):
-                            chat_id_value = int(float(max_channel_id))
-                        elif isinstance(max_channel_id, (int, float)):
-                            chat_id_value = int(max_channel_id)
-                        else:
-                            chat_id_value = max_channel_id
-                    except (ValueError, TypeError):
-                        chat_id_value = max_channel_id
-
-                    # Отправляем смешанную группу
-                    from app.utils.rate_limiter import max_api_limiter
-                    from app.utils.retry import retry_with_backoff
-
                     await max_api_limiter.wait_if_needed(f"max_api_{max_channel_id}")
 
-                    max_retries = 5
-                    retry_delay = 3
-                    result = None
-
-                    for attempt in range(max_retries):
-                        try:
-                            response = await retry_with_backoff(
-                                self.max_client.client.post, f"/messages?chat_id={chat_id_value}", json=data
-                            )
-                            response.raise_for_status()
-                            result = response.json()
-
-                            # Проверяем на ошибку attachment.not.ready
-                            if "error" in result or "errors" in result:
-                                error_msg = str(result.get("error", result.get("errors", "")))
-                                if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                    if attempt < max_retries - 1:
-                                        logger.warning(
-                                            f"mixed_group_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                        )
-                                        await asyncio.sleep(retry_delay)
-                                        retry_delay *= 2
-                                        continue
-
-                            logger.info(
-                                "mixed_media_group_sent",
-                                max_channel_id=max_channel_id,
-                                photos_count=len(photos_data),
-                                videos_count=len(videos_data),
-                                total_attachments=len(attachments),
-                            )
-                            break
-                        except httpx.HTTPStatusError as e:
-                            if e.response:
-                                try:
-                                    error_data = e.response.json()
-                                    error_msg = str(error_data)
-                                    if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                        if attempt < max_retries - 1:
-                                            logger.warning(
-                                                f"mixed_group_attachment_not_ready_retry",
-                                                attempt=attempt + 1,
-                                                delay=retry_delay,
-                                            )
-                                            await asyncio.sleep(retry_delay)
-                                            retry_delay *= 2
-                                            continue
-                                except:
-                                    pass
-                            if attempt == max_retries - 1:
-                                raise
-                        except Exception as e:
-                            if attempt == max_retries - 1:
-                                raise
-                            logger.warning(f"mixed_group_retry_after_error", attempt=attempt + 1, error=str(e))
-                            await asyncio.sleep(retry_delay)
-                            retry_delay *= 2
+                    # Первая попытка сразу, повторные - по расписанию готовности вложений
+                    # (в пределах срока отправки в связь и бюджета повторов альбома)
+                    with deadline_scope(settings.max_api_timeout, name="link"):
+                        result = await max_api_circuit_breakers.call(
+                            [max_channel_breaker_key(max_channel_id), ENDPOINT_MESSAGES],
+                            self.max_client.send_with_attachments,
+                            max_channel_id,
+                            data,
+                            attachment_tokens,
+                            "mixed",
+                            "mixed_group",
+                        )
+                    logger.info(
+                        "mixed_media_group_sent",
+                        max_channel_id=max_channel_id,
+                        photos_count=len(photos_data),
+                        videos_count=len(videos_data),
+                        total_attachments=len(attachments),
+                    )
 
-                    # КРИТИЧНО: Обновляем MessageLog для всех сообщений из группы
+                    # КРИТИЧНО: Запоминаем обновление MessageLog для всех сообщений из группы
                     # Это нужно как для миграции (link_id указан), так и для кросспостинга (link_id не указан)
-                    if result and messages:
-                        from app.models.message_log import MessageLog
-                        from app.utils.enums import MessageStatus
-                        from datetime import datetime
-                        from sqlalchemy import update
-
+                    if result and message_ids:
                         # Извлекаем message_id из результата
-                        max_message_id = None
-                        if isinstance(result, dict):
-                            max_message_id = result.get("message_id")
-
-                        # Обновляем все записи для сообщений из группы
-                        async with async_session_maker() as session_for_update:
-                            for msg in messages:
-                                if link_id:
-                                    # Для миграции обновляем только указанную связь
-                                    await session_for_update.execute(
-                                        update(MessageLog)
-                                        .where(MessageLog.telegram_message_id == msg.id)
-                                        .where(MessageLog.crossposting_link_id == link_id)
-                                        .values(
-                                            max_message_id=str(max_message_id) if max_message_id else None,
-                                            status=MessageStatus.SUCCESS.value,
-                                            sent_at=datetime.utcnow(),
-                                        )
-                                    )
-                                else:
-                                    # Для кросспостинга обновляем все активные связи для этого сообщения
-                                    await session_for_update.execute(
-                                        update(MessageLog)
-                                        .where(MessageLog.telegram_message_id == msg.id)
-                                        .where(MessageLog.crossposting_link_id == link.id)
-                                        .values(
-                                            max_message_id=str(max_message_id) if max_message_id else None,
-                                            status=MessageStatus.SUCCESS.value,
-                                            sent_at=datetime.utcnow(),
-                                        )
-                                    )
-                                    await session_for_update.commit()
-
-                    # Удаляем файлы после успешной отправки (ДО выхода из try блока)
-                    for photo_data in photos_data:
-                        if photo_data.get("local_file_path"):
-                            try:
-                                await delete_media_file(photo_data["local_file_path"])
-                            except Exception as delete_error:
-                                # Логируем ошибку удаления, но не прерываем процесс
-                                logger.warning(
-                                    "failed_to_delete_photo_in_mixed_group",
-                                    file_path=photo_data["local_file_path"],
-                                    error=str(delete_error),
-                                )
-                    for video_data in videos_data:
-                        if video_data.get("local_file_path"):
-                            try:
-                                await delete_media_file(video_data["local_file_path"])
-                            except Exception as delete_error:
-                                # Логируем ошибку удаления, но не прерываем процесс
-                                logger.warning(
-                                    "failed_to_delete_video_in_mixed_group",
-                                    file_path=video_data["local_file_path"],
-                                    error=str(delete_error),
-                                )
+                        max_message_id = result.get("message_id") if isinstance(result, dict) else None
+                        log_updates.extend(
+                            {
+                                "link_id": link.id,
+                                "telegram_message_id": telegram_message_id,
+                                "max_message_id": str(max_message_id) if max_message_id else None,
+                            }
+                            for telegram_message_id in message_ids
+                        )
 
                 except Exception as e:
-                    # Удаляем файлы даже при ошибке отправки
-                    for photo_data in photos_data:
-                        if photo_data.get("local_file_path"):
-                            try:
-                                await delete_media_file(photo_data["local_file_path"])
-                                logger.info("photo_file_deleted_after_error", file_path=photo_data["local_file_path"])
-                            except Exception as delete_error:
-                                logger.warning(
-                                    "failed_to_delete_photo_after_error",
-                                    file_path=photo_data["local_file_path"],
-                                    error=str(delete_error),
-                                )
-                    for video_data in videos_data:
-                        if video_data.get("local_file_path"):
-                            try:
-                                await delete_media_file(video_data["local_file_path"])
-                                logger.info("video_file_deleted_after_error", file_path=video_data["local_file_path"])
-                            except Exception as delete_error:
-                                logger.warning(
-                                    "failed_to_delete_video_after_error",
-                                    file_path=video_data["local_file_path"],
-                                    error=str(delete_error),
-                                )
                     logger.error("failed_to_send_mixed_media_group", max_channel_id=link.max_channel.channel_id, error=str(e))
 
+            # Обновляем MessageLog всех отправленных связей (пачкой, в фоне)
+            await message_log_writer.mark_success(log_updates)
+
         except Exception as e:
             logger.error("mixed_media_group_send_error", error=str(e), exc_info=True)
+        finally:
+            # Удаляем файлы только после отправки во все связи
+            for media_item in photos_data + videos_data if delete_files else []:
+                if media_item.get("local_file_path"):
+                    try:
+                        await delete_media_file(media_item["local_file_path"])
+                    except Exception as delete_error:
+                        # Логируем ошибку удаления, но не прерываем процесс
+                        logger.warning(
+                            "failed_to_delete_media_in_mixed_group",
+                            file_path=media_item["local_file_path"],
+                            error=str(delete_error),
+                        )
 
     async def close(self):
-        """Закрыть клиенты."""
+        """Обработать собираемые медиа-группы и закрыть клиенты."""
+        await self.media_group_handler.close()
         await self.max_client.close()
@@ -0,0 +1,205 @@
+"""Агрегированная статистика отправок (message_stats), обновляемая вместе с логами."""
+
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.crossposting_link import CrosspostingLink
+from app.models.message_stat import MessageStat
+from app.utils.enums import MessageStatus
+from app.utils.logger import get_logger
+from config.database import async_session_maker
+
+logger = get_logger(__name__)
+
+PERIOD_HOUR = "hour"
+PERIOD_DAY = "day"
+
+_COUNTERS = ("success_count", "failed_count", "pending_count", "processing_time_ms", "bytes_sent")
+
+# Изменение статуса лога: (ID связи, created_at лога, старый статус или None, новый статус,
+# время обработки в мс, размер файла в байтах, время обработки в мс до изменения)
+StatusChange = Tuple[int, datetime, Optional[str], str, Optional[int], Optional[int], Optional[int]]
+
+
+def bucket_starts(created_at: datetime) -> List[Tuple[str, datetime]]:
+    """Интервалы (час и день), в которые попадает лог."""
+    hour = created_at.replace(minute=0, second=0, microsecond=0)
+    return [(PERIOD_HOUR, hour), (PERIOD_DAY, hour.replace(hour=0))]
+
+
+async def apply_status_changes(session: AsyncSession, changes: Iterable[StatusChange]) -> None:
+    """
+    Учесть изменения статусов логов в message_stats.
+
+    Выполняется в транзакции, изменившей логи: все изменения сворачиваются
+    в дельты по (связь, интервал) и записываются одним INSERT ... ON CONFLICT.
+    processing_time_ms, как и в rebuild_message_stats, содержит сумму текущих
+    значений логов не в статусе PENDING: при выходе лога из такого статуса
+    (например, FAILED -> PENDING при повторной доставке) его прежнее время вычитается.
+
+    Args:
+        session: Сессия БД (транзакция записи логов)
+        changes: Изменения статусов
+    """
+    deltas: Dict[Tuple[int, str, datetime], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+    pending = MessageStatus.PENDING.value
+    for link_id, created_at, old_status, new_status, processing_time, file_size, previous_time in changes:
+        added_time = processing_time or 0 if new_status != pending else 0
+        removed_time = previous_time or 0 if old_status and old_status != pending else 0
+        time_delta = added_time - removed_time
+        if old_status == new_status and not time_delta:
+            continue
+        for period, bucket_start in bucket_starts(created_at):
+            delta = deltas[(link_id, period, bucket_start)]
+            if old_status != new_status:
+                if old_status:
+                    delta[f"{old_status}_count"] -= 1
+                delta[f"{new_status}_count"] += 1
+                if new_status == MessageStatus.SUCCESS.value:
+                    delta["bytes_sent"] += file_size or 0
+            delta["processing_time_ms"] += time_delta
+
+    if not deltas:
+        return
+
+    # Одинаковый порядок строк во всех транзакциях исключает взаимные блокировки
+    stmt = pg_insert(MessageStat).values(
+        [
+            {"crossposting_link_id": link_id, "period": period, "bucket_start": bucket_start, **delta}
+            for (link_id, period, bucket_start), delta in sorted(deltas.items())
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MessageStat.crossposting_link_id, MessageStat.period, MessageStat.bucket_start],
+        set_={name: getattr(MessageStat, name) + getattr(stmt.excluded, name) for name in _COUNTERS},
+    )
+    await session.execute(stmt)
+
+
+async def get_link_totals(session: AsyncSession, link_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Получить статистику отправок связей за все время.
+
+    Args:
+        session: Сессия БД
+        link_ids: ID связей
+
+    Returns:
+        Словарь {ID связи: {success, failed, pending}} (связи без отправок отсутствуют)
+    """
+    if not link_ids:
+        return {}
+    result = await session.execute(
+        select(
+            MessageStat.crossposting_link_id,
+            func.sum(MessageStat.success_count),
+            func.sum(MessageStat.failed_count),
+            func.sum(MessageStat.pending_count),
+        )
+        .where(MessageStat.crossposting_link_id.in_(link_ids))
+        .where(MessageStat.period == PERIOD_DAY)
+        .group_by(MessageStat.crossposting_link_id)
+    )
+    return {
+        link_id: {"success": int(success or 0), "failed": int(failed or 0), "pending": int(pending or 0)}
+        for link_id, success, failed, pending in result.all()
+    }
+
+
+async def get_user_totals(session: AsyncSession, user_id: int) -> Dict[str, int]:
+    """
+    Получить статистику отправок всех связей пользователя за все время.
+
+    Args:
+        session: Сессия БД
+        user_id: ID пользователя в БД
+
+    Returns:
+        Словарь {success, failed, pending}
+    """
+    result = await session.execute(
+        select(
+            func.sum(MessageStat.success_count),
+            func.sum(MessageStat.failed_count),
+            func.sum(MessageStat.pending_count),
+        )
+        .join(CrosspostingLink, CrosspostingLink.id == MessageStat.crossposting_link_id)
+        .where(CrosspostingLink.user_id == user_id)
+        .where(MessageStat.period == PERIOD_DAY)
+    )
+    success, failed, pending = result.one()
+    return {"success": int(success or 0), "failed": int(failed or 0), "pending": int(pending or 0)}
+
+
+async def _rebuild(session: AsyncSession) -> None:
+    """Создать message_stats (если нет) и пересчитать ее по messages_log в транзакции сессии."""
+    connection = await session.connection()
+    await connection.run_sync(MessageStat.__table__.create, checkfirst=True)
+    await session.execute(text("LOCK TABLE message_stats IN EXCLUSIVE MODE"))
+    await session.execute(text("DELETE FROM message_stats"))
+    for period in (PERIOD_HOUR, PERIOD_DAY):
+        await session.execute(
+            text(
+                "INSERT INTO message_stats (crossposting_link_id, period, bucket_start, success_count, "
+                "failed_count, pending_count, processing_time_ms, bytes_sent) "
+                f"SELECT crossposting_link_id, '{period}', date_trunc('{period}', created_at), "
+                "count(*) FILTER (WHERE status = 'success'), "
+                "count(*) FILTER (WHERE status = 'failed'), "
+                "count(*) FILTER (WHERE status = 'pending'), "
+                "coalesce(sum(processing_time_ms) FILTER (WHERE status <> 'pending'), 0), "
+                "coalesce(sum(file_size) FILTER (WHERE status = 'success'), 0) "
+                "FROM messages_log GROUP BY 1, 3"
+            )
+        )
+
+
+async def rebuild_message_stats() -> None:
+    """
+    Создать message_stats (если нет) и пересчитать ее по messages_log.
+
+    Пересчет выполняется одной транзакцией. Таблица создается и заполняется
+    автоматически при старте процессов (ensure_message_stats), поэтому ручной
+    запуск нужен только для исправления расхождений.
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            await _rebuild(session)
+    logger.info("message_stats_rebuilt")
+
+
+async def ensure_message_stats() -> bool:
+    """
+    Создать и заполнить message_stats, если ее нет (вызывается при старте процессов).
+
+    Изменения статусов логов записываются в message_stats в транзакции записи
+    логов, поэтому таблица должна существовать до первой отправки.
+
+    Returns:
+        True если таблица создана
+    """
+    async with async_session_maker() as session:
+        async with session.begin():
+            # Процессы стартуют одновременно - создание выполняет один из них
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": MessageStat.__tablename__}
+            )
+            exists = await session.scalar(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": MessageStat.__tablename__}
+            )
+            if exists:
+                return False
+            await _rebuild(session)
+    logger.info("message_stats_created")
+    return True
+
+
+if __name__ == "__main__":
+    # Разовое заполнение статистики: python -m app.core.message_stats
+    from app.utils.logger import setup_logging
+
+    setup_logging()
+    asyncio.run(rebuild_message_stats())
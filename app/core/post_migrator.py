@@ -13,6 +13,7 @@ from pyrogram.types import Message as PyrogramMessage
 from app.models.crossposting_link import CrosspostingLink
 from app.models.message_log import MessageLog
 from app.core.message_processor import MessageProcessor
+from app.core.link_routing import notify_links_changed
 from app.core.migration_queue import migration_queue
 from app.utils.logger import get_logger
 from app.utils.enums import MessageStatus
@@ -41,18 +42,40 @@ class PostMigrator:
         self.semaphore = asyncio.Semaphore(settings.migration_parallel_posts)
 
     async def migrate_link_posts(
-        self, link_id: int, progress_callback: Optional[Callable[[int, int, int, int], None]] = None
+        self,
+        link_id: int,
+        progress_callback: Optional[Callable[[int, int, int, int], None]] = None,
+        max_posts: Optional[int] = None,
+        since_date: Optional[datetime] = None,
+        until_date: Optional[datetime] = None,
+        min_message_id: Optional[int] = None,
+        max_message_id: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
-        Перенести все старые посты для связи.
+        Перенести старые посты для связи.
+
+        Окно переноса задается параметрами (по умолчанию берутся из настроек migration_*):
+        последние N постов, диапазон дат и/или диапазон ID сообщений.
 
         Args:
             link_id: ID связи для миграции
             progress_callback: Функция для обновления прогресса (processed, success, skipped, failed)
+            max_posts: Максимальное количество постов (медиа-группа = 1 пост, 0 = без ограничения)
+            since_date: Переносить посты не старше этой даты
+            until_date: Переносить посты не новее этой даты
+            min_message_id: Минимальный ID сообщения (включительно)
+            max_message_id: Максимальный ID сообщения (включительно)
 
         Returns:
             Словарь со статистикой миграции
         """
+        if max_posts is None:
+            max_posts = settings.migration_max_posts
+        since_date = since_date or settings.migration_since_date
+        until_date = until_date or settings.migration_until_date
+        min_message_id = min_message_id or settings.migration_min_message_id
+        max_message_id = max_message_id or settings.migration_max_message_id
+
         start_time = datetime.utcnow()
         stats = {
             "total": 0,
@@ -96,6 +119,7 @@ class PostMigrator:
 
                     cache_key = f"channel_links:{telegram_channel_db_id}"
                     await delete_cache(cache_key)
+                    await notify_links_changed(telegram_channel_db_id)
                     logger.info(
                         "crossposting_paused_for_migration", link_id=link_id, telegram_channel_db_id=telegram_channel_db_id
                     )
@@ -130,9 +154,16 @@ class PostMigrator:
                 logger.error("chat_identifier_not_defined", link_id=link_id)
                 return stats
 
-            # Получаем историю постов потоком
+            # Получаем историю постов потоком (чтение останавливается, как только набрано окно постов)
             all_messages = []
-            async for message in self._get_chat_history_stream(chat_identifier):
+            async for message in self._get_chat_history_stream(
+                chat_identifier,
+                max_posts=max_posts,
+                since_date=since_date,
+                until_date=until_date,
+                min_message_id=min_message_id,
+                max_message_id=max_message_id,
+            ):
                 all_messages.append(message)
 
             logger.info("chat_history_loaded", total_messages=len(all_messages))
@@ -177,16 +208,15 @@ class PostMigrator:
             # КРИТИЧНО: Сортируем все элементы по дате (от старых к новым) для сохранения порядка
             items_to_process_sorted = sorted(items_to_process, key=lambda item: item["date"])
 
-            # ОГРАНИЧЕНИЕ: Берем только последние 30 постов
-            MAX_POSTS_TO_MIGRATE = 30
-            if len(items_to_process_sorted) > MAX_POSTS_TO_MIGRATE:
-                items_to_process_sorted = items_to_process_sorted[-MAX_POSTS_TO_MIGRATE:]
+            # Страховка: окно постов уже ограничено при чтении истории
+            if max_posts and len(items_to_process_sorted) > max_posts:
+                items_to_process_sorted = items_to_process_sorted[-max_posts:]
                 logger.info(
                     "migration_limited_to_last_posts",
                     link_id=link_id,
                     original_count=len(items_to_process),
                     limited_count=len(items_to_process_sorted),
-                    max_posts=MAX_POSTS_TO_MIGRATE,
+                    max_posts=max_posts,
                 )
 
             logger.info(
@@ -578,11 +608,12 @@ class PostMigrator:
                                 link.is_enabled = True
                                 await session.commit()
                                 logger.info("link_enabled_after_migration", link_id=link_id, is_enabled=link.is_enabled)
+                                await notify_links_changed(link.telegram_channel_id)
 
                                 # ВАЖНО: Пересоздаем кэш после коммита, используя новую сессию для гарантии актуальности данных
                                 # В process_message используется telegram_channel_db_id (ID записи в БД) как ключ кэша
                                 if telegram_channel_db_id:
-                                    from app.utils.cache import set_cache, delete_cache, get_cache
+                                    from app.utils.cache import set_cache, delete_cache
 
                                     cache_key = f"channel_links:{telegram_channel_db_id}"
 
@@ -597,22 +628,14 @@ class PostMigrator:
 
                                         if active_links:
                                             link_ids = [link.id for link in active_links]
-                                            # ВАЖНО: Сначала очищаем старый кэш (если есть), затем создаем новый
-                                            # Это гарантирует, что кэш всегда актуален
-                                            await delete_cache(cache_key)
-                                            # Создаем новый кэш с актуальными данными
+                                            # Перезаписываем кэш актуальными данными (SETEX заменяет старое значение)
                                             await set_cache(cache_key, link_ids)
-                                            # Проверяем, что кэш действительно создан и содержит правильные данные
-                                            verify_cache = await get_cache(cache_key)
                                             logger.info(
                                                 "cache_recreated_after_migration",
                                                 cache_key=cache_key,
                                                 link_ids=link_ids,
                                                 link_id=link_id,
                                                 active_links_count=len(active_links),
-                                                cache_verified=verify_cache is not None,
-                                                cached_link_ids=verify_cache,
-                                                cache_match=verify_cache == link_ids,
                                             )
                                         else:
                                             # Если активных связей нет, очищаем кэш
@@ -632,24 +655,6 @@ class PostMigrator:
                                     cache_key=cache_key,
                                     cache_ready=True,
                                 )
-                                # ВАЖНО: Убеждаемся, что MTProto receiver продолжает работать
-                                # Проверяем, что кэш действительно создан и готов к использованию
-                                final_cache_check = await get_cache(cache_key)
-                                if final_cache_check:
-                                    logger.info(
-                                        "cache_verified_after_migration",
-                                        link_id=link_id,
-                                        cache_key=cache_key,
-                                        cached_link_ids=final_cache_check,
-                                        mtproto_receiver_should_work=True,
-                                    )
-                                else:
-                                    logger.error(
-                                        "cache_not_found_after_migration",
-                                        link_id=link_id,
-                                        cache_key=cache_key,
-                                        mtproto_receiver_may_not_work=True,
-                                    )
                                 # ВАЖНО: Перезапускаем MTProto receiver после миграции
                                 # чтобы убедиться, что он продолжает получать сообщения
                                 try:
@@ -714,6 +719,7 @@ class PostMigrator:
                                     link.is_enabled = True
                                     await emergency_session.commit()
                                     logger.info("link_enabled_in_emergency_finally", link_id=link_id)
+                                    await notify_links_changed(link.telegram_channel_id)
                         except (DatabaseError, ConnectionError) as emergency_error:
                             logger.error(
                                 "failed_to_enable_link_in_emergency_db",
@@ -745,6 +751,7 @@ class PostMigrator:
                             logger.warning(
                                 "link_enabled_in_finally_unknown_state", link_id=link_id, reason="link_was_enabled_is_none"
                             )
+                            await notify_links_changed(link.telegram_channel_id)
                 except Exception as e:
                     logger.error("failed_to_enable_link_when_unknown_state", link_id=link_id, error=str(e))
                     logger.error("failed_to_resume_crossposting_after_migration", link_id=link_id, error=str(e), exc_info=True)
@@ -766,12 +773,29 @@ class PostMigrator:
 
         return stats
 
-    async def _get_chat_history_stream(self, chat_identifier: str):
+    async def _get_chat_history_stream(
+        self,
+        chat_identifier: str,
+        max_posts: int = 0,
+        since_date: Optional[datetime] = None,
+        until_date: Optional[datetime] = None,
+        min_message_id: Optional[int] = None,
+        max_message_id: Optional[int] = None,
+    ):
         """
-        Получить историю постов потоком (async generator).
+        Получить историю постов потоком (async generator) в заданном окне.
+
+        История читается от новых к старым и чтение прекращается, как только набрано
+        max_posts постов (медиа-группа считается одним постом) или достигнута нижняя
+        граница окна по дате/ID. В памяти хранится только само окно.
 
         Args:
             chat_identifier: Идентификатор чата (username или ID)
+            max_posts: Максимальное количество постов (0 = без ограничения)
+            since_date: Нижняя граница по дате (включительно)
+            until_date: Верхняя граница по дате (включительно)
+            min_message_id: Нижняя граница по ID сообщения (включительно)
+            max_message_id: Верхняя граница по ID сообщения (включительно)
 
         Yields:
             Сообщения из истории (от старых к новым)
@@ -781,13 +805,48 @@ class PostMigrator:
             chat = await self.pyrogram_client.get_chat(chat_identifier)
             chat_id = chat.id
 
-            # Получаем историю потоком
+            # Начинаем сразу с верхней границы окна, чтобы не листать более новые сообщения
+            history_kwargs: Dict[str, Any] = {}
+            if max_message_id:
+                history_kwargs["offset_id"] = max_message_id + 1
+            if until_date:
+                history_kwargs["offset_date"] = until_date
+
             messages = []
-            async for message in self.pyrogram_client.get_chat_history(chat_id, limit=None):
+            posts_count = 0
+            current_group_id = None
+
+            async for message in self.pyrogram_client.get_chat_history(chat_id, **history_kwargs):
+                if max_message_id and message.id > max_message_id:
+                    continue
+                if until_date and message.date and message.date > until_date:
+                    continue
+                if min_message_id and message.id < min_message_id:
+                    break
+                if since_date and message.date and message.date < since_date:
+                    break
+
+                media_group_id = getattr(message, "media_group_id", None)
+                # Сообщения одной медиа-группы идут в истории подряд и образуют один пост
+                starts_new_post = not media_group_id or media_group_id != current_group_id
+                if starts_new_post:
+                    if max_posts and posts_count >= max_posts:
+                        break
+                    posts_count += 1
+                current_group_id = media_group_id
+
                 messages.append(message)
 
+            logger.info(
+                "chat_history_window_fetched",
+                chat_id=chat_id,
+                messages=len(messages),
+                posts=posts_count,
+                max_posts=max_posts,
+            )
+
             # Сортируем от старых к новым (по дате)
-            messages.sort(key=lambda m: m.date if m.date else datetime.min)
+            messages.sort(key=lambda m: (m.date if m.date else datetime.min, m.id))
 
             # Возвращаем от старых к новым
             for message in messages:
@@ -944,7 +1003,7 @@ class PostMigrator:
         Returns:
             Словарь с данными сообщения
         """
-        from app.utils.media_handler import download_and_store_media
+        from app.utils.media_handler import download_and_store_media, get_message_file_size
 
         try:
             message_data = {
@@ -957,6 +1016,7 @@ class PostMigrator:
                 "video": None,
                 "document": None,
                 "media_group_id": getattr(message, "media_group_id", None),
+                "file_size": get_message_file_size(message),
             }
 
             # Определение типа сообщения и загрузка медиа
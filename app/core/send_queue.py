@@ -0,0 +1,240 @@
+"""Очередь задач отправки в MAX на Redis Streams."""
+
+import json
+import time
+from typing import Dict, List, Any, Optional, Set, Tuple
+from redis.exceptions import ResponseError
+from app.utils.hash_ring import stable_hash
+from app.utils.logger import get_logger
+from config.redis_client import get_redis
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+# Типы задач в очереди
+TASK_MESSAGE = "message"
+TASK_MEDIA_GROUP = "media_group"
+
+# Продление аренды партиции только ее владельцем
+_RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Освобождение аренды партиции только ее владельцем
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SendQueue:
+    """
+    Очередь задач между MTProto receiver и воркерами отправки.
+
+    Receiver только нормализует сообщение (скачивает медиа, готовит message_data)
+    и кладет задачу в stream. Очередь разбита на партиции по MAX каналу
+    (стабильный хэш channel_id), каждую партицию в один момент времени читает
+    ровно один воркер, поэтому посты в один MAX канал отправляются по порядку.
+
+    Все воркеры читают партицию под одним именем consumer ("p<номер>"), поэтому
+    новый владелец партиции сначала дочитывает неподтвержденные задачи прежнего.
+    """
+
+    def __init__(self, stream: Optional[str] = None, group: Optional[str] = None):
+        """
+        Инициализация очереди.
+
+        Args:
+            stream: Префикс ключей Redis stream (по умолчанию settings.send_queue_stream)
+            group: Имя consumer group (по умолчанию settings.send_queue_group)
+        """
+        self.stream = stream or settings.send_queue_stream
+        self.group = group or settings.send_queue_group
+        self.partitions = settings.send_queue_partitions
+        self._ready_partitions: Set[int] = set()
+
+    def partition_for(self, max_channel_id: str) -> int:
+        """
+        Получить партицию для MAX канала.
+
+        Args:
+            max_channel_id: ID канала в MAX
+
+        Returns:
+            Номер партиции
+        """
+        return stable_hash(str(max_channel_id)) % self.partitions
+
+    def stream_key(self, partition: int) -> str:
+        """Ключ stream партиции."""
+        return f"{self.stream}:{partition}"
+
+    async def ensure_group(self, partition: int) -> None:
+        """Создать consumer group (и stream) партиции, если их еще нет."""
+        if partition in self._ready_partitions:
+            return
+
+        redis = await get_redis()
+        try:
+            await redis.xgroup_create(self.stream_key(partition), self.group, id="0", mkstream=True)
+            logger.info("send_queue_group_created", stream=self.stream_key(partition), group=self.group)
+        except ResponseError as e:
+            # BUSYGROUP - группа уже существует
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._ready_partitions.add(partition)
+
+    async def enqueue(self, task: Dict[str, Any], partition: int) -> str:
+        """
+        Добавить задачу в партицию очереди.
+
+        Args:
+            task: Задача (словарь, сериализуемый в JSON, с ключом "kind")
+            partition: Номер партиции
+
+        Returns:
+            ID записи в stream
+        """
+        redis = await get_redis()
+        entry_id = await redis.xadd(
+            self.stream_key(partition),
+            {"payload": json.dumps(task, ensure_ascii=False, default=str)},
+            maxlen=settings.send_queue_max_length,
+            approximate=True,
+        )
+        logger.debug("send_task_enqueued", partition=partition, entry_id=entry_id, kind=task.get("kind"))
+        return entry_id
+
+    async def read(
+        self, partition: int, count: int = 10, block_ms: int = 1000, pending: bool = False
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Прочитать задачи партиции.
+
+        Args:
+            partition: Номер партиции
+            count: Максимальное количество задач
+            block_ms: Сколько ждать новых задач (миллисекунды)
+            pending: Прочитать выданные, но не подтвержденные задачи (вместо новых)
+
+        Returns:
+            Список (ID записи, задача)
+        """
+        await self.ensure_group(partition)
+        redis = await get_redis()
+        response = await redis.xreadgroup(
+            self.group,
+            f"p{partition}",
+            {self.stream_key(partition): "0" if pending else ">"},
+            count=count,
+            block=None if pending else block_ms,
+        )
+        if not response:
+            return []
+
+        _, entries = response[0]
+        return self._decode_entries(entries)
+
+    async def ack(self, partition: int, entry_id: str) -> None:
+        """
+        Подтвердить обработку задачи и удалить ее из stream.
+
+        Args:
+            partition: Номер партиции
+            entry_id: ID записи в stream
+        """
+        redis = await get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream_key(partition), self.group, entry_id)
+            pipe.xdel(self.stream_key(partition), entry_id)
+            await pipe.execute()
+
+    async def add_media_refs(self, ref_key: str, count: int) -> None:
+        """
+        Запомнить, сколько задач используют общие медиа-файлы.
+
+        Args:
+            ref_key: Ключ счетчика
+            count: Количество задач
+        """
+        redis = await get_redis()
+        await redis.set(f"{self.stream}:media_refs:{ref_key}", count, ex=86400)
+
+    async def release_media_ref(self, ref_key: str) -> bool:
+        """
+        Освободить ссылку задачи на общие медиа-файлы.
+
+        Args:
+            ref_key: Ключ счетчика
+
+        Returns:
+            True если это была последняя задача и файлы можно удалять
+        """
+        redis = await get_redis()
+        key = f"{self.stream}:media_refs:{ref_key}"
+        remaining = await redis.decr(key)
+        if remaining <= 0:
+            await redis.delete(key)
+            return True
+        return False
+
+    async def heartbeat(self, worker_id: str) -> None:
+        """Отметить воркер как живой."""
+        redis = await get_redis()
+        await redis.zadd(f"{self.stream}:workers", {worker_id: time.time()})
+
+    async def unregister(self, worker_id: str) -> None:
+        """Удалить воркер из списка живых."""
+        redis = await get_redis()
+        await redis.zrem(f"{self.stream}:workers", worker_id)
+
+    async def alive_workers(self) -> List[str]:
+        """Получить список живых воркеров (давно не отмечавшиеся удаляются)."""
+        redis = await get_redis()
+        key = f"{self.stream}:workers"
+        await redis.zremrangebyscore(key, 0, time.time() - settings.sender_worker_heartbeat_seconds * 3)
+        return await redis.zrange(key, 0, -1)
+
+    async def acquire_partition(self, partition: int, worker_id: str) -> bool:
+        """
+        Взять или продлить аренду партиции.
+
+        Args:
+            partition: Номер партиции
+            worker_id: ID воркера
+
+        Returns:
+            True если партиция принадлежит воркеру
+        """
+        redis = await get_redis()
+        key = f"{self.stream}:lease:{partition}"
+        ttl_ms = int(settings.sender_worker_heartbeat_seconds * 3 * 1000)
+        if await redis.set(key, worker_id, nx=True, px=ttl_ms):
+            return True
+        return bool(await redis.eval(_RENEW_LEASE_SCRIPT, 1, key, worker_id, ttl_ms))
+
+    async def release_partition(self, partition: int, worker_id: str) -> None:
+        """Освободить аренду партиции."""
+        redis = await get_redis()
+        await redis.eval(_RELEASE_LEASE_SCRIPT, 1, f"{self.stream}:lease:{partition}", worker_id)
+
+    def _decode_entries(self, entries) -> List[Tuple[str, Dict[str, Any]]]:
+        """Разобрать записи stream в задачи (битые записи возвращаются как пустая задача для ack)."""
+        tasks = []
+        for entry_id, fields in entries:
+            try:
+                tasks.append((entry_id, json.loads(fields["payload"])))
+            except (KeyError, TypeError, ValueError) as e:
+                # Запись удалена из stream (осталась только в PEL) или повреждена
+                logger.error("send_task_decode_failed", entry_id=entry_id, error=str(e))
+                tasks.append((entry_id, {}))
+        return tasks
+
+
+# Глобальный экземпляр
+send_queue = SendQueue()
@@ -1,19 +1,63 @@
 """Клиент для работы с MAX API."""
 
 import asyncio
+import hashlib
+import importlib.util
 import httpx
 import json
-from typing import Optional, Dict, Any, List
+import os
+import time
+from typing import Optional, Dict, Any, List, Set
 from config.settings import settings
 from app.utils.logger import get_logger
 from app.utils.retry import retry_with_backoff
 from app.utils.exceptions import APIError
+from app.utils.circuit_breaker import is_permanent_error
+from app.utils.deadline import allow_retry, request_timeout
 from app.utils.rate_limiter import max_api_limiter
 from app.utils.chat_id_converter import convert_chat_id
 from app.utils.cache import get_cache, set_cache
+from app.utils.metrics import metrics_collector
+from app.max_api.multipart import MultipartFileStream
+from app.max_api.readiness import attachment_readiness, next_retry_delay
 
 logger = get_logger(__name__)
 
+# HTTP/2 в httpx требует опционального пакета h2
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Посчитать SHA-256 содержимого файла (читается блоками)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_size(file_path: str) -> Optional[int]:
+    """Размер файла в байтах (None, если файл недоступен)."""
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
+
+
+def _is_attachment_not_ready(error_body: Any) -> bool:
+    """Проверить, что ошибка MAX API - вложение еще обрабатывается (attachment.not.ready)."""
+    return error_body is not None and "not.ready" in str(error_body).lower()
+
+
+def _error_response_body(error: httpx.HTTPStatusError) -> Any:
+    """Тело ответа с ошибкой (None, если это не JSON)."""
+    if error.response is None:
+        return None
+    try:
+        return error.response.json()
+    except ValueError:
+        return None
+
 
 class MaxAPIClient:
     """Клиент для работы с MAX API."""
@@ -30,10 +74,67 @@ class MaxAPIClient:
             headers=self.headers,
             timeout=settings.max_api_timeout,
         )
+        # Долгоживущий пул соединений для загрузки файлов на CDN (создается при первой загрузке)
+        self._upload_client: Optional[httpx.AsyncClient] = None
+        self._uploads_in_progress = 0
+        # Загрузки, выполняющиеся прямо сейчас: {cache_key: Future[token]}
+        self._inflight_uploads: Dict[str, asyncio.Future] = {}
+        # Время загрузки token (unix time) и размер файла для ожидания обработки вложений
+        self._upload_times: Dict[str, float] = {}
+        self._upload_sizes: Dict[str, int] = {}
+        # Token, для которых время готовности уже учтено (первая отправка после загрузки)
+        self._readiness_observed: Set[str] = set()
 
     async def close(self):
-        """Закрыть HTTP клиент."""
+        """Закрыть HTTP клиенты."""
         await self.client.aclose()
+        if self._upload_client is not None:
+            await self._upload_client.aclose()
+            self._upload_client = None
+
+    def _get_upload_client(self) -> httpx.AsyncClient:
+        """
+        Получить общий HTTP клиент для загрузки файлов на CDN.
+
+        Соединения (TCP/TLS) переиспользуются между загрузками, поэтому
+        альбом из 10 фото не платит за handshake на каждый файл.
+
+        Returns:
+            HTTP клиент с пулом соединений
+        """
+        if self._upload_client is None or self._upload_client.is_closed:
+            http2 = settings.max_api_upload_http2 and HTTP2_AVAILABLE
+            self._upload_client = httpx.AsyncClient(
+                timeout=settings.max_api_upload_timeout,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.max_api_upload_max_connections,
+                    max_keepalive_connections=settings.max_api_upload_max_keepalive,
+                    keepalive_expiry=settings.max_api_upload_keepalive_expiry,
+                ),
+            )
+            logger.info(
+                "upload_client_created",
+                http2=http2,
+                max_connections=settings.max_api_upload_max_connections,
+                max_keepalive=settings.max_api_upload_max_keepalive,
+            )
+        return self._upload_client
+
+    def _record_upload_pool_metrics(self):
+        """
+        Записать метрики использования пула соединений загрузки.
+
+        httpx не предоставляет публичного API для состояния пула, поэтому занятость
+        считается по собственному счетчику загрузок и настроенному лимиту соединений.
+        """
+        if not metrics_collector.enabled:
+            return
+
+        max_connections = settings.max_api_upload_max_connections
+        metrics_collector.set_gauge("max_upload_pool_in_use", self._uploads_in_progress)
+        metrics_collector.set_gauge("max_upload_pool_limit", max_connections)
+        metrics_collector.set_gauge("max_upload_pool_available", max(0, max_connections - self._uploads_in_progress))
 
     async def get_bot_info(self) -> Dict[str, Any]:
         """
@@ -73,6 +174,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_get_bot_info", error=str(e))
             raise APIError(f"Ошибка сети при получении информации о боте: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_get_bot_info", error=str(e))
             raise APIError(f"Неожиданная ошибка при получении информации о боте: {e}")
@@ -126,17 +229,20 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_send_message", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при отправке сообщения: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_message", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке сообщения: {e}")
 
-    async def upload_file(self, file_path: str, file_type: str = "image") -> str:
+    async def upload_file(self, file_path: str, file_type: str = "image", data: Optional[bytes] = None) -> str:
         """
         Загрузить файл в MAX API и получить token.
 
         Args:
-            file_path: Путь к файлу на диске
+            file_path: Путь к файлу на диске (или имя файла, если передан data)
             file_type: Тип файла (image, video, document, audio)
+            data: Содержимое файла в памяти (файл на диске не читается)
 
         Returns:
             Token для использования в content
@@ -160,7 +266,7 @@ class MaxAPIClient:
             from urllib.parse import urlparse, parse_qs
 
             file = Path(file_path)
-            if not file.exists():
+            if data is None and not file.exists():
                 raise APIError(f"Файл не найден: {file_path}")
 
             # Извлекаем photoIds из URL
@@ -168,116 +274,125 @@ class MaxAPIClient:
             query_params = parse_qs(parsed_url.query)
             photo_ids = query_params.get("photoIds", [])
 
-            with open(file_path, "rb") as f:
-                # Определяем Content-Type в зависимости от типа файла
-                content_type_map = {
-                    "image": "image/jpeg",
-                    "video": "video/mp4",
-                    "document": "application/octet-stream",
-                    "audio": "audio/mpeg",
-                }
-                content_type = content_type_map.get(file_type, "application/octet-stream")
-
-                files = {"data": (file.name, f, content_type)}
-                upload_client = httpx.AsyncClient(timeout=settings.max_api_upload_timeout)
-                try:
-                    upload_file_response = await upload_client.post(
-                        upload_url, files=files, headers={"Authorization": self.token}
-                    )
-                    upload_file_response.raise_for_status()
-
-                    # Если token уже был в ответе от /uploads, используем его
-                    if token_from_response:
-                        token = token_from_response
-                        logger.info("using_token_from_upload_response", file_path=file_path)
+            # Определяем Content-Type в зависимости от типа файла
+            content_type_map = {
+                "image": "image/jpeg",
+                "video": "video/mp4",
+                "document": "application/octet-stream",
+                "audio": "audio/mpeg",
+            }
+            content_type = content_type_map.get(file_type, "application/octet-stream")
+
+            # Тело формируется потоком из файла блоками, без загрузки видео целиком в память
+            if data is not None:
+                body = MultipartFileStream("data", file.name, content_type, data=data)
+            else:
+                body = MultipartFileStream("data", file.name, content_type, file_path=file_path)
+            upload_client = self._get_upload_client()
+            self._uploads_in_progress += 1
+            self._record_upload_pool_metrics()
+            upload_start = time.time()
+            try:
+                upload_file_response = await upload_client.post(
+                    upload_url, content=body, headers={"Authorization": self.token, **body.headers}
+                )
+                upload_file_response.raise_for_status()
+                self._record_upload_throughput(file_type, body.file_size, time.time() - upload_start)
+
+                # Если token уже был в ответе от /uploads, используем его
+                if token_from_response:
+                    token = token_from_response
+                    logger.info("using_token_from_upload_response", file_path=file_path)
+                else:
+                    # Иначе пытаемся извлечь token из ответа CDN
+                    # Проверяем Content-Type ответа
+                    content_type_header = upload_file_response.headers.get("content-type", "")
+                    if "application/json" not in content_type_header.lower():
+                        # Если ответ не JSON, пробуем прочитать как текст
+                        response_text = upload_file_response.text
+                        logger.warning(
+                            "upload_response_not_json",
+                            content_type=content_type_header,
+                            response_preview=response_text[:200],
+                        )
+                        # Пробуем распарсить как JSON, даже если Content-Type не указан
+                        try:
+                            upload_result = upload_file_response.json()
+                        except Exception:
+                            # Если не JSON, возможно это HTML или другой формат
+                            # Проверяем, может быть ответ содержит JSON внутри
+                            import json
+                            import re
+
+                            # Пробуем найти JSON в ответе
+                            json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
+                            if json_match:
+                                upload_result = json.loads(json_match.group())
+                            else:
+                                # Если ответ не JSON и token не был в первом ответе,
+                                # это может быть просто подтверждение загрузки (например, <retval>1</retval>)
+                                # В этом случае используем token из первого ответа, если он был
+                                if token_from_response:
+                                    token = token_from_response
+                                    logger.info("using_token_from_upload_response_after_cdn_confirm", file_path=file_path)
+                                else:
+                                    raise APIError(
+                                        f"Ответ от CDN не является JSON и token не найден: {response_text[:200]}"
+                                    )
                     else:
-                        # Иначе пытаемся извлечь token из ответа CDN
-                        # Проверяем Content-Type ответа
-                        content_type_header = upload_file_response.headers.get("content-type", "")
-                        if "application/json" not in content_type_header.lower():
-                            # Если ответ не JSON, пробуем прочитать как текст
-                            response_text = upload_file_response.text
-                            logger.warning(
-                                "upload_response_not_json",
-                                content_type=content_type_header,
-                                response_preview=response_text[:200],
+                        upload_result = upload_file_response.json()
+
+                    # Извлекаем token из структуры ответа
+                    # Для фото: {"photos": {"photoId": {"token": "..."}}}
+                    # Для видео: может быть {"videos": {...}} или {"photos": {...}}
+                    token = None
+
+                    # Пробуем найти token в разных структурах
+                    if "photos" in upload_result:
+                        photos = upload_result.get("photos", {})
+                        if photos:
+                            # Используем первый photoId из URL или первый ключ в photos
+                            photo_id = photo_ids[0] if photo_ids else list(photos.keys())[0]
+                            photo_data = photos.get(photo_id)
+                            if photo_data:
+                                token = photo_data.get("token")
+
+                    # Для видео может быть другая структура
+                    if not token and "videos" in upload_result:
+                        videos = upload_result.get("videos", {})
+                        if videos:
+                            # Аналогично для видео
+                            video_id = list(videos.keys())[0]
+                            video_data = videos.get(video_id)
+                            if video_data:
+                                token = video_data.get("token")
+
+                    # Если token не найден, пробуем найти его напрямую в ответе
+                    if not token:
+                        token = upload_result.get("token")
+
+                    if not token:
+                        logger.error("upload_result_structure", upload_result=upload_result)
+                        # Проверяем, является ли это ошибкой неподдерживаемого формата
+                        error_code = upload_result.get("error_code", "")
+                        error_data = upload_result.get("error_data", "")
+                        error_msg = upload_result.get("error_msg", "")
+                        if (
+                            "image_invalid_format" in str(error_code).lower()
+                            or "image_invalid_format" in str(error_data).lower()
+                            or "image_invalid_format" in str(error_msg).lower()
+                        ):
+                            raise APIError(
+                                "IMAGE_INVALID_FORMAT: Стикер не поддерживается MAX API", response=upload_result
                             )
-                            # Пробуем распарсить как JSON, даже если Content-Type не указан
-                            try:
-                                upload_result = upload_file_response.json()
-                            except Exception:
-                                # Если не JSON, возможно это HTML или другой формат
-                                # Проверяем, может быть ответ содержит JSON внутри
-                                import json
-                                import re
-
-                                # Пробуем найти JSON в ответе
-                                json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
-                                if json_match:
-                                    upload_result = json.loads(json_match.group())
-                                else:
-                                    # Если ответ не JSON и token не был в первом ответе,
-                                    # это может быть просто подтверждение загрузки (например, <retval>1</retval>)
-                                    # В этом случае используем token из первого ответа, если он был
-                                    if token_from_response:
-                                        token = token_from_response
-                                        logger.info("using_token_from_upload_response_after_cdn_confirm", file_path=file_path)
-                                    else:
-                                        raise APIError(
-                                            f"Ответ от CDN не является JSON и token не найден: {response_text[:200]}"
-                                        )
-                        else:
-                            upload_result = upload_file_response.json()
+                        raise APIError("Не получен token после загрузки файла", response=upload_result)
 
-                        # Извлекаем token из структуры ответа
-                        # Для фото: {"photos": {"photoId": {"token": "..."}}}
-                        # Для видео: может быть {"videos": {...}} или {"photos": {...}}
-                        token = None
-
-                        # Пробуем найти token в разных структурах
-                        if "photos" in upload_result:
-                            photos = upload_result.get("photos", {})
-                            if photos:
-                                # Используем первый photoId из URL или первый ключ в photos
-                                photo_id = photo_ids[0] if photo_ids else list(photos.keys())[0]
-                                photo_data = photos.get(photo_id)
-                                if photo_data:
-                                    token = photo_data.get("token")
-
-                        # Для видео может быть другая структура
-                        if not token and "videos" in upload_result:
-                            videos = upload_result.get("videos", {})
-                            if videos:
-                                # Аналогично для видео
-                                video_id = list(videos.keys())[0]
-                                video_data = videos.get(video_id)
-                                if video_data:
-                                    token = video_data.get("token")
-
-                        # Если token не найден, пробуем найти его напрямую в ответе
-                        if not token:
-                            token = upload_result.get("token")
-
-                        if not token:
-                            logger.error("upload_result_structure", upload_result=upload_result)
-                            # Проверяем, является ли это ошибкой неподдерживаемого формата
-                            error_code = upload_result.get("error_code", "")
-                            error_data = upload_result.get("error_data", "")
-                            error_msg = upload_result.get("error_msg", "")
-                            if (
-                                "image_invalid_format" in str(error_code).lower()
-                                or "image_invalid_format" in str(error_data).lower()
-                                or "image_invalid_format" in str(error_msg).lower()
-                            ):
-                                raise APIError(
-                                    "IMAGE_INVALID_FORMAT: Стикер не поддерживается MAX API", response=upload_result
-                                )
-                            raise APIError("Не получен token после загрузки файла", response=upload_result)
-
-                    logger.info("file_uploaded", file_path=file_path, token=token[:20])
-                    return token
-                finally:
-                    await upload_client.aclose()
+                logger.info("file_uploaded", file_path=file_path, token=token[:20])
+                self._remember_upload_time(token, time.time())
+                return token
+            finally:
+                self._uploads_in_progress -= 1
+                self._record_upload_pool_metrics()
 
         except httpx.HTTPStatusError as e:
             error_response = e.response.json() if e.response else None
@@ -295,10 +410,247 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_upload_file", file_path=file_path, error=str(e))
             raise APIError(f"Ошибка сети при загрузке файла: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_upload_file", file_path=file_path, error=str(e))
             raise APIError(f"Неожиданная ошибка при загрузке файла: {e}")
 
+    async def upload_file_cached(self, file_path: str, file_type: str = "image", data: Optional[bytes] = None) -> str:
+        """
+        Загрузить файл в MAX API с переиспользованием token.
+
+        Token кэшируется по хэшу содержимого файла на settings.media_upload_token_ttl секунд,
+        поэтому пост, связанный с несколькими MAX каналами, загружается только один раз.
+        Параллельные вызовы для одного и того же файла ожидают одну общую загрузку.
+
+        Args:
+            file_path: Путь к файлу на диске (или имя файла, если передан data)
+            file_type: Тип файла (image, video, file, audio)
+            data: Содержимое файла в памяти (файл на диске не читается)
+
+        Returns:
+            Token для использования в attachments
+        """
+        if data is not None:
+            content_hash = hashlib.sha256(data).hexdigest()
+        else:
+            try:
+                content_hash = await asyncio.to_thread(_file_sha256, file_path)
+            except OSError as e:
+                # Не удалось прочитать файл - обычная загрузка вернет понятную ошибку
+                logger.warning("upload_hash_failed", file_path=file_path, error=str(e))
+                return await self.upload_file(file_path, file_type)
+
+        cache_key = f"max_api:upload_token:{file_type}:{content_hash}"
+
+        cached = await get_cache(cache_key)
+        if cached and isinstance(cached, dict) and cached.get("token"):
+            token = cached["token"]
+            if token not in self._upload_times:
+                # Загрузка другого процесса (или давняя): время загрузки нужно для расписания
+                # повторов, но в наблюдения готовности не попадает - отправка может быть намного позже
+                self._upload_times[token] = cached.get("uploaded_at", 0.0)
+                self._readiness_observed.add(token)
+            if cached.get("size") is not None:
+                self._upload_sizes.setdefault(token, cached["size"])
+            logger.debug("upload_token_from_cache", file_path=file_path, file_type=file_type)
+            if metrics_collector.enabled:
+                metrics_collector.record_timing("upload_token_cache_hit", 0)
+            return token
+
+        inflight = self._inflight_uploads.get(cache_key)
+        if inflight is not None:
+            logger.debug("upload_token_awaiting_inflight", file_path=file_path, file_type=file_type)
+            if metrics_collector.enabled:
+                metrics_collector.record_timing("upload_token_inflight_hit", 0)
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_uploads[cache_key] = future
+        try:
+            token = await self.upload_file(file_path, file_type, data=data)
+            uploaded_at = time.time()
+            size = len(data) if data is not None else _file_size(file_path)
+            self._remember_upload_time(token, uploaded_at, size)
+            future.set_result(token)
+            await set_cache(
+                cache_key,
+                {"token": token, "uploaded_at": uploaded_at, "size": size},
+                ttl=settings.media_upload_token_ttl,
+            )
+            return token
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Помечаем исключение как полученное, если никто не ждал эту загрузку
+            future.exception()
+            raise
+        finally:
+            self._inflight_uploads.pop(cache_key, None)
+
+    def _record_upload_throughput(self, file_type: str, size_bytes: int, duration: float):
+        """
+        Записать длительность и скорость (MB/s) загрузки файла на CDN.
+
+        Args:
+            file_type: Тип файла
+            size_bytes: Размер файла (байты)
+            duration: Длительность загрузки (секунды)
+        """
+        size_mb = size_bytes / (1024 * 1024)
+        throughput = size_mb / duration if duration > 0 else 0.0
+        logger.debug(
+            "file_upload_throughput",
+            file_type=file_type,
+            size_mb=round(size_mb, 2),
+            duration=round(duration, 3),
+            throughput_mb_s=round(throughput, 2),
+        )
+        if metrics_collector.enabled:
+            metrics_collector.record_timing(f"max_upload_{file_type}", duration)
+            metrics_collector.record_value(f"max_upload_{file_type}_throughput_mb_s", throughput)
+
+    def _remember_upload_time(self, token: str, uploaded_at: float, size: Optional[int] = None) -> None:
+        """Запомнить время загрузки и размер файла token и забыть устаревшие записи."""
+        cutoff = uploaded_at - settings.media_upload_token_ttl
+        for stale_token in [t for t, ts in self._upload_times.items() if ts < cutoff]:
+            del self._upload_times[stale_token]
+            self._upload_sizes.pop(stale_token, None)
+            self._readiness_observed.discard(stale_token)
+        self._upload_times[token] = uploaded_at
+        if size is not None:
+            self._upload_sizes[token] = size
+
+    async def upload_files(self, local_file_paths: List[str], file_type: str = "image") -> List[str]:
+        """
+        Загрузить несколько файлов батчами с переиспользованием token.
+
+        Args:
+            local_file_paths: Список путей к файлам
+            file_type: Тип файлов (image, video)
+
+        Returns:
+            Список token в том же порядке, что и файлы
+        """
+        tokens = []
+        batch_size = settings.batch_size_media_uploads
+        upload_delay = settings.media_upload_delay_video if file_type == "video" else settings.media_upload_delay_photo
+        for i in range(0, len(local_file_paths), batch_size):
+            batch = local_file_paths[i : i + batch_size]
+            # Параллельная загрузка батча
+            batch_tokens = await asyncio.gather(*[self.upload_file_cached(file_path, file_type) for file_path in batch])
+            tokens.extend(batch_tokens)
+            # Адаптивная задержка между батчами
+            if i + batch_size < len(local_file_paths):
+                await asyncio.sleep(upload_delay)
+        return tokens
+
+    async def send_with_attachments(
+        self, chat_id: str, data: Dict[str, Any], tokens: List[str], media_type: str, event: str, max_retries: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Отправить сообщение с загруженными вложениями без фиксированной задержки.
+
+        Первая попытка выполняется сразу. При attachment.not.ready следующие попытки
+        назначаются по расписанию attachment_readiness (время от загрузки, выученное
+        по типу и размеру вложений), при других временных ошибках - с удвоением паузы.
+        Постоянные ошибки пробрасываются сразу. Повторы и таймаут запроса ограничены
+        сроком текущей отправки (deadline_scope).
+
+        Args:
+            chat_id: ID канала в MAX
+            data: Тело запроса (text, attachments, format)
+            tokens: Token вложений
+            media_type: Тип вложений для статистики готовности (image, video, file, mixed)
+            event: Префикс событий лога (photo, videos, ...)
+            max_retries: Максимальное количество попыток
+
+        Returns:
+            Ответ MAX API
+        """
+        chat_id_value = convert_chat_id(chat_id)
+        known_upload = all(token in self._upload_times for token in tokens)
+        uploaded_at = max((self._upload_times.get(token, 0.0) for token in tokens), default=0.0) or time.time()
+        sizes = [self._upload_sizes.get(token) for token in tokens]
+        size_bytes = sum(sizes) if sizes and None not in sizes else None
+        schedule = await attachment_readiness.schedule(media_type, size_bytes)
+        not_ready_delay = 0.0
+        retry_delay = settings.retry_base_delay
+
+        for attempt in range(max_retries):
+            last_attempt = attempt == max_retries - 1
+            try:
+                response = await retry_with_backoff(
+                    self.client.post,
+                    f"/messages?chat_id={chat_id_value}",
+                    json=data,
+                    timeout=request_timeout(settings.max_api_timeout),
+                )
+                response.raise_for_status()
+                try:
+                    result = response.json()
+                except (json.JSONDecodeError, ValueError) as json_error:
+                    # Ответ не JSON (пустой или невалидный) - ошибка MAX API
+                    logger.error(
+                        f"invalid_json_response_for_{event}",
+                        chat_id=chat_id,
+                        status_code=response.status_code,
+                        response_text=response.text[:500],
+                        error=str(json_error),
+                    )
+                    raise APIError(f"MAX API вернул невалидный ответ: {json_error}")
+
+                error_body = result.get("error", result.get("errors")) if isinstance(result, dict) else None
+                not_ready = _is_attachment_not_ready(error_body)
+                if not_ready and not last_attempt:
+                    delay = await self._wait_attachment_retry(event, attempt, schedule, uploaded_at, not_ready_delay)
+                    if delay is not None:
+                        not_ready_delay = delay
+                        continue
+
+                if not not_ready and known_upload and not self._readiness_observed.intersection(tokens):
+                    # Учитываем только первую отправку после загрузки (повторные не ждут обработки)
+                    self._readiness_observed.update(tokens)
+                    await attachment_readiness.record(media_type, size_bytes, time.time() - uploaded_at)
+                return result
+            except httpx.HTTPStatusError as e:
+                if not last_attempt and _is_attachment_not_ready(_error_response_body(e)):
+                    delay = await self._wait_attachment_retry(event, attempt, schedule, uploaded_at, not_ready_delay)
+                    if delay is None:
+                        raise
+                    not_ready_delay = delay
+                    continue
+                if last_attempt or is_permanent_error(e) or not allow_retry(retry_delay, "send_error"):
+                    raise
+                logger.warning(f"{event}_retry_after_error", attempt=attempt + 1, error=str(e))
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2
+            except Exception as e:
+                if last_attempt or is_permanent_error(e) or not allow_retry(retry_delay, "send_error"):
+                    raise
+                logger.warning(f"{event}_retry_after_error", attempt=attempt + 1, error=str(e))
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2
+
+    async def _wait_attachment_retry(
+        self, event: str, attempt: int, schedule: List[float], uploaded_at: float, previous_delay: float
+    ) -> Optional[float]:
+        """
+        Подождать до следующей попытки после attachment.not.ready.
+
+        Returns:
+            Пауза в секундах или None, если повтор не укладывается в срок отправки
+        """
+        delay = next_retry_delay(schedule, time.time() - uploaded_at, previous_delay)
+        if not allow_retry(delay, "attachment_not_ready"):
+            return None
+        logger.warning(f"{event}_attachment_not_ready_retry", attempt=attempt + 1, delay=round(delay, 2))
+        await asyncio.sleep(delay)
+        return delay
+
     async def send_photo(
         self,
         chat_id: str,
@@ -306,6 +658,7 @@ class MaxAPIClient:
         caption: Optional[str] = None,
         local_file_path: Optional[str] = None,
         parse_mode: Optional[str] = None,
+        upload_token: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Отправить фото в канал.
@@ -314,6 +667,9 @@ class MaxAPIClient:
             chat_id: ID канала в MAX
             photo_url: URL фото
             caption: Подпись к фото
+            local_file_path: Путь к локальному файлу фото
+            parse_mode: Режим парсинга (HTML, Markdown)
+            upload_token: Token уже загруженного файла (загрузка пропускается)
 
         Returns:
             Информация об отправленном сообщении
@@ -324,12 +680,9 @@ class MaxAPIClient:
         # ВАЖНО: MAX API требует загрузку файла через /uploads endpoint
         # Сначала загружаем файл, получаем token, затем используем его в content
         # После загрузки может потребоваться задержка для обработки файла
-        if local_file_path:
+        if local_file_path or upload_token:
             try:
-                token = await self.upload_file(local_file_path, "image")
-
-                # Адаптивная задержка после загрузки
-                await asyncio.sleep(settings.media_processing_delay_photo)
+                token = upload_token or await self.upload_file_cached(local_file_path, "image")
 
                 # Формируем запрос с attachments и payload.token
                 # ПРАВИЛЬНЫЙ ФОРМАТ: {"attachments": [{"type": "image", "payload": {"token": "..."}}]}
@@ -343,49 +696,10 @@ class MaxAPIClient:
 
                 await max_api_limiter.wait_if_needed(f"max_api_{chat_id}")
 
-                # Пробуем отправить с повторными попытками при ошибке attachment.not.ready
-                max_retries = 3
-                retry_delay = 2
-
-                for attempt in range(max_retries):
-                    try:
-                        response = await retry_with_backoff(self.client.post, f"/messages?chat_id={chat_id_value}", json=data)
-                        response.raise_for_status()
-                        result = response.json()
-
-                        # Проверяем на ошибку attachment.not.ready
-                        if "error" in result or "errors" in result:
-                            error_msg = str(result.get("error", result.get("errors", "")))
-                            if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                if attempt < max_retries - 1:
-                                    logger.warning(f"attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay)
-                                    await asyncio.sleep(retry_delay)
-                                    retry_delay *= 2  # Увеличиваем задержку
-                                    continue
-
-                        logger.info("photo_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
-                        return result
-                    except httpx.HTTPStatusError as e:
-                        if e.response:
-                            try:
-                                error_data = e.response.json()
-                                error_msg = str(error_data)
-                                if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                    if attempt < max_retries - 1:
-                                        logger.warning(f"attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay)
-                                        await asyncio.sleep(retry_delay)
-                                        retry_delay *= 2
-                                        continue
-                            except:
-                                pass
-                        if attempt == max_retries - 1:
-                            raise
-                    except Exception as e:
-                        if attempt == max_retries - 1:
-                            raise
-                        logger.warning(f"retry_after_error", attempt=attempt + 1, error=str(e))
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
+                # Первая попытка сразу, повторные - по расписанию готовности вложений
+                result = await self.send_with_attachments(chat_id, data, [token], "image", "photo")
+                logger.info("photo_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
+                return result
 
             except Exception as e:
                 logger.error("failed_to_send_photo_via_upload", chat_id=chat_id, error=str(e))
@@ -433,6 +747,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_send_photo", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при отправке фото: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_photo", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке фото: {e}")
@@ -444,6 +760,7 @@ class MaxAPIClient:
         caption: Optional[str] = None,
         local_file_path: Optional[str] = None,
         parse_mode: Optional[str] = None,
+        upload_token: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Отправить видео в канал.
@@ -454,6 +771,7 @@ class MaxAPIClient:
             caption: Подпись к видео
             local_file_path: Путь к локальному файлу видео
             parse_mode: Режим парсинга (HTML, Markdown)
+            upload_token: Token уже загруженного файла (загрузка пропускается)
 
         Returns:
             Информация об отправленном сообщении
@@ -464,12 +782,9 @@ class MaxAPIClient:
         # ВАЖНО: MAX API требует загрузку файла через /uploads endpoint
         # Сначала загружаем файл, получаем token, затем используем его в attachments
         # Видео может обрабатываться дольше, поэтому увеличиваем задержку
-        if local_file_path:
+        if local_file_path or upload_token:
             try:
-                token = await self.upload_file(local_file_path, "video")
-
-                # Адаптивная задержка для видео
-                await asyncio.sleep(settings.media_processing_delay_video)
+                token = upload_token or await self.upload_file_cached(local_file_path, "video")
 
                 # Формируем запрос с attachments и payload.token
                 text = caption or ""  # Пустая строка, если нет caption
@@ -480,64 +795,10 @@ class MaxAPIClient:
 
                 await max_api_limiter.wait_if_needed(f"max_api_{chat_id}")
 
-                # Пробуем отправить с повторными попытками при ошибке attachment.not.ready
-                max_retries = 5  # Для видео больше попыток
-                retry_delay = 3  # Больше задержка для видео
-
-                for attempt in range(max_retries):
-                    try:
-                        response = await retry_with_backoff(self.client.post, f"/messages?chat_id={chat_id_value}", json=data)
-                        response.raise_for_status()
-                        try:
-                            result = response.json()
-                        except (json.JSONDecodeError, ValueError) as json_error:
-                            # Если ответ не JSON (пустой или невалидный), это может быть ошибка MAX API
-                            # Логируем и пробрасываем как APIError для правильной обработки
-                            response_text = response.text[:500] if hasattr(response, "text") else "Empty response"
-                            logger.error(
-                                "invalid_json_response_for_video",
-                                chat_id=chat_id,
-                                status_code=response.status_code,
-                                response_text=response_text,
-                                error=str(json_error),
-                            )
-                            raise APIError(f"MAX API вернул невалидный ответ при отправке видео: {str(json_error)}")
-
-                        # Проверяем на ошибку attachment.not.ready
-                        if "error" in result or "errors" in result:
-                            error_msg = str(result.get("error", result.get("errors", "")))
-                            if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                if attempt < max_retries - 1:
-                                    logger.warning(f"video_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay)
-                                    await asyncio.sleep(retry_delay)
-                                    retry_delay *= 2  # Увеличиваем задержку
-                                    continue
-
-                        logger.info("video_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
-                        return result
-                    except httpx.HTTPStatusError as e:
-                        if e.response:
-                            try:
-                                error_data = e.response.json()
-                                error_msg = str(error_data)
-                                if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                    if attempt < max_retries - 1:
-                                        logger.warning(
-                                            f"video_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                        )
-                                        await asyncio.sleep(retry_delay)
-                                        retry_delay *= 2
-                                        continue
-                            except:
-                                pass
-                        if attempt == max_retries - 1:
-                            raise
-                    except Exception as e:
-                        if attempt == max_retries - 1:
-                            raise
-                        logger.warning(f"video_retry_after_error", attempt=attempt + 1, error=str(e))
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
+                # Первая попытка сразу, повторные - по расписанию готовности вложений
+                result = await self.send_with_attachments(chat_id, data, [token], "video", "video")
+                logger.info("video_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
+                return result
 
             except Exception as e:
                 logger.error("failed_to_send_video_via_upload", chat_id=chat_id, error=str(e))
@@ -589,6 +850,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_send_video", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при отправке видео: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_video", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке видео: {e}")
@@ -622,10 +885,7 @@ class MaxAPIClient:
         # ПРИМЕЧАНИЕ: MAX API не поддерживает type=document, используем type=file
         if local_file_path:
             try:
-                token = await self.upload_file(local_file_path, "file")
-
-                # Адаптивная задержка для документов
-                await asyncio.sleep(settings.media_processing_delay_video)  # Используем ту же задержку, что и для видео
+                token = await self.upload_file_cached(local_file_path, "file")
 
                 # Формируем запрос с attachments и payload.token
                 # ПРИМЕЧАНИЕ: MAX API использует "file" как attachment type для документов, а не "document"
@@ -637,53 +897,10 @@ class MaxAPIClient:
 
                 await max_api_limiter.wait_if_needed(f"max_api_{chat_id}")
 
-                # Пробуем отправить с повторными попытками при ошибке attachment.not.ready
-                max_retries = 5  # Для документов больше попыток
-                retry_delay = 3  # Больше задержка для документов
-
-                for attempt in range(max_retries):
-                    try:
-                        response = await retry_with_backoff(self.client.post, f"/messages?chat_id={chat_id_value}", json=data)
-                        response.raise_for_status()
-                        result = response.json()
-
-                        # Проверяем на ошибку attachment.not.ready
-                        if "error" in result or "errors" in result:
-                            error_msg = str(result.get("error", result.get("errors", "")))
-                            if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                if attempt < max_retries - 1:
-                                    logger.warning(
-                                        f"document_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                    )
-                                    await asyncio.sleep(retry_delay)
-                                    retry_delay *= 2  # Увеличиваем задержку
-                                    continue
-
-                        logger.info("document_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
-                        return result
-                    except httpx.HTTPStatusError as e:
-                        if e.response:
-                            try:
-                                error_data = e.response.json()
-                                error_msg = str(error_data)
-                                if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                    if attempt < max_retries - 1:
-                                        logger.warning(
-                                            f"document_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                        )
-                                        await asyncio.sleep(retry_delay)
-                                        retry_delay *= 2
-                                        continue
-                            except:
-                                pass
-                        if attempt == max_retries - 1:
-                            raise
-                    except Exception as e:
-                        if attempt == max_retries - 1:
-                            raise
-                        logger.warning(f"document_retry_after_error", attempt=attempt + 1, error=str(e))
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
+                # Первая попытка сразу, повторные - по расписанию готовности вложений
+                result = await self.send_with_attachments(chat_id, data, [token], "file", "document")
+                logger.info("document_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
+                return result
 
             except Exception as e:
                 logger.error("failed_to_send_document_via_upload", chat_id=chat_id, error=str(e))
@@ -735,6 +952,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_send_document", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при отправке документа: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_document", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке документа: {e}")
@@ -772,7 +991,7 @@ class MaxAPIClient:
             # Для WebP стикеров пытаемся загрузить как изображение
             try:
                 try:
-                    token = await self.upload_file(local_file_path, "image")
+                    token = await self.upload_file_cached(local_file_path, "image")
                 except APIError as upload_error:
                     # Проверяем, является ли это ошибкой неподдерживаемого формата
                     error_msg = str(upload_error).lower()
@@ -805,9 +1024,6 @@ class MaxAPIClient:
                     # Пробрасываем другие ошибки
                     raise
 
-                # Задержка для обработки стикера
-                await asyncio.sleep(settings.media_processing_delay)
-
                 # Формируем запрос с attachments и payload.token
                 # MAX API использует "image" как attachment type для стикеров
                 data = {
@@ -817,53 +1033,10 @@ class MaxAPIClient:
 
                 await max_api_limiter.wait_if_needed(f"max_api_{chat_id}")
 
-                # Пробуем отправить с повторными попытками при ошибке attachment.not.ready
-                max_retries = 5
-                retry_delay = 2
-
-                for attempt in range(max_retries):
-                    try:
-                        response = await retry_with_backoff(self.client.post, f"/messages?chat_id={chat_id_value}", json=data)
-                        response.raise_for_status()
-                        result = response.json()
-
-                        # Проверяем на ошибку attachment.not.ready
-                        if "error" in result or "errors" in result:
-                            error_msg = str(result.get("error", result.get("errors", "")))
-                            if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                if attempt < max_retries - 1:
-                                    logger.warning(
-                                        f"sticker_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                    )
-                                    await asyncio.sleep(retry_delay)
-                                    retry_delay *= 2
-                                    continue
-
-                        logger.info("sticker_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
-                        return result
-                    except httpx.HTTPStatusError as e:
-                        if e.response:
-                            try:
-                                error_data = e.response.json()
-                                error_msg = str(error_data)
-                                if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                    if attempt < max_retries - 1:
-                                        logger.warning(
-                                            f"sticker_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                        )
-                                        await asyncio.sleep(retry_delay)
-                                        retry_delay *= 2
-                                        continue
-                            except:
-                                pass
-                        if attempt == max_retries - 1:
-                            raise
-                    except Exception as e:
-                        if attempt == max_retries - 1:
-                            raise
-                        logger.warning(f"sticker_retry_after_error", attempt=attempt + 1, error=str(e))
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
+                # Первая попытка сразу, повторные - по расписанию готовности вложений
+                result = await self.send_with_attachments(chat_id, data, [token], "image", "sticker")
+                logger.info("sticker_sent", chat_id=chat_id, message_id=result.get("message_id"), result=result)
+                return result
 
             except Exception as e:
                 logger.error("failed_to_send_sticker_via_upload", chat_id=chat_id, error=str(e))
@@ -907,12 +1080,19 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_send_sticker", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при отправке стикера: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_sticker", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке стикера: {e}")
 
     async def send_photos(
-        self, chat_id: str, local_file_paths: List[str], caption: Optional[str] = None, parse_mode: Optional[str] = None
+        self,
+        chat_id: str,
+        local_file_paths: List[str],
+        caption: Optional[str] = None,
+        parse_mode: Optional[str] = None,
+        upload_tokens: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Отправить несколько фото в одном сообщении (альбом).
@@ -924,6 +1104,8 @@ class MaxAPIClient:
             chat_id: ID канала в MAX
             local_file_paths: Список путей к локальным файлам фото (без ограничений по количеству)
             caption: Подпись к альбому (будет только у первого фото в Telegram)
+            parse_mode: Режим парсинга (HTML, Markdown)
+            upload_tokens: Token уже загруженных файлов (загрузка пропускается)
 
         Returns:
             Информация об отправленном сообщении
@@ -931,25 +1113,9 @@ class MaxAPIClient:
         if not local_file_paths:
             raise APIError("Список файлов пуст")
 
-        # Преобразуем chat_id в правильный формат для query parameter
-        chat_id_value = convert_chat_id(chat_id)
-
         try:
-            # Батчинг загрузок медиа
-            tokens = []
-            batch_size = settings.batch_size_media_uploads
-            for i in range(0, len(local_file_paths), batch_size):
-                batch = local_file_paths[i : i + batch_size]
-                # Параллельная загрузка батча
-                batch_tokens = await asyncio.gather(*[self.upload_file(file_path, "image") for file_path in batch])
-                tokens.extend(batch_tokens)
-                # Адаптивная задержка между батчами
-                if i + batch_size < len(local_file_paths):
-                    await asyncio.sleep(settings.media_upload_delay_photo)
-
-            # Адаптивная задержка обработки (зависит от количества файлов)
-            processing_delay = min(settings.media_processing_delay_photo * (1 + len(tokens) * 0.1), 10.0)  # Максимум 10 секунд
-            await asyncio.sleep(processing_delay)
+            # Батчинг загрузок медиа (token переиспользуются между каналами)
+            tokens = upload_tokens or await self.upload_files(local_file_paths, "image")
 
             # Формируем запрос с массивом attachments
             text = caption or ""  # Пустая строка, если нет caption
@@ -960,62 +1126,30 @@ class MaxAPIClient:
 
             await max_api_limiter.wait_if_needed(f"max_api_{chat_id}")
 
-            # Пробуем отправить с повторными попытками при ошибке attachment.not.ready
-            max_retries = 3
-            retry_delay = 2
-
-            for attempt in range(max_retries):
-                try:
-                    response = await retry_with_backoff(self.client.post, f"/messages?chat_id={chat_id_value}", json=data)
-                    response.raise_for_status()
-                    result = response.json()
-
-                    # Проверяем на ошибку attachment.not.ready
-                    if "error" in result or "errors" in result:
-                        error_msg = str(result.get("error", result.get("errors", "")))
-                        if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                            if attempt < max_retries - 1:
-                                logger.warning(f"attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay)
-                                await asyncio.sleep(retry_delay)
-                                retry_delay *= 2  # Увеличиваем задержку
-                                continue
-
-                    logger.info(
-                        "photos_sent",
-                        chat_id=chat_id,
-                        photos_count=len(tokens),
-                        message_id=result.get("message_id"),
-                        result=result,
-                    )
-                    return result
-                except httpx.HTTPStatusError as e:
-                    if e.response:
-                        try:
-                            error_data = e.response.json()
-                            error_msg = str(error_data)
-                            if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                if attempt < max_retries - 1:
-                                    logger.warning(f"attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay)
-                                    await asyncio.sleep(retry_delay)
-                                    retry_delay *= 2
-                                    continue
-                        except:
-                            pass
-                    if attempt == max_retries - 1:
-                        raise
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    logger.warning(f"retry_after_error", attempt=attempt + 1, error=str(e))
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2
+            # Первая попытка сразу, повторные - по расписанию готовности вложений
+            result = await self.send_with_attachments(chat_id, data, tokens, "image", "photos")
+            logger.info(
+                "photos_sent",
+                chat_id=chat_id,
+                photos_count=len(tokens),
+                message_id=result.get("message_id"),
+                result=result,
+            )
+            return result
 
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_photos", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке фото: {e}")
 
     async def send_videos(
-        self, chat_id: str, local_file_paths: List[str], caption: Optional[str] = None, parse_mode: Optional[str] = None
+        self,
+        chat_id: str,
+        local_file_paths: List[str],
+        caption: Optional[str] = None,
+        parse_mode: Optional[str] = None,
+        upload_tokens: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Отправить несколько видео в одном сообщении (альбом).
@@ -1028,6 +1162,7 @@ class MaxAPIClient:
             local_file_paths: Список путей к локальным файлам видео (без ограничений по количеству)
             caption: Подпись к альбому
             parse_mode: Режим парсинга (HTML, Markdown)
+            upload_tokens: Token уже загруженных файлов (загрузка пропускается)
 
         Returns:
             Информация об отправленном сообщении
@@ -1035,27 +1170,9 @@ class MaxAPIClient:
         if not local_file_paths:
             raise APIError("Список файлов пуст")
 
-        # Преобразуем chat_id в правильный формат для query parameter
-        chat_id_value = convert_chat_id(chat_id)
-
         try:
-            # Батчинг загрузок медиа
-            tokens = []
-            batch_size = settings.batch_size_media_uploads
-            for i in range(0, len(local_file_paths), batch_size):
-                batch = local_file_paths[i : i + batch_size]
-                # Параллельная загрузка батча
-                batch_tokens = await asyncio.gather(*[self.upload_file(file_path, "video") for file_path in batch])
-                tokens.extend(batch_tokens)
-                # Адаптивная задержка между батчами (для видео больше)
-                if i + batch_size < len(local_file_paths):
-                    await asyncio.sleep(settings.media_upload_delay_video)
-
-            # Адаптивная задержка обработки (зависит от количества файлов)
-            processing_delay = min(
-                settings.media_processing_delay_video * (1 + len(tokens) * 0.15), 15.0  # Максимум 15 секунд для видео
-            )
-            await asyncio.sleep(processing_delay)
+            # Батчинг загрузок медиа (token переиспользуются между каналами)
+            tokens = upload_tokens or await self.upload_files(local_file_paths, "video")
 
             # Формируем запрос с массивом attachments
             text = caption or ""  # Пустая строка, если нет caption
@@ -1066,57 +1183,16 @@ class MaxAPIClient:
 
             await max_api_limiter.wait_if_needed(f"max_api_{chat_id}")
 
-            # Пробуем отправить с повторными попытками при ошибке attachment.not.ready
-            max_retries = 5  # Для видео больше попыток
-            retry_delay = 3  # Больше задержка для видео
-
-            for attempt in range(max_retries):
-                try:
-                    response = await retry_with_backoff(self.client.post, f"/messages?chat_id={chat_id_value}", json=data)
-                    response.raise_for_status()
-                    result = response.json()
-
-                    # Проверяем на ошибку attachment.not.ready
-                    if "error" in result or "errors" in result:
-                        error_msg = str(result.get("error", result.get("errors", "")))
-                        if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                            if attempt < max_retries - 1:
-                                logger.warning(f"videos_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay)
-                                await asyncio.sleep(retry_delay)
-                                retry_delay *= 2  # Увеличиваем задержку
-                                continue
-
-                    logger.info(
-                        "videos_sent",
-                        chat_id=chat_id,
-                        videos_count=len(tokens),
-                        message_id=result.get("message_id"),
-                        result=result,
-                    )
-                    return result
-                except httpx.HTTPStatusError as e:
-                    if e.response:
-                        try:
-                            error_data = e.response.json()
-                            error_msg = str(error_data)
-                            if "attachment.not.ready" in error_msg.lower() or "not.ready" in error_msg.lower():
-                                if attempt < max_retries - 1:
-                                    logger.warning(
-                                        f"videos_attachment_not_ready_retry", attempt=attempt + 1, delay=retry_delay
-                                    )
-                                    await asyncio.sleep(retry_delay)
-                                    retry_delay *= 2
-                                    continue
-                        except:
-                            pass
-                    if attempt == max_retries - 1:
-                        raise
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    logger.warning(f"videos_retry_after_error", attempt=attempt + 1, error=str(e))
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2
+            # Первая попытка сразу, повторные - по расписанию готовности вложений
+            result = await self.send_with_attachments(chat_id, data, tokens, "video", "videos")
+            logger.info(
+                "videos_sent",
+                chat_id=chat_id,
+                videos_count=len(tokens),
+                message_id=result.get("message_id"),
+                result=result,
+            )
+            return result
 
         except httpx.HTTPStatusError as e:
             error_response = None
@@ -1145,6 +1221,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_send_videos", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при отправке видео: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_send_videos", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при отправке видео: {e}")
@@ -1193,6 +1271,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_get_chat", chat_id=chat_id, error=str(e))
             raise APIError(f"Ошибка сети при получении информации о чате: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_get_chat", chat_id=chat_id, error=str(e))
             raise APIError(f"Неожиданная ошибка при получении информации о чате: {e}")
@@ -1233,6 +1313,8 @@ class MaxAPIClient:
         except httpx.RequestError as e:
             logger.error("failed_to_get_chats", error=str(e))
             raise APIError(f"Ошибка сети при получении списка чатов: {e}")
+        except APIError:
+            raise
         except Exception as e:
             logger.error("failed_to_get_chats", error=str(e))
             raise APIError(f"Неожиданная ошибка при получении списка чатов: {e}")
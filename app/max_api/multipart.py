@@ -0,0 +1,97 @@
+"""Потоковое multipart/form-data тело для загрузки файлов в MAX."""
+
+import asyncio
+import os
+import uuid
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+# Размер блока чтения файла (байты)
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class MultipartFileStream(httpx.AsyncByteStream):
+    """
+    multipart/form-data тело с одним файловым полем, отдаваемое блоками.
+
+    Файл читается фиксированными блоками в отдельном потоке, поэтому память
+    не зависит от размера видео и чтение с диска не блокирует event loop.
+    Небольшие файлы можно передать уже загруженными в память (data).
+    Длина тела известна заранее, запрос уходит с Content-Length (без chunked).
+    """
+
+    def __init__(
+        self,
+        field_name: str,
+        filename: str,
+        content_type: str,
+        file_path: Optional[str] = None,
+        data: Optional[bytes] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        Инициализация потока.
+
+        Args:
+            field_name: Имя поля формы
+            filename: Имя файла в заголовке части
+            content_type: MIME-тип файла
+            file_path: Путь к файлу на диске
+            data: Содержимое файла в памяти (вместо file_path)
+            chunk_size: Размер блока чтения (байты)
+        """
+        if (file_path is None) == (data is None):
+            raise ValueError("Нужно передать либо file_path, либо data")
+
+        self.file_path = file_path
+        self.data = data
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self.bytes_sent = 0
+
+        safe_filename = filename.replace('"', "%22")
+        self._preamble = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{safe_filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode()
+        self.file_size = len(data) if data is not None else os.path.getsize(file_path)
+
+    @property
+    def content_length(self) -> int:
+        """Полная длина тела запроса в байтах."""
+        return len(self._preamble) + self.file_size + len(self._epilogue)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Заголовки для запроса с этим телом."""
+        return {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}",
+            "Content-Length": str(self.content_length),
+        }
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        self.bytes_sent = 0
+        yield self._preamble
+
+        if self.data is not None:
+            view = memoryview(self.data)
+            for offset in range(0, len(view), self.chunk_size):
+                chunk = view[offset : offset + self.chunk_size]
+                self.bytes_sent += len(chunk)
+                yield bytes(chunk)
+        else:
+            f = await asyncio.to_thread(open, self.file_path, "rb")
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(f.read, self.chunk_size)
+                    if not chunk:
+                        break
+                    self.bytes_sent += len(chunk)
+                    yield chunk
+            finally:
+                f.close()
+
+        yield self._epilogue
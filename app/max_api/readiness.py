@@ -0,0 +1,133 @@
+"""Адаптивное ожидание обработки загруженных вложений на стороне MAX."""
+
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from app.utils.cache import get_cache, set_cache
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics_collector
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+# Границы интервалов размера вложений (MB)
+SIZE_BUCKETS_MB = (1, 10, 50)
+
+# Квантили времени готовности, на которые назначаются повторные попытки
+READINESS_QUANTILES = (0.5, 0.75, 0.9, 0.99)
+
+
+def size_bucket(size_bytes: Optional[int]) -> str:
+    """
+    Определить интервал размера вложения.
+
+    Args:
+        size_bytes: Размер в байтах (None - неизвестен)
+
+    Returns:
+        Имя интервала, например "le10mb"
+    """
+    if size_bytes is None:
+        return "unknown"
+    for limit in SIZE_BUCKETS_MB:
+        if size_bytes <= limit * 1024 * 1024:
+            return f"le{limit}mb"
+    return f"gt{SIZE_BUCKETS_MB[-1]}mb"
+
+
+class AttachmentReadiness:
+    """
+    Наблюдаемое время готовности вложений по (тип медиа, интервал размера).
+
+    Время готовности - интервал от загрузки файла до первой успешной отправки
+    сообщения с ним. Отправка выполняется сразу, а после attachment.not.ready
+    следующие попытки назначаются на квантили наблюдений (от момента загрузки).
+    Пока наблюдений мало, используется расписание от media_processing_delay_*.
+    Наблюдения хранятся в кэше (Redis) и переживают перезапуск.
+    """
+
+    def __init__(self):
+        self._samples: Dict[str, Deque[float]] = {}
+        self._unsaved: Dict[str, int] = {}
+
+    @staticmethod
+    def _key(media_type: str, size_bytes: Optional[int]) -> str:
+        """Ключ наблюдений."""
+        return f"{media_type}:{size_bucket(size_bytes)}"
+
+    async def _get_samples(self, key: str) -> Deque[float]:
+        """Получить наблюдения (при первом обращении - из кэша)."""
+        samples = self._samples.get(key)
+        if samples is None:
+            stored = await get_cache(f"max_api:attachment_readiness:{key}")
+            samples = deque(stored if isinstance(stored, list) else [], maxlen=settings.attachment_readiness_max_samples)
+            self._samples[key] = samples
+        return samples
+
+    async def schedule(self, media_type: str, size_bytes: Optional[int]) -> List[float]:
+        """
+        Получить расписание повторных попыток.
+
+        Args:
+            media_type: Тип вложения (image, video, file, mixed)
+            size_bytes: Суммарный размер вложений (None - неизвестен)
+
+        Returns:
+            Возрастающий список времени от загрузки (секунды), к которому
+            назначаются повторные попытки
+        """
+        samples = await self._get_samples(self._key(media_type, size_bytes))
+        if len(samples) < settings.attachment_readiness_min_samples:
+            default = (
+                settings.media_processing_delay_photo if media_type == "image" else settings.media_processing_delay_video
+            )
+            return [default / 2, default, default * 2]
+
+        ordered = sorted(samples)
+        return sorted({ordered[min(int(q * len(ordered)), len(ordered) - 1)] for q in READINESS_QUANTILES})
+
+    async def record(self, media_type: str, size_bytes: Optional[int], ready_after: float) -> None:
+        """
+        Записать наблюдение времени готовности.
+
+        Args:
+            media_type: Тип вложения
+            size_bytes: Суммарный размер вложений
+            ready_after: Время от загрузки до успешной отправки (секунды)
+        """
+        key = self._key(media_type, size_bytes)
+        samples = await self._get_samples(key)
+        samples.append(round(ready_after, 3))
+        if metrics_collector.enabled:
+            metrics_collector.record_timing(f"attachment_ready_{media_type}", ready_after)
+
+        # Сохраняем пачками, чтобы не писать в Redis на каждую отправку
+        self._unsaved[key] = self._unsaved.get(key, 0) + 1
+        if self._unsaved[key] >= settings.attachment_readiness_save_every:
+            self._unsaved[key] = 0
+            await set_cache(
+                f"max_api:attachment_readiness:{key}", list(samples), ttl=settings.attachment_readiness_ttl
+            )
+            logger.debug("attachment_readiness_saved", key=key, samples=len(samples))
+
+
+def next_retry_delay(schedule: List[float], age: float, previous_delay: float) -> float:
+    """
+    Рассчитать паузу до следующей попытки после attachment.not.ready.
+
+    Args:
+        schedule: Расписание из AttachmentReadiness.schedule
+        age: Время с момента загрузки вложений (секунды)
+        previous_delay: Предыдущая пауза (0 - первая)
+
+    Returns:
+        Пауза в секундах (после конца расписания - удвоение предыдущей)
+    """
+    min_delay = settings.attachment_readiness_min_delay
+    for target in schedule:
+        if target - age >= min_delay:
+            return target - age
+    return max(previous_delay * 2, schedule[-1] if schedule else min_delay, min_delay)
+
+
+# Глобальный экземпляр
+attachment_readiness = AttachmentReadiness()
@@ -4,7 +4,8 @@ from app.models.user import User
 from app.models.telegram_channel import TelegramChannel
 from app.models.max_channel import MaxChannel
 from app.models.crossposting_link import CrosspostingLink
-from app.models.message_log import MessageLog
+from app.models.message_log import MessageLog, MessageLogKey
+from app.models.message_stat import MessageStat
 from app.models.failed_message import FailedMessage
 from app.models.audit_log import AuditLog
 
@@ -14,6 +15,8 @@ __all__ = [
     "MaxChannel",
     "CrosspostingLink",
     "MessageLog",
+    "MessageLogKey",
+    "MessageStat",
     "FailedMessage",
     "AuditLog",
 ]
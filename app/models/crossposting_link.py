@@ -41,6 +41,13 @@ class CrosspostingLink(Base):
         Index("idx_max_channel", "max_channel_id"),
         Index("idx_is_enabled", "is_enabled"),
         Index("idx_subscription_status", "subscription_status"),
+        # Триграммный индекс для поиска в админке (расширение pg_trgm)
+        Index(
+            "idx_crossposting_links_payment_trgm",
+            "yookassa_payment_id",
+            postgresql_using="gin",
+            postgresql_ops={"yookassa_payment_id": "gin_trgm_ops"},
+        ),
     )
 
     # Relationships
@@ -22,7 +22,10 @@ class FailedMessage(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     resolved_at = Column(DateTime, nullable=True, index=True)
 
-    __table_args__ = (Index("idx_retry", "retry_count", "last_retry_at"),)
+    __table_args__ = (
+        Index("idx_retry", "retry_count", "last_retry_at"),
+        Index("idx_failed_created", "created_at", "id"),  # Keyset-пагинация в админке
+    )
 
     # Relationships
     crossposting_link = relationship("CrosspostingLink", back_populates="failed_messages")
@@ -1,35 +1,58 @@
 """Модель лога сообщений."""
 
-from sqlalchemy import Column, BigInteger, String, Text, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy import Column, BigInteger, String, Text, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from config.database import Base
 
 
 class MessageLog(Base):
-    """Лог отправленных сообщений."""
+    """
+    Лог отправленных сообщений.
+
+    Таблица секционирована по месяцам (RANGE по created_at), поэтому created_at
+    входит в первичный ключ. Секции создает и отсоединяет app.core.log_partitions.
+    """
 
     __tablename__ = "messages_log"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True)
     crossposting_link_id = Column(BigInteger, ForeignKey("crossposting_links.id", ondelete="CASCADE"), nullable=False)
-    telegram_message_id = Column(BigInteger, nullable=False, index=True)
+    telegram_message_id = Column(BigInteger, nullable=False)
     max_message_id = Column(String, nullable=True)
-    status = Column(String, nullable=False, index=True)  # 'pending', 'success', 'failed'
+    status = Column(String, nullable=False)  # 'pending', 'success', 'failed'
     error_message = Column(Text, nullable=True)
     message_type = Column(String, nullable=True)  # 'text', 'photo', 'video', etc.
     file_size = Column(BigInteger, nullable=True)
     processing_time_ms = Column(Integer, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True)  # Ключ секционирования
     sent_at = Column(DateTime, nullable=True)
 
-    # Unique constraint для предотвращения дублирования отправок
+    # Уникальность (связь, сообщение) на секционированной таблице обеспечивает MessageLogKey
     __table_args__ = (
-        UniqueConstraint("crossposting_link_id", "telegram_message_id", name="uq_link_message"),
         Index("idx_status", "status"),
         Index("idx_created_at", "created_at"),
         Index("idx_link_created", "crossposting_link_id", "created_at"),
+        Index("idx_link_message", "crossposting_link_id", "telegram_message_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     # Relationships
     crossposting_link = relationship("CrosspostingLink", back_populates="message_logs")
+
+
+class MessageLogKey(Base):
+    """
+    Ключи логов сообщений для проверки на дубликат.
+
+    Уникальный индекс секционированной таблицы обязан включать ключ секционирования,
+    поэтому уникальность (связь, сообщение Telegram) хранится в этой
+    несекционированной таблице вместе с created_at лога - по нему запись лога
+    находится в своей секции.
+    """
+
+    __tablename__ = "messages_log_keys"
+
+    crossposting_link_id = Column(BigInteger, ForeignKey("crossposting_links.id", ondelete="CASCADE"), primary_key=True)
+    telegram_message_id = Column(BigInteger, primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)  # created_at записи в messages_log
@@ -0,0 +1,26 @@
+"""Модель агрегированной статистики отправок."""
+
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey, Index
+from config.database import Base
+
+
+class MessageStat(Base):
+    """
+    Статистика отправок по связи за час или день.
+
+    Счетчики отражают текущие статусы логов, созданных в этом интервале
+    (по MessageLog.created_at), и обновляются вместе с записью логов.
+    """
+
+    __tablename__ = "message_stats"
+
+    crossposting_link_id = Column(BigInteger, ForeignKey("crossposting_links.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(String, primary_key=True)  # 'hour', 'day'
+    bucket_start = Column(DateTime, primary_key=True)  # Начало часа или дня (UTC)
+    success_count = Column(BigInteger, default=0, nullable=False)
+    failed_count = Column(BigInteger, default=0, nullable=False)
+    pending_count = Column(BigInteger, default=0, nullable=False)
+    processing_time_ms = Column(BigInteger, default=0, nullable=False)  # Суммарное время обработки
+    bytes_sent = Column(BigInteger, default=0, nullable=False)  # Суммарный размер отправленных файлов
+
+    __table_args__ = (Index("idx_message_stats_period_bucket", "period", "bucket_start"),)
@@ -19,6 +19,22 @@ class TelegramChannel(Base):
     bot_added_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
 
+    # Триграммные индексы для поиска в админке (расширение pg_trgm)
+    __table_args__ = (
+        Index(
+            "idx_telegram_channels_title_trgm",
+            "channel_title",
+            postgresql_using="gin",
+            postgresql_ops={"channel_title": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_telegram_channels_username_trgm",
+            "channel_username",
+            postgresql_using="gin",
+            postgresql_ops={"channel_username": "gin_trgm_ops"},
+        ),
+    )
+
     # Relationships
     user = relationship("User", back_populates="telegram_channels")
     crossposting_links = relationship("CrosspostingLink", back_populates="telegram_channel", cascade="all, delete-orphan")
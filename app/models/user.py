@@ -1,6 +1,6 @@
 """Модель пользователя."""
 
-from sqlalchemy import Column, BigInteger, String, DateTime, Boolean
+from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from config.database import Base
@@ -19,6 +19,22 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Триграммные индексы для поиска в админке (расширение pg_trgm)
+    __table_args__ = (
+        Index(
+            "idx_users_telegram_username_trgm",
+            "telegram_username",
+            postgresql_using="gin",
+            postgresql_ops={"telegram_username": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+    )
+
     # Relationships
     telegram_channels = relationship("TelegramChannel", back_populates="user", cascade="all, delete-orphan")
     max_channels = relationship("MaxChannel", back_populates="user", cascade="all, delete-orphan")
@@ -101,7 +101,32 @@ class MTProtoReceiver:
             self._last_session_update = time.time()
 
             # Инициализируем обработчик сообщений
+            # В режиме очереди (send_queue_enabled) он только готовит задачи для воркеров app.worker
             self.message_processor = MessageProcessor()
+            logger.info("send_queue_mode", enabled=settings.send_queue_enabled)
+
+            # Загружаем таблицу маршрутизации связей (обновляется по событиям Redis pub/sub)
+            from app.core.link_routing import link_routing
+
+            try:
+                await link_routing.start()
+            except Exception as e:
+                logger.warning("link_routing_start_failed", error=str(e))
+
+            # Таблицы логов (ключи дедупликации, секции, статистика) должны существовать до первой отправки
+            from app.core.log_partitions import ensure_log_storage
+            from app.core.message_stats import ensure_message_stats
+
+            try:
+                await ensure_log_storage()
+                await ensure_message_stats()
+            except Exception as e:
+                logger.error("log_storage_init_failed", error=str(e))
+
+            # Результаты отправки записываются в БД пачками в фоне
+            from app.core.log_writer import message_log_writer
+
+            await message_log_writer.start()
 
             # Запускаем периодическую очистку медиа-файлов
             from app.utils.media_cleanup import periodic_media_cleanup
@@ -222,6 +247,20 @@ class MTProtoReceiver:
             except Exception as e:
                 logger.warning(f"Ошибка при остановке задачи метрик: {e}")
 
+        from app.core.link_routing import link_routing
+        from app.core.log_writer import message_log_writer
+
+        # Обрабатываем собираемые альбомы, пока клиент Telegram еще подключен
+        if self.message_processor:
+            try:
+                await self.message_processor.close()
+            except Exception as e:
+                logger.warning(f"Ошибка при остановке обработчика сообщений: {e}")
+
+        await link_routing.stop()
+        # Записываем накопленные результаты отправки до закрытия соединений
+        await message_log_writer.stop()
+
         # Останавливаем задачу keep-alive сессии
         if self.session_keepalive_task:
             try:
@@ -9,6 +9,7 @@ from sqlalchemy.orm import selectinload
 
 from app.models.user import User
 from app.models.crossposting_link import CrosspostingLink
+from app.core.link_routing import notify_links_changed
 from config.database import async_session_maker
 from config.settings import settings
 from app.utils.logger import get_logger
@@ -45,6 +46,7 @@ async def check_expired_subscriptions():
             return
 
         deactivated_count = 0
+        changed_channel_ids = set()
         for link in expired_links:
             # Проверяем, что пользователь не VIP (на случай если статус изменился)
             if link.user and link.user.is_vip:
@@ -54,11 +56,16 @@ async def check_expired_subscriptions():
             link.is_enabled = False
             link.subscription_status = "expired"
             deactivated_count += 1
+            changed_channel_ids.add(link.telegram_channel_id)
             logger.info("subscription_deactivated", link_id=link.id, user_id=link.user_id)
 
         await session.commit()
         logger.info("expired_subscriptions_processed", count=deactivated_count)
 
+    # Отключенные связи убираем из таблиц маршрутизации в receiver и воркерах
+    for telegram_channel_id in changed_channel_ids:
+        await notify_links_changed(telegram_channel_id)
+
 
 async def send_renewal_notifications(bot_instance=None):
     """Отправить уведомления о необходимости продления подписки."""
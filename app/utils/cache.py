@@ -1,13 +1,112 @@
-"""Утилиты для работы с кэшем Redis."""
+"""Утилиты для работы с кэшем: локальный LRU в процессе + Redis."""
 
-from typing import Optional, Any
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, Tuple
 import json
 from config.redis_client import get_redis
 from config.settings import settings
 from app.utils.logger import get_logger
+from app.utils.metrics import metrics_collector
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = get_logger(__name__)
 
+# Значение в Redis, означающее закэшированное отсутствие данных (negative caching)
+_NEGATIVE_MARKER = "__none__"
+
+
+def _dumps(value: Any) -> str:
+    """Сериализовать значение для Redis (orjson, если установлен)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, default=str)
+
+
+def _loads(value: str) -> Any:
+    """Десериализовать значение из Redis."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def _record(event: str) -> None:
+    """Записать событие кэша в метрики (cache_local_hit, cache_redis_hit, cache_miss, ...)."""
+    if metrics_collector.enabled:
+        metrics_collector.record_timing(event, 0)
+
+
+class LocalCache:
+    """
+    Ограниченный LRU кэш в памяти процесса с TTL на запись.
+
+    Хранит уже десериализованные значения, поэтому их нельзя изменять
+    на месте. TTL короткий: удаление ключа в другом процессе очищает только
+    Redis, локальная копия живет не дольше TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Инициализация кэша.
+
+        Args:
+            max_size: Максимальное количество ключей
+            ttl: Время жизни записи по умолчанию (секунды)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        # ключ -> (время истечения по time.monotonic, значение)
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Получить значение.
+
+        Returns:
+            (найдено, значение)
+        """
+        item = self._data.get(key)
+        if item is None:
+            return False, None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Сохранить значение (не дольше ttl кэша)."""
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            _record("cache_local_eviction")
+        if metrics_collector.enabled:
+            metrics_collector.set_gauge("cache_local_keys", len(self._data))
+
+    def delete(self, key: str) -> None:
+        """Удалить значение."""
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Глобальный экземпляр локального кэша
+local_cache = LocalCache(max_size=settings.local_cache_max_size, ttl=settings.local_cache_ttl)
+
+# Загрузки, выполняющиеся сейчас: ключ -> future с результатом (single-flight)
+_inflight_loads: Dict[str, asyncio.Future] = {}
+
 
 async def get_cache(key: str) -> Optional[Any]:
     """
@@ -19,17 +118,28 @@ async def get_cache(key: str) -> Optional[Any]:
     Returns:
         Значение из кэша или None
     """
+    found, value = local_cache.get(key)
+    if found:
+        _record("cache_local_hit")
+        return value
+
     try:
         redis = await get_redis()
-        value = await redis.get(key)
-        if value:
-            return json.loads(value)
-        return None
+        raw = await redis.get(key)
     except Exception as e:
         logger.error("cache_get_error", key=key, error=str(e))
         # При ошибке Redis возвращаем None, чтобы не ломать работу приложения
         return None
 
+    if not raw or raw == _NEGATIVE_MARKER:
+        _record("cache_miss")
+        return None
+
+    _record("cache_redis_hit")
+    value = _loads(raw)
+    local_cache.set(key, value)
+    return value
+
 
 async def set_cache(key: str, value: Any, ttl: Optional[int] = None) -> None:
     """
@@ -40,27 +150,181 @@ async def set_cache(key: str, value: Any, ttl: Optional[int] = None) -> None:
         value: Значение для кэширования
         ttl: Время жизни в секундах (по умолчанию из настроек)
     """
+    ttl = ttl or settings.redis_cache_ttl
+    local_cache.set(key, value, ttl)
     try:
         redis = await get_redis()
-        ttl = ttl or settings.redis_cache_ttl
-        await redis.setex(key, ttl, json.dumps(value, default=str))
+        await redis.setex(key, ttl, _dumps(value))
     except Exception as e:
         logger.error("cache_set_error", key=key, error=str(e))
         # При ошибке Redis просто логируем, не прерываем работу
 
 
-async def delete_cache(key: str) -> None:
+async def get_or_load_cache(
+    key: str,
+    loader: Callable[[], Awaitable[Optional[Any]]],
+    ttl: Optional[int] = None,
+    negative_ttl: Optional[int] = None,
+) -> Optional[Any]:
     """
-    Удалить значение из кэша.
+    Получить значение из кэша или загрузить его.
+
+    Одновременные промахи по одному ключу в процессе выполняют loader один раз,
+    остальные вызовы ждут его результат. Если loader вернул None, отсутствие
+    данных кэшируется на negative_ttl, чтобы не ходить в источник на каждый запрос.
 
     Args:
         key: Ключ кэша
+        loader: Корутина-функция, загружающая значение (None - данных нет)
+        ttl: Время жизни значения в секундах (по умолчанию из настроек)
+        negative_ttl: Время жизни отсутствия значения (по умолчанию settings.cache_negative_ttl)
+
+    Returns:
+        Значение или None
+    """
+    found, value = local_cache.get(key)
+    if found:
+        _record("cache_local_hit")
+        return value
+
+    inflight = _inflight_loads.get(key)
+    if inflight is not None:
+        _record("cache_load_coalesced")
+        return await asyncio.shield(inflight)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_loads[key] = future
+    try:
+        try:
+            redis = await get_redis()
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.error("cache_get_error", key=key, error=str(e))
+            raw = None
+
+        if raw == _NEGATIVE_MARKER:
+            _record("cache_negative_hit")
+            value = None
+            local_cache.set(key, None, negative_ttl or settings.cache_negative_ttl)
+        elif raw:
+            _record("cache_redis_hit")
+            value = _loads(raw)
+            local_cache.set(key, value)
+        else:
+            _record("cache_miss")
+            value = await loader()
+            if value is None:
+                await _set_negative(key, negative_ttl or settings.cache_negative_ttl)
+            else:
+                await set_cache(key, value, ttl)
+
+        future.set_result(value)
+        return value
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Помечаем исключение как полученное, если никто не ждал загрузку
+        future.exception()
+        raise
+    finally:
+        _inflight_loads.pop(key, None)
+
+
+async def _set_negative(key: str, ttl: int) -> None:
+    """Закэшировать отсутствие значения."""
+    local_cache.set(key, None, ttl)
+    try:
+        redis = await get_redis()
+        await redis.setex(key, ttl, _NEGATIVE_MARKER)
+    except Exception as e:
+        logger.error("cache_set_error", key=key, error=str(e))
+
+
+async def delete_cache(*keys: str) -> bool:
+    """
+    Удалить значения из кэша (несколько ключей - одним запросом).
+
+    Args:
+        keys: Ключи кэша
+
+    Returns:
+        True если был удален хотя бы один ключ
+    """
+    if not keys:
+        return False
+    for key in keys:
+        local_cache.delete(key)
+    try:
+        redis = await get_redis()
+        return bool(await redis.delete(*keys))
+    except Exception as e:
+        logger.error("cache_delete_error", keys=keys, error=str(e))
+        return False
+
+
+async def mget_cache(keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    Получить несколько значений из кэша одним запросом.
+
+    Args:
+        keys: Ключи кэша
+
+    Returns:
+        Словарь {ключ: значение} только для найденных ключей
+    """
+    result = {}
+    missing = []
+    for key in keys:
+        found, value = local_cache.get(key)
+        if found:
+            _record("cache_local_hit")
+            if value is not None:
+                result[key] = value
+        else:
+            missing.append(key)
+    if not missing:
+        return result
+
+    try:
+        redis = await get_redis()
+        values = await redis.mget(missing)
+    except Exception as e:
+        logger.error("cache_mget_error", keys_count=len(missing), error=str(e))
+        return result
+
+    for key, raw in zip(missing, values):
+        if not raw or raw == _NEGATIVE_MARKER:
+            _record("cache_miss")
+            continue
+        _record("cache_redis_hit")
+        result[key] = _loads(raw)
+        local_cache.set(key, result[key])
+    return result
+
+
+async def mset_cache(items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+    """
+    Установить несколько значений в кэш одним запросом (pipeline).
+
+    Args:
+        items: Словарь {ключ: значение}
+        ttl: Время жизни в секундах (по умолчанию из настроек)
     """
+    if not items:
+        return
+    ttl = ttl or settings.redis_cache_ttl
+    for key, value in items.items():
+        local_cache.set(key, value, ttl)
     try:
         redis = await get_redis()
-        await redis.delete(key)
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.setex(key, ttl, _dumps(value))
+            await pipe.execute()
     except Exception as e:
-        logger.error("cache_delete_error", key=key, error=str(e))
+        logger.error("cache_mset_error", keys_count=len(items), error=str(e))
 
 
 def get_channel_cache_key(channel_id: int) -> str:
@@ -2,10 +2,11 @@
 
 import asyncio
 import time
-from typing import Optional, Callable, Any, Type
+from typing import Dict, Optional, Callable, Any, Sequence, Type
 from enum import Enum
+import httpx
 from app.utils.logger import get_logger
-from app.utils.exceptions import APIError
+from app.utils.exceptions import APIError, CircuitOpenError, RateLimitError, ValidationError
 
 logger = get_logger(__name__)
 
@@ -18,11 +19,64 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Тестовый режим
 
 
+class ErrorClass(Enum):
+    """Класс ошибки запроса к внешнему API."""
+
+    PERMANENT = "permanent"  # Повтор не поможет (авторизация, доступ, неверный формат)
+    TRANSIENT = "transient"  # Временный сбой (5xx, таймаут, сеть)
+    THROTTLING = "throttling"  # Превышен лимит запросов (429)
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    """
+    Определить класс ошибки запроса.
+
+    Args:
+        error: Исключение
+
+    Returns:
+        Класс ошибки
+    """
+    if isinstance(error, CircuitOpenError):
+        return ErrorClass.TRANSIENT
+    if isinstance(error, RateLimitError):
+        return ErrorClass.THROTTLING
+    if isinstance(error, ValidationError):
+        return ErrorClass.PERMANENT
+
+    status_code = None
+    if isinstance(error, APIError):
+        status_code = error.status_code
+    elif isinstance(error, httpx.HTTPStatusError) and error.response is not None:
+        status_code = error.response.status_code
+
+    if status_code == 429:
+        return ErrorClass.THROTTLING
+    if status_code is not None and 400 <= status_code < 500 and status_code != 408:
+        return ErrorClass.PERMANENT
+    # 5xx, 408, таймауты и сетевые ошибки
+    return ErrorClass.TRANSIENT
+
+
+def is_permanent_error(error: BaseException) -> bool:
+    """Проверить, что повтор запроса после ошибки бесполезен."""
+    return classify_error(error) == ErrorClass.PERMANENT
+
+
 class CircuitBreaker:
-    """Circuit breaker для защиты от каскадных сбоев."""
+    """
+    Circuit breaker для защиты от каскадных сбоев.
+
+    Размыкается только временными ошибками (см. classify_error): постоянные
+    ошибки и превышение лимита означают, что сервис отвечает, и не учитываются.
+    """
 
     def __init__(
-        self, failure_threshold: int = 5, recovery_timeout: int = 60, expected_exception: Type[Exception] = Exception
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: int = 60,
+        expected_exception: Type[Exception] = Exception,
+        name: str = "default",
     ):
         """
         Инициализация circuit breaker.
@@ -31,10 +85,12 @@ class CircuitBreaker:
             failure_threshold: Количество ошибок для открытия
             recovery_timeout: Время восстановления в секундах
             expected_exception: Тип исключения для отслеживания
+            name: Имя (ключ) для логов
         """
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.expected_exception = expected_exception
+        self.name = name
 
         self.state = CircuitState.CLOSED
         self.failure_count = 0
@@ -55,28 +111,38 @@ class CircuitBreaker:
             Результат вызова функции
 
         Raises:
-            APIError: Если circuit breaker открыт
+            CircuitOpenError: Если circuit breaker открыт
         """
+        await self._before_call()
+
+        # Выполняем запрос
+        try:
+            result = await func(*args, **kwargs)
+        except self.expected_exception as e:
+            await self._on_error(e)
+            raise
+        await self._on_success()
+        return result
+
+    async def _before_call(self) -> None:
+        """Проверить состояние перед запросом (OPEN -> HALF_OPEN по истечении recovery_timeout)."""
         async with self.lock:
-            # Проверяем состояние
             if self.state == CircuitState.OPEN:
                 if time.time() - (self.last_failure_time or 0) >= self.recovery_timeout:
                     # Переходим в half-open для теста
                     self.state = CircuitState.HALF_OPEN
                     self.success_count = 0
-                    logger.info("circuit_breaker_half_open")
+                    logger.info("circuit_breaker_half_open", breaker=self.name)
                 else:
                     # Circuit открыт, блокируем запрос
-                    raise APIError(f"Circuit breaker открыт. Попробуйте через {self.recovery_timeout} секунд")
+                    raise CircuitOpenError(
+                        f"Circuit breaker {self.name} открыт. Попробуйте через {self.recovery_timeout} секунд"
+                    )
 
-        # Выполняем запрос
-        try:
-            result = await func(*args, **kwargs)
-            await self._on_success()
-            return result
-        except self.expected_exception as e:
+    async def _on_error(self, error: BaseException) -> None:
+        """Учесть ошибку запроса (только временные ошибки)."""
+        if classify_error(error) == ErrorClass.TRANSIENT:
             await self._on_failure()
-            raise
 
     async def _on_success(self):
         """Обработка успешного запроса."""
@@ -87,7 +153,7 @@ class CircuitBreaker:
                     self.state = CircuitState.CLOSED
                     self.failure_count = 0
                     self.success_count = 0
-                    logger.info("circuit_breaker_closed")
+                    logger.info("circuit_breaker_closed", breaker=self.name)
             elif self.state == CircuitState.CLOSED:
                 # Сбрасываем счетчик ошибок при успехе
                 self.failure_count = 0
@@ -101,11 +167,18 @@ class CircuitBreaker:
             if self.state == CircuitState.HALF_OPEN:
                 # В half-open любая ошибка открывает circuit
                 self.state = CircuitState.OPEN
-                logger.warning("circuit_breaker_opened_from_half_open", failure_count=self.failure_count)
+                logger.warning(
+                    "circuit_breaker_opened_from_half_open", breaker=self.name, failure_count=self.failure_count
+                )
             elif self.state == CircuitState.CLOSED:
                 if self.failure_count >= self.failure_threshold:
                     self.state = CircuitState.OPEN
-                    logger.error("circuit_breaker_opened", failure_count=self.failure_count, threshold=self.failure_threshold)
+                    logger.error(
+                        "circuit_breaker_opened",
+                        breaker=self.name,
+                        failure_count=self.failure_count,
+                        threshold=self.failure_threshold,
+                    )
 
     def get_state(self) -> CircuitState:
         """Получить текущее состояние."""
@@ -120,4 +193,85 @@ class CircuitBreaker:
             self.failure_count = 0
             self.success_count = 0
             self.last_failure_time = None
-            logger.info("circuit_breaker_reset")
+            logger.info("circuit_breaker_reset", breaker=self.name)
+
+
+class CircuitBreakerRegistry:
+    """
+    Набор circuit breaker по ключам (создаются при первом обращении).
+
+    Запрос проходит через несколько breaker сразу, например через breaker
+    MAX канала и breaker класса endpoint: сбой одного канала не блокирует
+    остальные, а массовые сбои endpoint размыкают его для всех каналов.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60, max_size: int = 10000):
+        """
+        Инициализация реестра.
+
+        Args:
+            failure_threshold: Количество ошибок для открытия каждого breaker
+            recovery_timeout: Время восстановления в секундах
+            max_size: Максимальное количество breaker (при превышении удаляются замкнутые)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_size = max_size
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        """
+        Получить breaker по ключу.
+
+        Args:
+            key: Ключ (например, "channel:<id>" или "endpoint:messages")
+
+        Returns:
+            Circuit breaker
+        """
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            if len(self._breakers) >= self.max_size:
+                # Замкнутые breaker без ошибок не хранят состояния - их можно пересоздать
+                self._breakers = {
+                    k: b
+                    for k, b in self._breakers.items()
+                    if b.state != CircuitState.CLOSED or b.failure_count
+                }
+            breaker = CircuitBreaker(self.failure_threshold, self.recovery_timeout, name=key)
+            self._breakers[key] = breaker
+        return breaker
+
+    async def call(self, keys: Sequence[str], func: Callable, *args, **kwargs) -> Any:
+        """
+        Вызвать функцию через breaker всех указанных ключей.
+
+        Args:
+            keys: Ключи breaker
+            func: Функция для вызова
+            *args: Аргументы функции
+            **kwargs: Ключевые аргументы функции
+
+        Returns:
+            Результат вызова функции
+
+        Raises:
+            CircuitOpenError: Если открыт хотя бы один из breaker
+        """
+        breakers = [self.get(key) for key in keys]
+        for breaker in breakers:
+            await breaker._before_call()
+
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            for breaker in breakers:
+                await breaker._on_error(e)
+            raise
+        for breaker in breakers:
+            await breaker._on_success()
+        return result
+
+    def get_open(self) -> Dict[str, CircuitState]:
+        """Получить незамкнутые breaker (ключ -> состояние)."""
+        return {key: b.state for key, b in self._breakers.items() if b.state != CircuitState.CLOSED}
@@ -0,0 +1,157 @@
+"""Срок отправки и бюджет повторных попыток, общие для всех уровней отправки."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics_collector
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+
+class SendDeadline:
+    """
+    Срок и бюджет повторных попыток отправки.
+
+    Устанавливается через deadline_scope (пост в process_message, связь в
+    process_link) и доступен нижним уровням (MaxAPIClient, retry_with_backoff)
+    через contextvars, без передачи параметром. Перед каждым повтором уровень
+    вызывает allow_retry: повтор не выполняется, если бюджет исчерпан или
+    пауза не укладывается в оставшееся время.
+
+    Вложенный срок (связь внутри поста) списывает повторы и из бюджета внешнего,
+    поэтому все связи поста расходуют один бюджет.
+    """
+
+    def __init__(self, timeout: float, retry_budget: int, name: str, parent: Optional["SendDeadline"] = None):
+        """
+        Инициализация срока.
+
+        Args:
+            timeout: Время на отправку (секунды)
+            retry_budget: Количество повторных попыток на всех уровнях
+            name: Имя области (для логов)
+            parent: Внешний срок, из бюджета которого также списываются повторы
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.retries_left = retry_budget
+        self.name = name
+        self.parent = parent
+
+    def remaining(self) -> float:
+        """Оставшееся время (секунды)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def _chain(self) -> Iterator["SendDeadline"]:
+        """Этот срок и все внешние."""
+        deadline: Optional[SendDeadline] = self
+        while deadline is not None:
+            yield deadline
+            deadline = deadline.parent
+
+    def allow_retry(self, delay: float, layer: str) -> bool:
+        """
+        Проверить, можно ли повторить попытку после паузы, и списать повтор из бюджета.
+
+        Args:
+            delay: Пауза перед повтором (секунды)
+            layer: Уровень, выполняющий повтор (для логов и метрик)
+
+        Returns:
+            True если повтор разрешен
+        """
+        retries_left = min(deadline.retries_left for deadline in self._chain())
+        if retries_left <= 0 or delay >= self.remaining():
+            logger.warning(
+                "retry_budget_exhausted",
+                scope=self.name,
+                layer=layer,
+                retries_left=retries_left,
+                remaining=round(self.remaining(), 2),
+                delay=round(delay, 2),
+            )
+            if metrics_collector.enabled:
+                metrics_collector.record_value(f"retry_budget_exhausted_{layer}", 1)
+            return False
+        for deadline in self._chain():
+            deadline.retries_left -= 1
+        return True
+
+
+_current_deadline: ContextVar[Optional[SendDeadline]] = ContextVar("send_deadline", default=None)
+
+
+def current_deadline() -> Optional[SendDeadline]:
+    """Получить срок текущей отправки (None вне deadline_scope)."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(timeout: float, retry_budget: Optional[int] = None, name: str = "send") -> Iterator[SendDeadline]:
+    """
+    Установить срок отправки для кода внутри блока (и созданных в нем задач).
+
+    Вложенная область только сужает внешнюю: срок не выходит за срок внешней,
+    повторы списываются и из бюджета внешней (общего для всех вложенных областей).
+
+    Args:
+        timeout: Время на отправку (секунды)
+        retry_budget: Собственное ограничение количества повторных попыток (по умолчанию
+            для вложенной области - без ограничения сверх внешней, для внешней - settings.send_retry_budget)
+        name: Имя области (post, link)
+
+    Yields:
+        Срок отправки
+    """
+    parent = _current_deadline.get()
+    if parent is not None:
+        timeout = min(timeout, parent.remaining())
+        if retry_budget is None:
+            retry_budget = parent.retries_left
+    elif retry_budget is None:
+        retry_budget = settings.send_retry_budget
+    deadline = SendDeadline(timeout, retry_budget, name, parent=parent)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def allow_retry(delay: float, layer: str) -> bool:
+    """
+    Проверить срок текущей отправки перед повтором и записать повтор в метрики.
+
+    Args:
+        delay: Пауза перед повтором (секунды)
+        layer: Уровень, выполняющий повтор (http, send_error, attachment_not_ready)
+
+    Returns:
+        True если повтор разрешен (вне deadline_scope - всегда)
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None and not deadline.allow_retry(delay, layer):
+        return False
+    if metrics_collector.enabled:
+        metrics_collector.record_value(f"send_retry_{layer}", delay)
+    return True
+
+
+def request_timeout(default: float, minimum: float = 1.0) -> float:
+    """
+    Таймаут одного запроса с учетом оставшегося срока отправки.
+
+    Args:
+        default: Таймаут без срока (секунды)
+        minimum: Минимальный таймаут (секунды)
+
+    Returns:
+        Таймаут запроса (секунды)
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return max(minimum, min(default, deadline.remaining()))
@@ -18,6 +18,12 @@ class APIError(CrosspostingError):
         self.response = response
 
 
+class CircuitOpenError(APIError):
+    """Запрос заблокирован разомкнутым circuit breaker."""
+
+    pass
+
+
 class DatabaseError(CrosspostingError):
     """Ошибка базы данных."""
 
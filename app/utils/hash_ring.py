@@ -0,0 +1,59 @@
+"""Консистентное хэширование."""
+
+import bisect
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+
+def stable_hash(key: str) -> int:
+    """
+    Стабильный хэш строки (одинаковый во всех процессах, в отличие от hash()).
+
+    Args:
+        key: Строка
+
+    Returns:
+        64-битное целое
+    """
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Кольцо консистентного хэширования с виртуальными узлами."""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100):
+        """
+        Инициализация кольца.
+
+        Args:
+            nodes: Узлы кольца
+            replicas: Количество виртуальных узлов на один узел
+        """
+        self.replicas = replicas
+        self._ring: List[Tuple[int, str]] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str) -> None:
+        """Добавить узел в кольцо."""
+        for replica in range(self.replicas):
+            bisect.insort(self._ring, (stable_hash(f"{node}#{replica}"), node))
+
+    def remove_node(self, node: str) -> None:
+        """Удалить узел из кольца."""
+        self._ring = [item for item in self._ring if item[1] != node]
+
+    def get_node(self, key: str) -> Optional[str]:
+        """
+        Получить узел, которому принадлежит ключ.
+
+        Args:
+            key: Ключ
+
+        Returns:
+            Узел или None, если кольцо пустое
+        """
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._ring, (stable_hash(key), "")) % len(self._ring)
+        return self._ring[index][1]
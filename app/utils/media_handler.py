@@ -25,6 +25,95 @@ else:
 MEDIA_STORAGE_PATH.mkdir(parents=True, exist_ok=True)
 
 
+def _get_media_object(message: Message, file_type: str):
+    """
+    Получить медиа-объект сообщения по типу файла.
+
+    Args:
+        message: Сообщение с медиа
+        file_type: Тип файла (photo, video, document, audio, voice, sticker)
+
+    Returns:
+        Медиа-объект Pyrogram или None
+    """
+    if file_type == "photo" and message.photo:
+        return message.photo
+    elif file_type == "video" and message.video:
+        return message.video
+    elif file_type == "animation" and message.animation:
+        # GIF приходят как message.animation в Pyrogram
+        return message.animation
+    elif file_type == "document" and message.document:
+        return message.document
+    elif file_type == "audio" and message.audio:
+        return message.audio
+    elif file_type == "voice" and message.voice:
+        return message.voice
+    elif file_type == "sticker" and message.sticker:
+        return message.sticker
+    elif file_type == "video_note" and message.video_note:
+        return message.video_note
+    return None
+
+
+def get_message_file_size(message: Message) -> Optional[int]:
+    """
+    Получить размер медиа-файла сообщения по данным Telegram (без загрузки).
+
+    Args:
+        message: Сообщение
+
+    Returns:
+        Размер в байтах или None, если в сообщении нет медиа
+    """
+    for file_type in ("photo", "video", "animation", "document", "audio", "voice", "sticker", "video_note"):
+        media_obj = _get_media_object(message, file_type)
+        if media_obj is not None:
+            return getattr(media_obj, "file_size", None)
+    return None
+
+
+def _get_file_extension(media_obj, file_type: str) -> str:
+    """
+    Определить расширение файла для медиа-объекта.
+
+    Args:
+        media_obj: Медиа-объект Pyrogram
+        file_type: Тип файла
+
+    Returns:
+        Расширение файла без точки
+    """
+    file_id = getattr(media_obj, "file_id", None)
+
+    # Определяем расширение по типу (приоритет - тип файла, а не file_name)
+    ext_map = {
+        "photo": "jpg",
+        "video": "mp4",
+        "animation": "gif",  # GIF файлы
+        "document": "bin",
+        "audio": "mp3",
+        "voice": "ogg",
+        "sticker": "webp",
+        "video_note": "mp4",  # Video note - это MP4 файл
+    }
+
+    # Сначала пытаемся определить расширение из file_name, если оно есть и валидно
+    file_ext = None
+    if hasattr(media_obj, "file_name") and media_obj.file_name:
+        file_ext = media_obj.file_name.split(".")[-1].lower()
+        # Проверяем, что расширение валидно (не пустое и не равно file_id)
+        if (
+            not file_ext
+            or file_ext == file_id
+            or file_ext not in ["jpg", "jpeg", "png", "gif", "mp4", "mp3", "ogg", "webp", "bin", "pdf", "doc", "docx", "txt"]
+        ):
+            file_ext = None
+
+    # Если не удалось определить из file_name, используем расширение по типу
+    return file_ext or ext_map.get(file_type, "bin")
+
+
 async def download_and_store_media(client: Client, message: Message, file_type: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Скачать медиа-файл из Telegram и сохранить на сервере.
@@ -39,59 +128,13 @@ async def download_and_store_media(client: Client, message: Message, file_type:
     """
     try:
         # Определяем медиа-объект
-        media_obj = None
-        if file_type == "photo" and message.photo:
-            media_obj = message.photo
-        elif file_type == "video" and message.video:
-            media_obj = message.video
-        elif file_type == "animation" and message.animation:
-            # GIF приходят как message.animation в Pyrogram
-            media_obj = message.animation
-        elif file_type == "document" and message.document:
-            media_obj = message.document
-        elif file_type == "audio" and message.audio:
-            media_obj = message.audio
-        elif file_type == "voice" and message.voice:
-            media_obj = message.voice
-        elif file_type == "sticker" and message.sticker:
-            media_obj = message.sticker
-        elif file_type == "video_note" and message.video_note:
-            media_obj = message.video_note
-
+        media_obj = _get_media_object(message, file_type)
         if not media_obj:
             return None, None
 
         # Генерируем уникальное имя файла
         file_id = getattr(media_obj, "file_id", str(uuid.uuid4()))
-
-        # Определяем расширение по типу (приоритет - тип файла, а не file_name)
-        ext_map = {
-            "photo": "jpg",
-            "video": "mp4",
-            "animation": "gif",  # GIF файлы
-            "document": "bin",
-            "audio": "mp3",
-            "voice": "ogg",
-            "sticker": "webp",
-            "video_note": "mp4",  # Video note - это MP4 файл
-        }
-
-        # Сначала пытаемся определить расширение из file_name, если оно есть и валидно
-        file_ext = None
-        if hasattr(media_obj, "file_name") and media_obj.file_name:
-            file_ext = media_obj.file_name.split(".")[-1].lower()
-            # Проверяем, что расширение валидно (не пустое и не равно file_id)
-            if (
-                not file_ext
-                or file_ext == file_id
-                or file_ext
-                not in ["jpg", "jpeg", "png", "gif", "mp4", "mp3", "ogg", "webp", "bin", "pdf", "doc", "docx", "txt"]
-            ):
-                file_ext = None
-
-        # Если не удалось определить из file_name, используем расширение по типу
-        if not file_ext:
-            file_ext = ext_map.get(file_type, "bin")
+        file_ext = _get_file_extension(media_obj, file_type)
 
         # Создаем уникальное имя файла
         unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
@@ -133,6 +176,68 @@ async def download_and_store_media(client: Client, message: Message, file_type:
         raise MediaProcessingError(f"Ошибка загрузки {file_type}: {e}")
 
 
+async def download_media_to_memory(client: Client, message: Message, file_type: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Скачать небольшой медиа-файл из Telegram в память, минуя диск.
+
+    Используется, если включен media_in_memory_enabled и размер файла не больше
+    media_in_memory_max_size_mb. Иначе вызывающий код должен использовать
+    download_and_store_media.
+
+    Args:
+        client: Pyrogram клиент
+        message: Сообщение с медиа
+        file_type: Тип файла (photo, video, document, audio, voice, sticker)
+
+    Returns:
+        Кортеж (содержимое файла, имя файла) или None
+    """
+    if not settings.media_in_memory_enabled:
+        return None
+
+    media_obj = _get_media_object(message, file_type)
+    if not media_obj:
+        return None
+
+    # Размер известен заранее из метаданных Telegram, большие файлы идут через диск
+    file_size = getattr(media_obj, "file_size", None)
+    if not file_size or file_size > settings.media_in_memory_max_size_mb * 1024 * 1024:
+        return None
+
+    try:
+        buffer = await client.download_media(media_obj, in_memory=True)
+        if not buffer:
+            logger.warning("media_in_memory_download_empty", file_type=file_type)
+            return None
+
+        filename = f"{uuid.uuid4().hex}.{_get_file_extension(media_obj, file_type)}"
+        data = buffer.getvalue()
+        logger.info("media_downloaded_in_memory", file_type=file_type, size_mb=round(len(data) / (1024 * 1024), 2))
+        return data, filename
+
+    except Exception as e:
+        logger.warning("media_in_memory_download_failed", file_type=file_type, error=str(e))
+        return None
+
+
+async def store_media_bytes(data: bytes, filename: str) -> Tuple[str, str]:
+    """
+    Сохранить содержимое медиа-файла на диск (fallback для режима в памяти).
+
+    Args:
+        data: Содержимое файла
+        filename: Имя файла
+
+    Returns:
+        Кортеж (публичный URL файла, локальный путь к файлу)
+    """
+    local_file_path = MEDIA_STORAGE_PATH / filename
+    await asyncio.to_thread(local_file_path.write_bytes, data)
+    # Устанавливаем права для чтения nginx (644 = rw-r--r--)
+    os.chmod(local_file_path, 0o644)
+    return f"{settings.media_public_url}/{filename}", str(local_file_path)
+
+
 async def delete_media_file(file_path_or_url: str) -> bool:
     """
     Удалить медиа-файл по локальному пути или публичному URL.
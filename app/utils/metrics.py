@@ -42,6 +42,18 @@ class MetricsCollector:
                 "last_update": None,
             }
         )
+        # Распределения значений (не времени): скорость загрузки, размеры и т.п.
+        self.values: Dict[str, Any] = defaultdict(
+            lambda: {
+                "count": 0,
+                "total": 0.0,
+                "min": float("inf"),
+                "max": 0.0,
+                "last": None,
+            }
+        )
+        # Текущие значения (gauge): размер пулов, число активных ключей и т.п.
+        self.gauges: Dict[str, float] = {}
         self.enabled = settings.enable_metrics
 
     def record_timing(self, operation: str, duration: float, success: bool = True):
@@ -65,6 +77,50 @@ class MetricsCollector:
             metric["errors"] += 1
         metric["last_update"] = datetime.utcnow()
 
+    def record_value(self, name: str, value: float):
+        """
+        Записать значение метрики (count/avg/min/max/last).
+
+        Args:
+            name: Название метрики
+            value: Значение
+        """
+        if not self.enabled:
+            return
+
+        metric = self.values[name]
+        metric["count"] += 1
+        metric["total"] += value
+        metric["min"] = min(metric["min"], value)
+        metric["max"] = max(metric["max"], value)
+        metric["last"] = value
+
+    def get_values(self) -> Dict[str, Any]:
+        """Получить распределения значений."""
+        return {
+            name: {
+                "count": data["count"],
+                "avg": round(data["total"] / data["count"], 3) if data["count"] > 0 else 0,
+                "min": round(data["min"], 3) if data["min"] != float("inf") else 0,
+                "max": round(data["max"], 3),
+                "last": data["last"],
+            }
+            for name, data in self.values.items()
+        }
+
+    def set_gauge(self, name: str, value: float):
+        """
+        Установить текущее значение метрики (gauge).
+
+        Args:
+            name: Название метрики
+            value: Текущее значение
+        """
+        if not self.enabled:
+            return
+
+        self.gauges[name] = value
+
     def get_metrics(self) -> Dict[str, Any]:
         """Получить все метрики."""
         result = {}
@@ -84,6 +140,8 @@ class MetricsCollector:
     def reset(self):
         """Сбросить метрики."""
         self.metrics.clear()
+        self.values.clear()
+        self.gauges.clear()
         logger.info("metrics_reset")
 
     def log_summary(self):
@@ -92,8 +150,8 @@ class MetricsCollector:
             return
 
         metrics = self.get_metrics()
-        if metrics:
-            logger.info("metrics_summary", metrics=metrics)
+        if metrics or self.values or self.gauges:
+            logger.info("metrics_summary", metrics=metrics, values=self.get_values(), gauges=dict(self.gauges))
 
     def get_system_metrics(self) -> Dict[str, Any]:
         """
@@ -166,12 +224,17 @@ class MetricsCollector:
 
     def get_all_metrics(self) -> Dict[str, Any]:
         """
-        Получить все метрики (операционные + системные).
+        Получить все метрики (операционные + значения + gauge + системные).
 
         Returns:
             Словарь со всеми метриками
         """
-        return {"operations": self.get_metrics(), "system": self.get_system_metrics()}
+        return {
+            "operations": self.get_metrics(),
+            "values": self.get_values(),
+            "gauges": dict(self.gauges),
+            "system": self.get_system_metrics(),
+        }
 
 
 # Глобальный экземпляр
@@ -2,33 +2,111 @@
 
 import asyncio
 import time
-from typing import Dict, Optional
-from collections import defaultdict
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from app.utils.logger import get_logger
 from app.utils.metrics import metrics_collector
+from config.settings import settings
 
 logger = get_logger(__name__)
 
+# GCRA в Redis: атомарно проверяет все переданные ключи и резервирует слот в каждом.
+# ARGV: max_wait, затем пары (interval, tolerance) для каждого ключа; все значения в мс.
+# Возвращает время ожидания до слота (мс) или -1, если ожидание больше max_wait.
+# Время берется из Redis (TIME), поэтому все процессы используют общие часы.
+_GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + tonumber(now_parts[2]) / 1000
+local max_wait = tonumber(ARGV[1])
+
+local tats = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local tolerance = tonumber(ARGV[i * 2 + 1])
+    local tat = tonumber(redis.call('GET', key))
+    if not tat or tat < now then
+        tat = now
+    end
+    tats[i] = tat
+    if tat - tolerance - now > wait then
+        wait = tat - tolerance - now
+    end
+end
+
+if max_wait >= 0 and wait > max_wait then
+    return -1
+end
+
+local start = now + wait
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2])
+    local tolerance = tonumber(ARGV[i * 2 + 1])
+    local new_tat = math.max(tats[i], start) + interval
+    redis.call('SET', key, string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now + tolerance) + 1000)
+end
+return math.ceil(wait)
+"""
 
-class RateLimiter:
-    """Rate limiter с sliding window."""
 
-    def __init__(self, max_calls: int, period: float):
+class RateLimiter:
+    """
+    Rate limiter на основе GCRA (generic cell rate algorithm).
+
+    На ключ хранится одно число - теоретическое время следующего запроса (TAT),
+    поэтому проверка выполняется за O(1). Допускается всплеск до max_calls
+    запросов, далее запросы равномерно распределяются по периоду.
+
+    Помимо лимита на ключ (например, канал) можно задать общий лимит на все
+    ключи лимитера (global_max_calls) - он соответствует лимиту API на токен.
+
+    Состояние хранится в Redis, поэтому бот, receiver, воркеры и миграция
+    расходуют один бюджет. При недоступности Redis используется локальное
+    состояние процесса.
+    """
+
+    def __init__(
+        self,
+        max_calls: int,
+        period: float,
+        name: str = "default",
+        global_max_calls: Optional[int] = None,
+        backend: Optional[str] = None,
+    ):
         """
         Инициализация rate limiter.
 
         Args:
-            max_calls: Максимальное количество вызовов
+            max_calls: Максимальное количество вызовов на ключ
             period: Период в секундах
+            name: Имя лимитера (префикс ключей в Redis)
+            global_max_calls: Максимальное количество вызовов на все ключи вместе (None - без общего лимита)
+            backend: "redis" или "memory" (по умолчанию settings.rate_limiter_backend)
         """
         self.max_calls = max_calls
         self.period = period
-        self.calls: Dict[str, list] = defaultdict(list)
-        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.name = name
+        self.global_max_calls = global_max_calls
+        self.backend = backend or settings.rate_limiter_backend
+        # Локальное состояние: ключ бакета -> TAT (time.monotonic), от давно использованных к недавним
+        self.tat: "OrderedDict[str, float]" = OrderedDict()
+        self.max_keys = settings.rate_limiter_max_keys
+        self._script = None
+
+    def _limit(self, max_calls: int) -> Tuple[float, float]:
+        """Интервал между запросами и допустимый всплеск (секунды) для лимита."""
+        interval = self.period / max_calls
+        return interval, self.period - interval
+
+    def _buckets(self, key: str) -> List[Tuple[str, float, float]]:
+        """Бакеты, в которых нужно зарезервировать слот: [(ключ, interval, tolerance)]."""
+        buckets = [(f"{self.name}:{key}", *self._limit(self.max_calls))]
+        if self.global_max_calls:
+            buckets.append((f"{self.name}:__global__", *self._limit(self.global_max_calls)))
+        return buckets
 
     async def acquire(self, key: str = "default") -> bool:
         """
-        Проверить и зарегистрировать вызов.
+        Проверить и зарегистрировать вызов без ожидания.
 
         Args:
             key: Ключ для разделения лимитов
@@ -36,42 +114,119 @@ class RateLimiter:
         Returns:
             True если можно выполнить запрос, False если превышен лимит
         """
-        async with self.locks[key]:
-            now = time.time()
-            # Удаляем старые вызовы
-            self.calls[key] = [call_time for call_time in self.calls[key] if now - call_time < self.period]
-
-            if len(self.calls[key]) >= self.max_calls:
-                # Записываем метрику rate limit hit
-                if metrics_collector.enabled:
-                    metrics_collector.record_timing(f"rate_limit_hit_{key}", 0, success=False)
+        wait_time = await self._reserve(key, max_wait=0.0)
+        if wait_time is None:
+            # Записываем метрику rate limit hit (по имени лимитера: ключей-каналов неограниченно много)
+            if metrics_collector.enabled:
+                metrics_collector.record_timing(f"rate_limit_hit_{self.name}", 0, success=False)
 
-                logger.warning("rate_limit_exceeded", key=key, calls=len(self.calls[key]), max_calls=self.max_calls)
-                return False
-
-            self.calls[key].append(now)
-            return True
+            logger.warning("rate_limit_exceeded", key=key, max_calls=self.max_calls)
+            return False
+        return True
 
     async def wait_if_needed(self, key: str = "default") -> None:
         """
         Подождать если нужно для соблюдения лимита.
 
+        Слот резервируется сразу, поэтому одновременные вызовы ждут разное время,
+        а не просыпаются вместе.
+
         Args:
             key: Ключ для разделения лимитов
         """
-        if not await self.acquire(key):
-            # Вычисляем время до следующего доступного слота
-            async with self.locks[key]:
-                if self.calls[key]:
-                    oldest_call = min(self.calls[key])
-                    wait_time = self.period - (time.time() - oldest_call)
-                    if wait_time > 0:
-                        logger.info("rate_limit_wait", key=key, wait_time=wait_time)
-                        await asyncio.sleep(wait_time)
-                        # Повторная попытка
-                        await self.acquire(key)
+        wait_time = await self._reserve(key)
+        if wait_time:
+            logger.debug("rate_limit_wait", key=key, wait_time=round(wait_time, 3))
+            if metrics_collector.enabled:
+                metrics_collector.record_timing(f"rate_limit_wait_{self.name}", wait_time)
+            await asyncio.sleep(wait_time)
+
+    async def _reserve(self, key: str, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Зарезервировать слот.
+
+        Args:
+            key: Ключ для разделения лимитов
+            max_wait: Максимально допустимое ожидание в секундах (None - без ограничения)
+
+        Returns:
+            Время ожидания до слота (секунды) или None, если ожидание больше max_wait
+        """
+        buckets = self._buckets(key)
+        try:
+            if self.backend == "redis":
+                try:
+                    return await self._reserve_redis(buckets, max_wait)
+                except Exception as e:
+                    logger.warning("rate_limiter_redis_unavailable", key=key, error=str(e))
+            return self._reserve_local(buckets, max_wait)
+        finally:
+            # Ключи в памяти процесса: при backend "redis" - 0 (или ключи, накопленные при недоступности Redis)
+            if metrics_collector.enabled:
+                metrics_collector.set_gauge(f"rate_limiter_{self.name}_active_keys", len(self.tat))
+
+    def _reserve_local(self, buckets: List[Tuple[str, float, float]], max_wait: Optional[float]) -> Optional[float]:
+        """Зарезервировать слот в локальном состоянии процесса."""
+        now = time.monotonic()
+        tats = [max(self.tat.get(bucket, now), now) for bucket, _, _ in buckets]
+        wait_time = max(0.0, *(tat - tolerance - now for tat, (_, _, tolerance) in zip(tats, buckets)))
+        if max_wait is not None and wait_time > max_wait:
+            return None
+
+        start = now + wait_time
+        for tat, (bucket, interval, _) in zip(tats, buckets):
+            self.tat[bucket] = max(tat, start) + interval
+            self.tat.move_to_end(bucket)
+        self._evict(now)
+        return wait_time
+
+    def _evict(self, now: float) -> None:
+        """
+        Удалить неактивные ключи из локального состояния.
+
+        Ключ с TAT в прошлом ничем не отличается от отсутствующего, поэтому такие
+        ключи удаляются без изменения поведения. Сверх max_keys удаляются
+        давно использованные ключи (LRU).
+
+        Args:
+            now: Текущее время (time.monotonic)
+        """
+        evicted = 0
+        while self.tat:
+            bucket, tat = next(iter(self.tat.items()))
+            if tat > now and len(self.tat) <= self.max_keys:
+                break
+            del self.tat[bucket]
+            evicted += 1
+
+        if evicted and metrics_collector.enabled:
+            metrics_collector.record_value(f"rate_limiter_{self.name}_evicted_keys", evicted)
+
+    async def _reserve_redis(self, buckets: List[Tuple[str, float, float]], max_wait: Optional[float]) -> Optional[float]:
+        """Зарезервировать слот в Redis (общий бюджет для всех процессов)."""
+        from config.redis_client import get_redis
+
+        redis = await get_redis()
+        if self._script is None:
+            self._script = redis.register_script(_GCRA_SCRIPT)
+
+        args = [-1 if max_wait is None else max_wait * 1000]
+        for _, interval, tolerance in buckets:
+            args.extend([interval * 1000, tolerance * 1000])
+
+        wait_ms = int(
+            await self._script(keys=[f"rate_limit:{bucket}" for bucket, _, _ in buckets], args=args, client=redis)
+        )
+        if wait_ms < 0:
+            return None
+        return wait_ms / 1000
 
 
 # Глобальные rate limiters
-max_api_limiter = RateLimiter(max_calls=30, period=1.0)  # 30 запросов в секунду
-telegram_api_limiter = RateLimiter(max_calls=20, period=1.0)  # 20 запросов в секунду
+max_api_limiter = RateLimiter(
+    max_calls=settings.max_api_rate_limit,  # запросов в секунду на канал
+    period=1.0,
+    name="max_api",
+    global_max_calls=settings.max_api_global_rate_limit,  # запросов в секунду на токен бота (все процессы)
+)
+telegram_api_limiter = RateLimiter(max_calls=20, period=1.0, name="telegram_api")  # 20 запросов в секунду
@@ -16,6 +16,9 @@ async def retry_with_backoff(
     """
     Повторная попытка выполнения функции с exponential backoff.
 
+    Внутри deadline_scope повтор выполняется, только если он укладывается в срок
+    и бюджет повторов текущей отправки.
+
     Args:
         func: Функция для выполнения
         *args: Аргументы функции
@@ -28,8 +31,11 @@ async def retry_with_backoff(
         Результат выполнения функции
 
     Raises:
-        Последнее исключение после всех попыток
+        Последнее исключение после всех попыток (постоянная ошибка - сразу)
     """
+    from app.utils.circuit_breaker import is_permanent_error
+    from app.utils.deadline import allow_retry
+
     max_attempts = max_attempts or settings.max_retry_attempts
     base_delay = base_delay or settings.retry_base_delay
     max_delay = max_delay or settings.retry_max_delay
@@ -44,12 +50,17 @@ async def retry_with_backoff(
                 return func(*args, **kwargs)
         except Exception as e:
             last_exception = e
-            if attempt < max_attempts:
-                # Exponential backoff with jitter
-                delay = min(base_delay * (2 ** (attempt - 1)) + random.uniform(0, 1), max_delay)
+            if is_permanent_error(e):
+                # Повтор не поможет (авторизация, доступ, неверный формат)
+                logger.warning("retry_skipped_permanent_error", attempt=attempt, error=str(e))
+                raise
+            # Exponential backoff with jitter
+            delay = min(base_delay * (2 ** (attempt - 1)) + random.uniform(0, 1), max_delay)
+            if attempt < max_attempts and allow_retry(delay, "http"):
                 logger.warning("retry_attempt", attempt=attempt, max_attempts=max_attempts, delay=delay, error=str(e))
                 await asyncio.sleep(delay)
             else:
-                logger.error("retry_exhausted", attempts=max_attempts, error=str(e))
+                logger.error("retry_exhausted", attempts=attempt, error=str(e))
+                raise
 
     raise last_exception
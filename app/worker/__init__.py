@@ -0,0 +1 @@
+"""Воркеры отправки сообщений в MAX."""
@@ -0,0 +1,71 @@
+"""Пул процессов воркеров отправки: python -m app.worker [--processes N]."""
+
+import argparse
+import asyncio
+import multiprocessing
+import signal
+import time
+from app.utils.logger import setup_logging, get_logger
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+
+def _run_worker():
+    """Запустить один воркер отправки в текущем процессе."""
+    from app.worker.sender import SenderWorker
+
+    setup_logging()
+    # Завершение по SIGTERM от родительского процесса
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(SenderWorker().run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """Запустить N процессов воркеров и перезапускать упавшие."""
+    parser = argparse.ArgumentParser(description="Воркеры отправки сообщений в MAX")
+    parser.add_argument("--processes", type=int, default=settings.sender_worker_processes, help="Количество процессов")
+    args = parser.parse_args()
+
+    setup_logging()
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    logger.info("sender_pool_starting", processes=args.processes)
+    for _ in range(args.processes):
+        process = context.Process(target=_run_worker, daemon=False)
+        process.start()
+        processes.append(process)
+
+    while not stopping:
+        time.sleep(1)
+        for index, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                logger.warning("sender_worker_process_died", pid=process.pid, exitcode=process.exitcode)
+                replacement = context.Process(target=_run_worker, daemon=False)
+                replacement.start()
+                processes[index] = replacement
+
+    logger.info("sender_pool_stopping", processes=len(processes))
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout=30)
+        if process.is_alive():
+            process.kill()
+
+
+if __name__ == "__main__":
+    main()
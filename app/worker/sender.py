@@ -0,0 +1,239 @@
+"""Воркер отправки: читает задачи из очереди и отправляет их в MAX."""
+
+import asyncio
+import os
+import socket
+from typing import Dict, Optional
+from app.core.link_routing import link_routing
+from app.core.log_partitions import ensure_log_storage
+from app.core.log_writer import message_log_writer
+from app.core.message_processor import MessageProcessor
+from app.core.message_stats import ensure_message_stats
+from app.core.send_queue import send_queue
+from app.utils.hash_ring import HashRing
+from app.utils.logger import get_logger
+from app.utils.media_handler import delete_media_file
+from config.settings import settings
+
+logger = get_logger(__name__)
+
+
+class SenderWorker:
+    """
+    Воркер, обрабатывающий партиции send_queue.
+
+    Партиции распределяются между живыми воркерами консистентным хэшированием,
+    поэтому при добавлении/падении воркера переезжает только небольшая часть
+    партиций. Эксклюзивность чтения партиции обеспечивается арендой в Redis:
+    новый владелец начинает читать партицию только после того, как прежний
+    закончил текущую задачу и освободил аренду (или аренда истекла).
+    """
+
+    def __init__(self, worker_id: Optional[str] = None):
+        """
+        Инициализация воркера.
+
+        Args:
+            worker_id: ID воркера (по умолчанию host-pid)
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.message_processor: Optional[MessageProcessor] = None
+        self._running = False
+        # Партиции, которые сейчас читает воркер: {partition: task}
+        self._partition_tasks: Dict[int, asyncio.Task] = {}
+        # Партиции, которые нужно отдать после текущей задачи
+        self._releasing: set = set()
+        # Количество неудачных попыток обработки задач: {entry_id: attempts}
+        self._failed_attempts: Dict[str, int] = {}
+
+    async def run(self):
+        """Запуск и работа до отмены."""
+        logger.info("sender_worker_starting", worker_id=self.worker_id, partitions=send_queue.partitions)
+        self.message_processor = MessageProcessor()
+        self._running = True
+        try:
+            await link_routing.start()
+        except Exception as e:
+            logger.warning("link_routing_start_failed", worker_id=self.worker_id, error=str(e))
+        # Таблицы логов (ключи дедупликации, секции, статистика) должны существовать до первой отправки
+        try:
+            await ensure_log_storage()
+            await ensure_message_stats()
+        except Exception as e:
+            logger.error("log_storage_init_failed", worker_id=self.worker_id, error=str(e))
+        await message_log_writer.start()
+        try:
+            while self._running:
+                try:
+                    await self._rebalance()
+                except Exception as e:
+                    logger.error("sender_worker_rebalance_error", worker_id=self.worker_id, error=str(e))
+                await asyncio.sleep(settings.sender_worker_heartbeat_seconds)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Остановить воркер и освободить партиции."""
+        if self.message_processor is None:
+            return
+
+        logger.info("sender_worker_stopping", worker_id=self.worker_id)
+        self._running = False
+
+        tasks = list(self._partition_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            for partition in list(self._partition_tasks):
+                await send_queue.release_partition(partition, self.worker_id)
+            await send_queue.unregister(self.worker_id)
+        except Exception as e:
+            logger.warning("sender_worker_unregister_failed", worker_id=self.worker_id, error=str(e))
+        self._partition_tasks = {}
+
+        await link_routing.stop()
+        # Записываем накопленные результаты отправки до выхода
+        await message_log_writer.stop()
+        await self.message_processor.close()
+        self.message_processor = None
+        logger.info("sender_worker_stopped", worker_id=self.worker_id)
+
+    async def _rebalance(self):
+        """Отправить heartbeat и привести набор читаемых партиций к распределению по кольцу."""
+        await send_queue.heartbeat(self.worker_id)
+        workers = await send_queue.alive_workers()
+        if self.worker_id not in workers:
+            workers.append(self.worker_id)
+
+        ring = HashRing(workers)
+        desired = {p for p in range(send_queue.partitions) if ring.get_node(f"partition:{p}") == self.worker_id}
+
+        # Убираем завершившиеся задачи партиций
+        for partition, task in list(self._partition_tasks.items()):
+            if task.done():
+                del self._partition_tasks[partition]
+                self._releasing.discard(partition)
+
+        # Аренда продлевается, пока задача партиции не завершится (в том числе при передаче
+        # другому воркеру): иначе новый владелец повторит из PEL задачу, которая еще отправляется
+        for partition in list(self._partition_tasks):
+            if not await send_queue.acquire_partition(partition, self.worker_id):
+                # Аренду потеряли (например, долгая пауза процесса) - прекращаем чтение
+                if partition not in self._releasing:
+                    logger.warning("partition_lease_lost", worker_id=self.worker_id, partition=partition)
+                self._releasing.add(partition)
+            elif partition not in desired:
+                # Партиция переезжает к другому воркеру - отдаем после текущей задачи (в finally)
+                self._releasing.add(partition)
+
+        for partition in desired:
+            if partition in self._partition_tasks:
+                continue
+            if await send_queue.acquire_partition(partition, self.worker_id):
+                self._partition_tasks[partition] = asyncio.create_task(self._consume_partition(partition))
+                logger.info("partition_acquired", worker_id=self.worker_id, partition=partition)
+
+        if self._partition_tasks or desired:
+            logger.debug(
+                "partitions_rebalanced",
+                worker_id=self.worker_id,
+                workers=len(workers),
+                owned=sorted(self._partition_tasks),
+                desired=sorted(desired),
+            )
+
+    async def _consume_partition(self, partition: int):
+        """
+        Последовательно обрабатывать задачи партиции (порядок внутри партиции сохраняется).
+
+        Args:
+            partition: Номер партиции
+        """
+        # Сначала дочитываем задачи, которые прежний владелец взял, но не подтвердил
+        pending = True
+        try:
+            while self._running and partition not in self._releasing:
+                try:
+                    entries = await send_queue.read(partition, count=1, pending=pending)
+                    if pending and not entries:
+                        pending = False
+                        continue
+                    for entry_id, task in entries:
+                        if not await self._handle_entry(partition, entry_id, task):
+                            # Задача осталась неподтвержденной - повторяем ее, не переходя к следующим
+                            pending = True
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error("partition_consume_error", worker_id=self.worker_id, partition=partition, error=str(e))
+                    await asyncio.sleep(5)
+        finally:
+            if partition in self._releasing:
+                try:
+                    await send_queue.release_partition(partition, self.worker_id)
+                    logger.info("partition_released", worker_id=self.worker_id, partition=partition)
+                except Exception as e:
+                    logger.warning("partition_release_failed", partition=partition, error=str(e))
+
+    async def _handle_entry(self, partition: int, entry_id: str, task: dict) -> bool:
+        """
+        Обработать одну задачу и подтвердить ее.
+
+        Ошибки отправки в MAX уже переданы MessageProcessor в message_log_writer (FailedMessage),
+        поэтому задача подтверждается. Если обработка упала с исключением
+        (например, недоступна БД), задача не подтверждается и повторяется
+        (до settings.max_retry_attempts раз, затем отбрасывается).
+
+        Args:
+            partition: Номер партиции
+            entry_id: ID записи в stream
+            task: Задача
+
+        Returns:
+            True если задача подтверждена
+        """
+        if not task:
+            await send_queue.ack(partition, entry_id)
+            return True
+
+        try:
+            result = await self.message_processor.handle_send_task(task)
+            logger.info(
+                "send_task_processed", partition=partition, entry_id=entry_id, kind=task.get("kind"), success=result
+            )
+        except Exception as e:
+            attempts = self._failed_attempts.get(entry_id, 0) + 1
+            logger.error(
+                "send_task_failed",
+                partition=partition,
+                entry_id=entry_id,
+                kind=task.get("kind"),
+                attempt=attempts,
+                error=str(e),
+                exc_info=True,
+            )
+            if attempts < settings.max_retry_attempts:
+                self._failed_attempts[entry_id] = attempts
+                await asyncio.sleep(min(settings.retry_base_delay * settings.retry_exponential_base**attempts, 60))
+                return False
+            logger.error("send_task_dropped", partition=partition, entry_id=entry_id, kind=task.get("kind"))
+
+        self._failed_attempts.pop(entry_id, None)
+        await send_queue.ack(partition, entry_id)
+        await self._release_media(task)
+        return True
+
+    async def _release_media(self, task: dict):
+        """Удалить общие медиа-файлы задачи, если это была последняя задача, которая их использовала."""
+        media_ref = task.get("media_ref")
+        if not media_ref:
+            return
+
+        try:
+            if await send_queue.release_media_ref(media_ref):
+                for file_path in task.get("media_files", []):
+                    await delete_media_file(file_path)
+        except Exception as e:
+            logger.warning("failed_to_release_shared_media", media_ref=media_ref, error=str(e))
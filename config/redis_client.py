@@ -1,4 +1,5 @@
 """Настройка Redis клиента."""
+import asyncio
 import redis.asyncio as aioredis
 from typing import Optional
 from config.settings import settings
@@ -7,20 +8,51 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 
 redis_client: Optional[aioredis.Redis] = None
+_init_lock: Optional[asyncio.Lock] = None
+_monitor_task: Optional[asyncio.Task] = None
+_healthy = False
+
+
+class CountingConnectionPool(aioredis.ConnectionPool):
+    """Пул соединений Redis, считающий выданные соединения (для метрик, без доступа к внутренностям пула)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_use = 0
+
+    async def get_connection(self, *args, **kwargs):
+        """Выдать соединение из пула."""
+        connection = await super().get_connection(*args, **kwargs)
+        self.in_use += 1
+        return connection
+
+    async def release(self, connection) -> None:
+        """Вернуть соединение в пул."""
+        self.in_use = max(0, self.in_use - 1)
+        await super().release(connection)
 
 
 async def init_redis() -> None:
     """Инициализация Redis клиента."""
-    global redis_client
+    global redis_client, _healthy
     try:
-        redis_client = await aioredis.from_url(
+        pool = CountingConnectionPool.from_url(
             settings.redis_url,
             encoding="utf-8",
-            decode_responses=True
+            decode_responses=True,
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            # Соединение, простаивавшее дольше интервала, проверяется перед использованием
+            health_check_interval=settings.redis_health_check_interval,
+            retry_on_timeout=True,
         )
+        client = aioredis.Redis(connection_pool=pool)
         # Проверка соединения
-        await redis_client.ping()
-        logger.info("redis_connected", url=settings.redis_url)
+        await client.ping()
+        redis_client = client
+        _healthy = True
+        logger.info("redis_connected", url=settings.redis_url, max_connections=settings.redis_max_connections)
     except Exception as e:
         logger.error("redis_connection_error", error=str(e))
         raise
@@ -28,45 +60,89 @@ async def init_redis() -> None:
 
 async def close_redis() -> None:
     """Закрытие соединения с Redis."""
-    global redis_client
+    global redis_client, _monitor_task, _healthy
+    if _monitor_task:
+        _monitor_task.cancel()
+        try:
+            await _monitor_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _monitor_task = None
+
     if redis_client:
         try:
             await redis_client.close()
+            await redis_client.connection_pool.disconnect()
             logger.info("redis_disconnected")
         except Exception as e:
             logger.warning("redis_close_error", error=str(e))
         finally:
             redis_client = None
+            _healthy = False
 
 
 async def get_redis() -> aioredis.Redis:
     """
     Получить Redis клиент.
-    
+
+    Соединение не проверяется при каждом вызове: состояние Redis отслеживает
+    фоновый монитор, а разорванные соединения пула переоткрываются при
+    следующей команде.
+
     Returns:
         Redis клиент
-    
-    Raises:
-        RuntimeError: Если Redis не инициализирован
     """
+    global _init_lock, _monitor_task
     if redis_client is None:
-        await init_redis()
-    
-    # Проверка здоровья соединения
-    try:
-        await redis_client.ping()
-    except Exception as e:
-        logger.warning("redis_health_check_failed", error=str(e))
-        # Попытка переподключения
-        await init_redis()
-    
+        if _init_lock is None:
+            _init_lock = asyncio.Lock()
+        async with _init_lock:
+            if redis_client is None:
+                await init_redis()
+
+    if _monitor_task is None or _monitor_task.done():
+        _monitor_task = asyncio.create_task(_health_monitor())
+
     return redis_client
 
 
+async def _health_monitor() -> None:
+    """Периодически проверять Redis и сбрасывать соединения пула после сбоя."""
+    global _healthy
+    while True:
+        await asyncio.sleep(settings.redis_health_check_interval)
+        client = redis_client
+        if client is None:
+            continue
+
+        try:
+            await client.ping()
+            if not _healthy:
+                logger.info("redis_connection_restored")
+            _healthy = True
+        except Exception as e:
+            if _healthy:
+                logger.warning("redis_health_check_failed", error=str(e))
+            _healthy = False
+            # Разорванные соединения будут открыты заново при следующей команде
+            try:
+                await client.connection_pool.disconnect(inuse_connections=False)
+            except Exception:
+                pass
+
+        from app.utils.metrics import metrics_collector
+
+        if metrics_collector.enabled:
+            in_use = client.connection_pool.in_use
+            metrics_collector.set_gauge("redis_healthy", 1 if _healthy else 0)
+            metrics_collector.set_gauge("redis_pool_in_use", in_use)
+            metrics_collector.set_gauge("redis_pool_available", max(0, settings.redis_max_connections - in_use))
+
+
 async def health_check() -> bool:
     """
     Проверка здоровья Redis.
-    
+
     Returns:
         True если Redis доступен, False в противном случае
     """
@@ -78,3 +154,7 @@ async def health_check() -> bool:
     except Exception:
         return False
 
+
+def is_healthy() -> bool:
+    """Последний результат фоновой проверки Redis (без запроса к Redis)."""
+    return redis_client is not None and _healthy
@@ -3,6 +3,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from typing import Optional
+from datetime import datetime
 
 
 class Settings(BaseSettings):
@@ -31,6 +32,18 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://localhost:6379/0"
     redis_cache_ttl: int = 600  # 10 minutes
+    redis_max_connections: int = 50  # Максимум соединений в пуле Redis (на процесс)
+    redis_socket_timeout: float = 5.0  # Таймаут подключения и операций Redis (секунды)
+    redis_health_check_interval: int = 15  # Интервал фоновой проверки Redis (секунды)
+    local_cache_max_size: int = 10000  # Максимум ключей в локальном кэше процесса (перед Redis)
+    local_cache_ttl: float = 5.0  # Время жизни записи в локальном кэше (секунды)
+    cache_negative_ttl: int = 30  # Время жизни закэшированного отсутствия данных (секунды)
+
+    # Rate limiting
+    rate_limiter_backend: str = "redis"  # "redis" - общий бюджет для всех процессов, "memory" - в процессе
+    max_api_rate_limit: int = 30  # Запросов в секунду к MAX API на один канал
+    max_api_global_rate_limit: int = 30  # Запросов в секунду к MAX API суммарно по всем процессам
+    rate_limiter_max_keys: int = 10000  # Максимум ключей в локальном состоянии лимитера (давно неиспользуемые вытесняются)
 
     # Application
     log_level: str = "INFO"
@@ -48,18 +61,34 @@ class Settings(BaseSettings):
     media_cleanup_after_seconds: int = 1800  # Удалять файлы через 30 минут после создания (production)
     media_max_file_size_mb: int = 300  # Увеличено для production
     media_cleanup_interval_seconds: int = 1800  # Интервал автоматической очистки (30 минут)
+    media_in_memory_enabled: bool = False  # Передавать небольшие файлы из Telegram в MAX через память, минуя диск
+    media_in_memory_max_size_mb: int = 20  # Максимальный размер файла для передачи через память (MB)
+    media_upload_token_ttl: int = 300  # Время жизни token загруженного файла для повторной отправки (секунды)
 
     # API timeouts
-    max_api_timeout: float = 30.0  # Таймаут для MAX API запросов
+    max_api_timeout: float = 30.0  # Таймаут для MAX API запросов (и срок отправки в одну связь)
+    send_post_deadline: float = 120.0  # Срок обработки поста во все связи (секунды)
+    send_retry_budget: int = 6  # Повторных попыток на одну связь на всех уровнях (HTTP, вложения, ошибки)
     max_api_upload_timeout: float = 120.0  # Таймаут для загрузки файлов
+    max_api_upload_http2: bool = True  # Использовать HTTP/2 для загрузки на CDN (если установлен пакет h2)
+    max_api_upload_max_connections: int = 20  # Максимум соединений в пуле загрузки файлов
+    max_api_upload_max_keepalive: int = 10  # Максимум keep-alive соединений в пуле загрузки
+    max_api_upload_keepalive_expiry: float = 60.0  # Время жизни простаивающего соединения (секунды)
     telegram_api_timeout: float = 60.0  # Таймаут для Telegram API
 
     # Delays (adaptive)
     media_upload_delay_photo: float = 0.5  # Задержка между загрузками фото
     media_upload_delay_video: float = 1.0  # Задержка между загрузками видео
-    media_processing_delay_photo: float = 2.0  # Задержка после загрузки фото
-    media_processing_delay_video: float = 3.0  # Задержка после загрузки видео
-    media_group_timeout: int = 2  # Таймаут для сбора media groups
+    media_processing_delay_photo: float = 2.0  # Ожидаемое время обработки фото (пока нет наблюдений)
+    media_processing_delay_video: float = 3.0  # Ожидаемое время обработки видео и файлов (пока нет наблюдений)
+    attachment_readiness_min_samples: int = 10  # Наблюдений, после которых используется выученное расписание
+    attachment_readiness_max_samples: int = 200  # Хранимых наблюдений на (тип медиа, интервал размера)
+    attachment_readiness_save_every: int = 10  # Сохранять наблюдения в Redis каждые N записей
+    attachment_readiness_ttl: int = 2592000  # Время хранения наблюдений (секунды)
+    attachment_readiness_min_delay: float = 0.25  # Минимальная пауза после attachment.not.ready (секунды)
+    media_group_timeout: int = 2  # Таймаут для сбора media groups (после последнего сообщения группы)
+    media_group_max_wait: float = 10.0  # Максимальное время сборки media group от первого сообщения (секунды)
+    media_group_max_pending: int = 1000  # Максимальное количество собираемых media groups
 
     # Circuit breaker
     circuit_breaker_failure_threshold: int = 5  # Количество ошибок для открытия
@@ -69,6 +98,14 @@ class Settings(BaseSettings):
     # Batch processing
     batch_size_media_uploads: int = 20  # Увеличено для лучшей производительности
     batch_size_db_updates: int = 20  # Размер батча для обновлений БД
+    log_writer_enabled: bool = True  # Записывать результаты отправки в БД пачками в фоне (receiver и воркеры)
+    log_writer_flush_interval_ms: int = 200  # Интервал сброса результатов отправки (мс)
+    log_writer_batch_size: int = 500  # Сбрасывать досрочно при накоплении стольких результатов
+    log_writer_max_buffer: int = 10000  # Максимум результатов в буфере, дальше отправка ждет сброса
+    log_partition_months_ahead: int = 3  # Сколько месячных секций messages_log создавать заранее
+    log_partition_retention_months: int = 12  # Сколько месяцев хранить секции messages_log (0 - хранить все)
+    log_partition_drop_detached: bool = False  # Удалять отсоединенные секции (иначе остаются таблицами для архива)
+    log_partition_maintenance_interval: int = 21600  # Интервал обслуживания секций (секунды)
 
     # Performance monitoring
     enable_metrics: bool = True  # Включить сбор метрик
@@ -81,9 +118,26 @@ class Settings(BaseSettings):
     migration_progress_update_interval: int = 100  # Обновление прогресса каждые 100 постов
     migration_progress_update_time: int = 300  # Обновление прогресса каждые 5 минут (секунды)
     migration_streaming_enabled: bool = True  # Использовать потоковую обработку истории
+    migration_max_posts: int = 30  # Сколько последних постов переносить (медиа-группа = 1 пост, 0 = без ограничения)
+    migration_since_date: Optional[datetime] = None  # Переносить посты не старше этой даты
+    migration_until_date: Optional[datetime] = None  # Переносить посты не новее этой даты
+    migration_min_message_id: Optional[int] = None  # Минимальный ID сообщения для переноса (включительно)
+    migration_max_message_id: Optional[int] = None  # Максимальный ID сообщения для переноса (включительно)
 
     # Кросспостинг
     crossposting_parallel_links: int = 20  # Параллельно обрабатывать 20 связей для кросспостинга
+    link_routing_enabled: bool = True  # Держать активные связи в памяти процесса (без запросов к БД на каждый пост)
+    link_routing_channel: str = "crossposting:link_changes"  # Канал Redis pub/sub событий изменения связей
+    link_routing_refresh_seconds: int = 300  # Интервал полной перезагрузки таблицы связей (секунды)
+
+    # Очередь отправки (Redis Streams между MTProto receiver и воркерами)
+    send_queue_enabled: bool = False  # Receiver ставит задачи в очередь вместо отправки в MAX напрямую
+    send_queue_stream: str = "crossposting:send_queue"  # Префикс ключей Redis stream с задачами
+    send_queue_group: str = "max_senders"  # Consumer group воркеров отправки
+    send_queue_max_length: int = 100000  # Приблизительный максимальный размер stream одной партиции
+    send_queue_partitions: int = 16  # Количество партиций (по MAX каналу), не менять при непустой очереди
+    sender_worker_processes: int = 2  # Количество процессов в python -m app.worker
+    sender_worker_heartbeat_seconds: float = 5.0  # Интервал heartbeat и перебалансировки партиций (секунды)
 
     # YooKassa settings
     yookassa_shop_id: Optional[str] = Field(default=None, env="YOOKASSA_SHOP_ID")
@@ -0,0 +1,50 @@
+"""Классификация ошибок MAX API и circuit breaker отправки сообщений."""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.core.message_processor import ENDPOINT_MESSAGES, MessageProcessor, max_channel_breaker_key
+from app.utils.circuit_breaker import CircuitBreakerRegistry, CircuitState, ErrorClass, classify_error
+from app.utils.exceptions import APIError
+
+
+def forbidden(request: httpx.Request) -> httpx.Response:
+    """Ответ MAX API для канала, из которого удален бот."""
+    return httpx.Response(403, json={"code": "chat.denied", "message": "Access denied"})
+
+
+def test_forbidden_send_is_permanent_and_keeps_endpoint_breaker_closed():
+    async def run():
+        processor = MessageProcessor()
+        await processor.max_client.client.aclose()
+        processor.max_client.client = httpx.AsyncClient(
+            base_url="https://max.test", transport=httpx.MockTransport(forbidden)
+        )
+        registry = CircuitBreakerRegistry(failure_threshold=2, recovery_timeout=60)
+
+        errors = []
+        # Каналов с ошибкой больше порога - временные ошибки разомкнули бы endpoint для всех каналов
+        for channel_id in range(1, 6):
+            link = SimpleNamespace(id=channel_id, max_channel=SimpleNamespace(channel_id=f"-{channel_id}"))
+            with pytest.raises(APIError) as exc_info:
+                await registry.call(
+                    [max_channel_breaker_key(link.max_channel.channel_id), ENDPOINT_MESSAGES],
+                    processor._send_to_max,
+                    link,
+                    {"type": "text", "text": "post"},
+                )
+            errors.append(exc_info.value)
+
+        await processor.close()
+        return registry, errors
+
+    registry, errors = asyncio.run(run())
+
+    assert all(error.status_code == 403 for error in errors)
+    assert all(classify_error(error) == ErrorClass.PERMANENT for error in errors)
+    assert registry.get(ENDPOINT_MESSAGES).get_state() == CircuitState.CLOSED
+    assert registry.get(max_channel_breaker_key("-1")).get_state() == CircuitState.CLOSED
+    assert registry.get_open() == {}